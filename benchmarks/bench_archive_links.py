@@ -0,0 +1,60 @@
+"""
+Benchmark the news-archive link extraction engines against the saved fixtures.
+
+    python -m benchmarks.bench_archive_links [--repeat N]
+
+Every engine must return exactly what the original full BeautifulSoup parse returns;
+the run fails otherwise. Timings are best-of-N per fixture, plus an early-stop run
+where only the newest three articles are unseen.
+"""
+import argparse, glob, os, sys, time
+
+from mtg_bot.link_extract import ENGINES, _is_article_link, extract_archive_links, resolve_engine
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "news_archive_*.html")
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    engines = sorted({resolve_engine(e) for e in ENGINES})
+    ok = True
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        reference = extract_archive_links(html, "soup")
+        # Pretend everything but the newest three distinct articles was posted before
+        articles = [link for link in reference if _is_article_link(link)]
+        newest = list(dict.fromkeys(articles))[:3]
+        seen = set(reference) - set(newest)
+        stop_at = next(i for i, link in enumerate(reference) if link in seen and _is_article_link(link))
+        expected_early = [link for link in reference[:stop_at] if link not in seen]
+        print(f"{os.path.basename(path)}: {len(html) / 1024:.0f} KiB, {len(reference)} links")
+        base = _best_of(lambda: extract_archive_links(html, "soup"), args.repeat)
+        for engine in engines:
+            same = extract_archive_links(html, engine) == reference
+            early = extract_archive_links(html, engine, seen) == expected_early
+            ok = ok and same and early
+            full = _best_of(lambda: extract_archive_links(html, engine), args.repeat)
+            stop = _best_of(lambda: extract_archive_links(html, engine, seen), args.repeat)
+            print(
+                f"  {engine:<9} full {full * 1000:7.2f} ms ({base / full:5.1f}x)  "
+                f"early-stop {stop * 1000:7.2f} ms ({base / stop:6.1f}x)  "
+                f"identical={'yes' if same and early else 'NO'}"
+            )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
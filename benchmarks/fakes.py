@@ -0,0 +1,195 @@
+"""
+Local stand-ins for the outside world: a Scryfall/Wizards HTTP server and a
+Discord bot/channel that only record what would have been sent.
+"""
+import asyncio, gzip, json, os, zlib
+
+from aiohttp import web
+
+
+class FakeWebServer:
+    """
+    aiohttp server on 127.0.0.1 with:
+      GET /bulk-data             Scryfall bulk index (ETag / If-None-Match)
+      GET /file/{name}           the bulk file (gzip on request, Range resume)
+      GET /en/news/archive       a saved news archive page (ETag)
+    """
+
+    def __init__(self, bulk_path: str | None = None, bulk_body: bytes | None = None,
+                 updated_at: str = "2025-06-10T09:00:00+00:00", advertised_size: int | None = None,
+                 archive_html: str | None = None, bulk_type: str = "default_cards"):
+        self.bulk_path = bulk_path
+        self.bulk_body = bulk_body
+        self.updated_at = updated_at
+        self.advertised_size = advertised_size
+        self.archive_html = archive_html or ""
+        self.bulk_type = bulk_type
+        self.truncate_next = False
+        self.requests: list[tuple[str, dict]] = []
+        self.runner = None
+        self.base = ""
+
+    def _size(self) -> int:
+        if self.advertised_size is not None:
+            return self.advertised_size
+        return len(self.bulk_body) if self.bulk_body is not None else os.path.getsize(self.bulk_path)
+
+    async def bulk_index(self, request):
+        self.requests.append(("index", dict(request.headers)))
+        etag = f'"{self.updated_at}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        payload = {"data": [{
+            "type": self.bulk_type,
+            "download_uri": f"{self.base}/file/{self.updated_at}.json",
+            "updated_at": self.updated_at,
+            "size": self._size(),
+        }]}
+        return web.json_response(payload, headers={"ETag": etag})
+
+    async def download(self, request):
+        self.requests.append(("download", dict(request.headers)))
+        if self.bulk_body is None:
+            return await self._stream_file(request)
+        body = self.bulk_body
+        rng = request.headers.get("Range")
+        if rng:
+            start = int(rng.split("=")[1].rstrip("-"))
+            return web.Response(status=206, body=body[start:], headers={
+                "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}",
+                "ETag": '"file"',
+            })
+        if self.truncate_next:
+            self.truncate_next = False
+            body = body[: len(body) // 2]
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            return web.Response(body=gzip.compress(body, compresslevel=1),
+                                headers={"Content-Encoding": "gzip", "ETag": '"file"'})
+        return web.Response(body=body, headers={"ETag": '"file"'})
+
+    async def _stream_file(self, request):
+        """Serve `bulk_path` in chunks so the fake itself doesn't hold the catalog in memory."""
+        total = os.path.getsize(self.bulk_path)
+        start = 0
+        headers = {"ETag": '"file"'}
+        rng = request.headers.get("Range")
+        if rng:
+            start = int(rng.split("=")[1].rstrip("-"))
+            headers["Content-Range"] = f"bytes {start}-{total - 1}/{total}"
+        gzipped = not rng and "gzip" in request.headers.get("Accept-Encoding", "")
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+        resp = web.StreamResponse(status=206 if rng else 200, headers=headers)
+        await resp.prepare(request)
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31) if gzipped else None
+        with open(self.bulk_path, "rb") as f:
+            f.seek(start)
+            while chunk := f.read(1 << 18):
+                await resp.write(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            await resp.write(compressor.flush())
+        await resp.write_eof()
+        return resp
+
+    async def archive(self, request):
+        self.requests.append(("archive", dict(request.headers)))
+        etag = '"archive"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=self.archive_html, content_type="text/html", headers={"ETag": etag})
+
+    def add_routes(self, app: web.Application) -> None:
+        """Hook for subclasses/tests to serve extra endpoints."""
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/bulk-data", self.bulk_index)
+        app.router.add_get("/file/{name}", self.download)
+        app.router.add_get("/en/news/archive", self.archive)
+        self.add_routes(app)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+    def kinds(self) -> list[str]:
+        return [kind for kind, _ in self.requests]
+
+
+class FakeSearchServer(FakeWebServer):
+    """
+    FakeWebServer plus Scryfall's GET /cards/search for `date>=YYYY-MM-DD` queries:
+    newest spoiled first, `page_size` cards per page linked by next_page, 404 when
+    nothing matches. `rate_limit_next` answers that many requests with a 429.
+    """
+
+    def __init__(self, cards: list[dict] | None = None, page_size: int = 175, **kwargs):
+        super().__init__(**kwargs)
+        self.cards = list(cards or [])
+        self.page_size = page_size
+        self.rate_limit_next = 0
+
+    def add_routes(self, app: web.Application) -> None:
+        app.router.add_get("/cards/search", self.search)
+
+    async def search(self, request):
+        self.requests.append(("search", dict(request.query)))
+        if self.rate_limit_next:
+            self.rate_limit_next -= 1
+            return web.json_response({"object": "error", "status": 429}, status=429, headers={"Retry-After": "0"})
+        since = request.query.get("q", "").partition(">=")[2]
+        matching = [c for c in self.cards if (c.get("released_at") or "") >= since]
+        if not matching:
+            return web.json_response({"object": "error", "status": 404, "code": "not_found"}, status=404)
+        matching.sort(key=lambda c: (c.get("preview") or {}).get("previewed_at") or c.get("released_at") or "",
+                      reverse=True)
+        page = int(request.query.get("page", "1"))
+        chunk = matching[(page - 1) * self.page_size:page * self.page_size]
+        body = {"object": "list", "total_cards": len(matching), "data": chunk,
+                "has_more": page * self.page_size < len(matching)}
+        if body["has_more"]:
+            body["next_page"] = str(request.url.update_query(page=str(page + 1)))
+        return web.json_response(body)
+
+
+class FakeChannel:
+    """Records every send; optional per-send latency mimics the Discord API."""
+
+    def __init__(self, channel_id: int, latency_s: float = 0.0):
+        self.id = channel_id
+        self.latency_s = latency_s
+        self.messages: list[dict] = []
+
+    async def send(self, content=None, *, embed=None, embeds=None, **kwargs):
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        batch = embeds if embeds is not None else ([embed] if embed is not None else [])
+        self.messages.append({"content": content, "embeds": [e.to_dict() for e in batch]})
+
+    @property
+    def embed_count(self) -> int:
+        return sum(len(m["embeds"]) for m in self.messages)
+
+
+class FakeBot:
+    """Just enough of discord.Client for the scheduled tasks."""
+
+    def __init__(self, *channels: FakeChannel):
+        self.channels = {c.id: c for c in channels}
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def wait_until_ready(self):
+        return None
+
+
+def dumps_cards(cards: list[dict]) -> bytes:
+    """Serialize cards in Scryfall's one-card-per-line array layout."""
+    return ("[\n" + ",\n".join(json.dumps(c, ensure_ascii=False) for c in cards) + "\n]\n").encode("utf-8")
@@ -0,0 +1,207 @@
+"""
+Benchmark the bot's hot paths against synthetic data and local fakes.
+
+    python -m benchmarks.run                      # 10k cards, compare with baseline.json
+    python -m benchmarks.run --sizes 10k,100k     # larger catalogs (1m is ~3 GB on disk)
+    python -m benchmarks.run --update-baseline    # record the current numbers
+
+Each benchmark is run once for wall time and once under tracemalloc for peak Python
+heap. The run fails (exit 1) when any number exceeds the stored baseline by more
+than --tolerance. Baselines are machine-specific: refresh them when the host changes.
+"""
+import argparse, asyncio, dataclasses, glob, json, os, resource, shutil, sys, tempfile, time, tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.fakes import FakeBot, FakeChannel, FakeWebServer
+from benchmarks.synth import parse_size, write_bulk
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+ARCHIVE_FIXTURE = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "news_archive_large.html")
+SPOILERS_CHANNEL, TESTING_CHANNEL = 1001, 1002
+
+
+def _config(workdir: str):
+    os.environ.update({
+        "DISCORD_TOKEN": "benchmark",
+        "MTG_SPOILERS_CHANNEL_ID": str(SPOILERS_CHANNEL),
+        "BOT_TESTING_CHANNEL_ID": str(TESTING_CHANNEL),
+        "BULK_DIR": os.path.join(workdir, "bulk"),
+        "STATE_PATH": os.path.join(workdir, "state.json"),
+        "SUBSCRIPTIONS_PATH": os.path.join(workdir, "subscriptions.json"),
+        "POST_DELAY_MS": "0",
+        "BULK_META_TTL_S": "0",
+    })
+    from mtg_bot.config import load_config
+    return load_config()
+
+
+def _measure(fn, setup=None) -> dict:
+    """Run `fn` (sync or returning a coroutine) twice: timed, then under tracemalloc."""
+    def once():
+        if setup:
+            setup()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            asyncio.run(result)
+
+    once_start = time.perf_counter()
+    once()
+    seconds = time.perf_counter() - once_start
+    tracemalloc.start()
+    try:
+        once()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "peak_mb": round(peak / 1e6, 2)}
+
+
+def run_size(label: str, n_cards: int, workdir: str) -> dict:
+    from mtg_bot.embeds import EmbedPayloadCache, card_embed
+    from mtg_bot.httpclient import HttpClient
+    from mtg_bot.scryfall import BulkScryfall, filter_recent_cards
+    from mtg_bot.state import PostedStore
+    from mtg_bot.tasks_articles import fetch_archive_links
+    from mtg_bot.tasks_spoilers import setup_daily_post
+    from mtg_bot.workers import BulkWorkers
+
+    cfg = _config(workdir)
+    source = os.path.join(workdir, "source.json")
+    print(f"[{label}] generating {n_cards} cards ...", flush=True)
+    write_bulk(source, n_cards)
+    with open(ARCHIVE_FIXTURE, "r", encoding="utf-8") as f:
+        archive_html = f.read()
+    since = date.today() - timedelta(days=cfg.window_days)
+    results: dict[str, dict] = {}
+
+    def reset_bulk_dir():
+        shutil.rmtree(cfg.bulk_dir, ignore_errors=True)
+        os.makedirs(cfg.bulk_dir)
+        for path in glob.glob(cfg.state_db_path + "*"):
+            os.remove(path)
+
+    async def ensure():
+        async with FakeWebServer(bulk_path=source, archive_html=archive_html) as server:
+            web = HttpClient()
+            try:
+                local = dataclasses.replace(cfg, bulk_index_url=f"{server.base}/bulk-data")
+                await BulkScryfall.from_config(web.session, local).ensure_bulk_file()
+            finally:
+                await web.close()
+
+    results["ensure_bulk_file"] = _measure(ensure, setup=reset_bulk_dir)
+    results["filter_full_load"] = _measure(lambda: filter_recent_cards(cfg.bulk_file_path, since, streaming=False))
+    results["filter_streaming"] = _measure(lambda: filter_recent_cards(cfg.bulk_file_path, since))
+    results["filter_indexed"] = _measure(
+        lambda: filter_recent_cards(cfg.bulk_file_path, since, index_path=cfg.bulk_index_path)
+    )
+    recent = filter_recent_cards(cfg.bulk_file_path, since, index_path=cfg.bulk_index_path)
+    print(f"[{label}] {len(recent)} recent cards", flush=True)
+
+    def store_ops():
+        with PostedStore(cfg.state_db_path) as store:
+            for card in recent[:500]:
+                store.persist_posted(card)
+            store.persist_many(recent[500:])
+            for card in recent * 10:
+                store.has_been_posted(card)
+
+    def reset_store():
+        for path in glob.glob(cfg.state_db_path + "*"):
+            os.remove(path)
+
+    results["state_store"] = _measure(store_ops, setup=reset_store)
+
+    def render_cold():
+        cache = EmbedPayloadCache()
+        for card in recent:
+            cache.payload(card, "bench")
+
+    results["card_embed_render"] = _measure(render_cold)
+    results["card_embed_objects"] = _measure(lambda: [card_embed(c, "bench") for c in recent])
+
+    async def archive_fetches():
+        async with FakeWebServer(archive_html=archive_html) as server:
+            web = HttpClient()
+            try:
+                for _ in range(20):
+                    await fetch_archive_links(web.session, url=f"{server.base}/en/news/archive")
+            finally:
+                await web.close()
+
+    results["fetch_archive_links_x20"] = _measure(archive_fetches)
+
+    async def daily_run():
+        async with FakeWebServer(bulk_path=source, archive_html=archive_html) as server:
+            local = dataclasses.replace(cfg, bulk_index_url=f"{server.base}/bulk-data")
+            spoilers, testing = FakeChannel(SPOILERS_CHANNEL), FakeChannel(TESTING_CHANNEL)
+            web, workers = HttpClient(), BulkWorkers("thread")
+            try:
+                daily_post = setup_daily_post(FakeBot(spoilers, testing), local, workers, web)
+                await daily_post.coro()
+            finally:
+                await web.close()
+                workers.shutdown()
+            assert spoilers.embed_count == len(recent), (spoilers.embed_count, len(recent))
+
+    results["daily_post_end_to_end"] = _measure(daily_run, setup=reset_bulk_dir)
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    failures = []
+    for size, benches in current.items():
+        for name, now in benches.items():
+            base = (baseline.get(size) or {}).get(name)
+            if not base:
+                continue
+            # Small absolute slack so millisecond-scale timings don't flap
+            if now["seconds"] > base["seconds"] * (1 + tolerance) + 0.01:
+                failures.append(f"{size}/{name}: {now['seconds']}s vs baseline {base['seconds']}s")
+            if now["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 1.0:
+                failures.append(f"{size}/{name}: {now['peak_mb']} MB vs baseline {base['peak_mb']} MB")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the bot's hot paths.")
+    ap.add_argument("--sizes", default="10k", help="comma-separated card counts (10k,100k,1m or integers)")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed regression ratio (0.5 = +50%%)")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+
+    current = {}
+    for label in args.sizes.split(","):
+        label = label.strip().lower()
+        with tempfile.TemporaryDirectory(prefix="mtgbench_") as workdir:
+            current[label] = run_size(label, parse_size(label), workdir)
+
+    if args.json:
+        print(json.dumps(current, indent=2))
+    else:
+        for size, benches in current.items():
+            for name, r in benches.items():
+                print(f"{size:>5} {name:<26} {r['seconds'] * 1000:10.1f} ms {r['peak_mb']:9.2f} MB")
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.update_baseline:
+        baseline.update(current)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated: {BASELINE_PATH}")
+        return 0
+
+    failures = compare(current, baseline, args.tolerance)
+    for line in failures:
+        print(f"REGRESSION {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
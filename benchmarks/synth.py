@@ -0,0 +1,149 @@
+"""
+Synthetic Scryfall bulk data.
+
+    python -m benchmarks.synth --cards 100000 bulk_default_cards.json
+
+Cards carry the same fields (and roughly the same size) as default_cards entries and
+are written one per line inside a top-level array, like the real file. Dates are spread
+over several years with a small slice inside the last few days, so the recent-window
+filter keeps a realistic fraction.
+"""
+import argparse, json, random, uuid
+from datetime import date, timedelta
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+_FORMATS = ["standard", "future", "historic", "timeless", "gladiator", "pioneer", "explorer",
+            "modern", "legacy", "pauper", "vintage", "penny", "commander", "oathbreaker",
+            "standardbrawl", "brawl", "alchemy", "paupercommander", "duel", "oldschool", "premodern"]
+_TYPES = ["Creature — Elf Druid", "Instant", "Sorcery", "Artifact — Equipment", "Enchantment — Aura",
+          "Legendary Creature — Human Wizard", "Land", "Planeswalker — Jace", "Creature — Dragon"]
+_WORDS = ("flying trample haste vigilance target creature player opponent draw discard counter "
+          "sacrifice exile graveyard library battlefield token untap tap mana add control").split()
+_RARITIES = ["common", "uncommon", "rare", "mythic"]
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _images(cid: str) -> dict:
+    base = f"https://cards.scryfall.io/{{}}/front/{cid[0]}/{cid[1]}/{cid}.jpg?1700000000"
+    return {k: base.format(k) for k in ("small", "normal", "large", "png", "art_crop", "border_crop")}
+
+
+def make_card(rng: random.Random, i: int, today: date, recent_fraction: float) -> dict:
+    cid = str(uuid.UUID(int=rng.getrandbits(128)))
+    if rng.random() < recent_fraction:
+        released = today + timedelta(days=rng.randint(-2, 20))
+    else:
+        released = today - timedelta(days=rng.randint(30, 365 * 10))
+    set_code = f"s{i % 400:03d}"
+    card = {
+        "object": "card",
+        "id": cid,
+        "oracle_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "multiverse_ids": [rng.randint(1, 700000)],
+        "mtgo_id": rng.randint(1, 130000),
+        "tcgplayer_id": rng.randint(1, 600000),
+        "cardmarket_id": rng.randint(1, 800000),
+        "name": f"Synthetic Card {i}",
+        "lang": "en",
+        "released_at": released.isoformat(),
+        "uri": f"https://api.scryfall.com/cards/{cid}",
+        "scryfall_uri": f"https://scryfall.com/card/{set_code}/{i}/synthetic-card-{i}?utm_source=api",
+        "layout": "normal",
+        "highres_image": True,
+        "image_status": "highres_scan",
+        "image_uris": _images(cid),
+        "mana_cost": "{2}{G}",
+        "cmc": 3.0,
+        "type_line": rng.choice(_TYPES),
+        "oracle_text": _text(rng, rng.randint(8, 60)),
+        "power": str(rng.randint(0, 8)),
+        "toughness": str(rng.randint(1, 8)),
+        "colors": ["G"],
+        "color_identity": ["G"],
+        "keywords": rng.sample(_WORDS[:4], 2),
+        "legalities": {f: rng.choice(["legal", "not_legal"]) for f in _FORMATS},
+        "games": ["paper", "mtgo"],
+        "reserved": False,
+        "foil": True,
+        "nonfoil": True,
+        "finishes": ["nonfoil", "foil"],
+        "oversized": False,
+        "promo": False,
+        "reprint": rng.random() < 0.4,
+        "variation": False,
+        "set_id": str(uuid.UUID(int=i % 400)),
+        "set": set_code,
+        "set_name": f"Synthetic Set {i % 400}",
+        "set_type": "expansion",
+        "set_uri": f"https://api.scryfall.com/sets/{set_code}",
+        "rulings_uri": f"https://api.scryfall.com/cards/{cid}/rulings",
+        "prints_search_uri": "https://api.scryfall.com/cards/search?order=released&q=oracleid&unique=prints",
+        "collector_number": str(i % 300 + 1),
+        "digital": False,
+        "rarity": rng.choice(_RARITIES),
+        "flavor_text": _text(rng, rng.randint(0, 20)),
+        "artist": "Synthetic Artist",
+        "border_color": "black",
+        "frame": "2015",
+        "full_art": False,
+        "textless": False,
+        "booster": True,
+        "story_spotlight": False,
+        "prices": {"usd": f"{rng.random() * 20:.2f}", "usd_foil": None, "eur": f"{rng.random() * 20:.2f}",
+                   "tix": f"{rng.random():.2f}"},
+        "related_uris": {"gatherer": f"https://gatherer.wizards.com/Pages/Card/Details.aspx?multiverseid={i}",
+                         "edhrec": f"https://edhrec.com/route/?cc=Synthetic+Card+{i}"},
+        "purchase_uris": {"tcgplayer": f"https://www.tcgplayer.com/product/{i}",
+                          "cardmarket": f"https://www.cardmarket.com/en/Magic/Products/Search?searchString={i}"},
+    }
+    if released >= today - timedelta(days=2) and rng.random() < 0.7:
+        card["preview"] = {"source": "Synthetic Preview", "source_uri": "https://example.com/preview",
+                           "previewed_at": (today - timedelta(days=rng.randint(0, 2))).isoformat()}
+    if rng.random() < 0.03:
+        # Transforming double-faced card: rules text and images live on the faces
+        card["layout"] = "transform"
+        card["name"] = f"Synthetic Front {i} // Synthetic Back {i}"
+        card["card_faces"] = [
+            {"object": "card_face", "name": f"Synthetic Front {i}", "type_line": card["type_line"],
+             "oracle_text": card.pop("oracle_text"), "image_uris": card.pop("image_uris")},
+            {"object": "card_face", "name": f"Synthetic Back {i}", "type_line": "Land",
+             "oracle_text": _text(rng, 12), "image_uris": _images(cid[::-1])},
+        ]
+    return card
+
+
+def write_bulk(path: str, n_cards: int, seed: int = 1, today: date | None = None,
+               recent_fraction: float = 0.01) -> int:
+    """Write `n_cards` synthetic cards to `path`; returns the file size in bytes."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(n_cards):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(make_card(rng, i, today, recent_fraction), ensure_ascii=False))
+        f.write("\n]\n")
+        return f.tell()
+
+
+def parse_size(raw: str) -> int:
+    return SIZES.get(raw.lower()) or int(raw)
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Write a synthetic Scryfall bulk file.")
+    ap.add_argument("path")
+    ap.add_argument("--cards", default="10k", help="card count or one of 10k/100k/1m")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    size = write_bulk(args.path, parse_size(args.cards), args.seed)
+    print(f"wrote {args.path}: {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
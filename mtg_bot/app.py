@@ -1,35 +1,155 @@
+import argparse, json, time, tracemalloc
+from contextlib import contextmanager
+
+_IMPORT_START = time.perf_counter()
 import discord
+from discord import app_commands
 from .config import load_config
+from .coordination import WORKER_ID, LeaderLock
 
-from .tasks_spoilers import setup_daily_post
+from .tasks_spoilers import setup_daily_post, setup_outbox_worker, setup_spoiler_feed
 from .tasks_articles import setup_hourly_news
 
 from .commands_spoilers import register_handlers
+from .workers import BulkWorkers
+from .fileio import read_json
+from .httpclient import HttpClient
+from .metrics import METRICS, MetricsServer, install_rate_limit_counter, install_stage_log
+
+# Everything above (discord.py and aiohttp dominate); optional extras such as bs4,
+# lxml, numpy and aiohttp's server side are only imported on first use
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+@contextmanager
+def _startup_phase(timings: dict, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - start
+        METRICS.set("startup_seconds", timings[phase], phase=phase)
+
+class SpoilersBot(discord.Client):
+    """
+    discord.Client that owns the shared HTTP client (and metrics endpoint) and closes
+    them on shutdown. Slash commands live on `tree` and are synced at startup.
+    """
+
+    def __init__(self, *, web: HttpClient, metrics_server: MetricsServer | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.web = web
+        self.metrics_server = metrics_server
+        self.tree = app_commands.CommandTree(self)
+
+    async def setup_hook(self):
+        await self.tree.sync()
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+            print(f"[metrics] serving http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+
+    async def close(self):
+        print(f"[http] shutting down: {self.web.stats_line()}")
+        await self.web.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await super().close()
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="bot.py", description="MTG spoilers Discord bot")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="run the startup phases, print their timings as JSON and exit without logging in")
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None):
+    args = _parse_args(argv)
+    timings = {"imports": _IMPORT_SECONDS}
+    METRICS.set("startup_seconds", _IMPORT_SECONDS, phase="imports")
 
-def main():
-    cfg = load_config()
+    with _startup_phase(timings, "config"):
+        cfg = load_config()
 
-    intents = discord.Intents.default()
-    intents.message_content = True
-    bot = discord.Client(intents=intents)
+    with _startup_phase(timings, "setup"):
+        # Slash commands only: no privileged message-content intent needed
+        intents = discord.Intents.default()
+        # One pooled HTTP session for Scryfall and the news scrape (created on first use)
+        web = HttpClient.from_config(cfg)
+        if cfg.metrics_tracemalloc:
+            tracemalloc.start()
+        install_rate_limit_counter()
+        if cfg.metrics_log:
+            install_stage_log()
+        metrics_server = MetricsServer(host=cfg.metrics_host, port=cfg.metrics_port) if cfg.metrics_port else None
+        bot = SpoilersBot(intents=intents, web=web, metrics_server=metrics_server)
 
-    # Register commands and events
-    register_handlers(bot, cfg)
+        # Executor for bulk-file parsing/filtering so the gateway keeps its heartbeats
+        workers = BulkWorkers.from_config(cfg)
 
-    # Build and start the tasks once the bot is up
-    daily_post = setup_daily_post(bot, cfg)
-    hourly_news = setup_hourly_news(bot)
+        # Register commands and events
+        register_handlers(bot, cfg, workers, web)
+
+        # Build and start the tasks once the bot is up. Any number of these processes
+        # can share the state: scheduled jobs run only in the one holding the leader
+        # lock, while every process helps drain the outbox
+        leader = LeaderLock.from_config(cfg)
+        daily_post = setup_daily_post(bot, cfg, workers, web, leader)
+        spoiler_feed = setup_spoiler_feed(bot, cfg, web, leader)
+        outbox_worker = setup_outbox_worker(bot, cfg)
+        hourly_news = setup_hourly_news(bot, web, leader)
+
+    # Recent window and dedupe set from the last run, if they still match the files on disk
+    restored = None
+    if workers.warm_start is not None:
+        with _startup_phase(timings, "warm_start"):
+            restored = workers.warm_start.load(workers.cache)
+
+    if args.startup_time:
+        workers.shutdown()
+        timings = {phase: round(seconds, 4) for phase, seconds in timings.items()}
+        print(json.dumps({"startup_seconds": timings, "total_seconds": round(sum(timings.values()), 4),
+                          "warm_start": restored}))
+        return
 
     @bot.event
     async def on_ready():
-        # start scheduled task if not already running
+        if "ready" not in timings:
+            timings["ready"] = time.perf_counter() - _IMPORT_START
+            METRICS.set("startup_seconds", timings["ready"], phase="ready")
+            print(f"[startup] ready in {timings['ready']:.2f}s; "
+                  + " ".join(f"{k}={v:.3f}s" for k, v in timings.items() if k != "ready")
+                  + f"; warm start: {restored}")
+
+        if not leader.is_leader():
+            print(f"[leader] {WORKER_ID} on standby; {leader.path} is held by another worker")
+
+        # Warm the /card index for the snapshot on disk; autocomplete stays empty until then
+        updated_at = read_json(cfg.bulk_meta_path).get("updated_at")
+        if updated_at:
+            workers.preload_names(updated_at, cfg.bulk_names_path, cfg.bulk_file_path, cfg.bulk_store_path)
+
+        # start scheduled task if not already running; the outbox worker first resumes
+        # whatever a previous process left queued
+        if not outbox_worker.is_running():
+            outbox_worker.start()
+
         if not daily_post.is_running():
             daily_post.start()
 
+        if spoiler_feed is not None and not spoiler_feed.is_running():
+            spoiler_feed.start()
+
         if not hourly_news.is_running():
             hourly_news.start()
 
-    bot.run(cfg.discord_token)
+    try:
+        bot.run(cfg.discord_token)
+    finally:
+        if workers.warm_start is not None:
+            try:
+                workers.warm_start.save(workers.cache)
+            except Exception as e:
+                print(f"[warm_start] save failed: {e}")
+        workers.shutdown()
+        leader.release()
 
 if __name__ == "__main__":
     main()
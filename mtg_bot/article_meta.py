@@ -0,0 +1,151 @@
+import asyncio, codecs, time
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import aiohttp
+
+from .metrics import METRICS
+
+HEAD_MAX_BYTES = 512 * 1024  # give up on pages whose <head> never ends
+
+
+@dataclass(frozen=True)
+class ArticleMeta:
+    url: str
+    title: str | None = None
+    author: str | None = None
+    summary: str | None = None
+    image: str | None = None
+
+
+class _HeadDone(Exception):
+    pass
+
+
+class _HeadParser(HTMLParser):
+    """Collects <title> and the few <meta> tags we use; stops at </head> or <body>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: dict[str, str] = {}
+        self.title_parts: list[str] | None = None
+        self.title: str | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _HeadDone
+        if tag == "title" and self.title is None:
+            self.title_parts = []
+        elif tag == "meta":
+            a = dict(attrs)
+            key = (a.get("property") or a.get("name") or "").lower()
+            if key and a.get("content") and key not in self.meta:
+                self.meta[key] = a["content"].strip()
+
+    def handle_data(self, data):
+        if self.title_parts is not None:
+            self.title_parts.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self.title_parts is not None:
+            self.title = " ".join("".join(self.title_parts).split()) or None
+            self.title_parts = None
+        elif tag == "head":
+            raise _HeadDone
+
+    def result(self, url: str) -> ArticleMeta:
+        m = self.meta
+        image = m.get("og:image") or m.get("twitter:image")
+        return ArticleMeta(
+            url=url,
+            title=m.get("og:title") or m.get("twitter:title") or self.title,
+            author=m.get("author") or m.get("article:author"),
+            summary=m.get("og:description") or m.get("description") or m.get("twitter:description"),
+            image=urljoin(url, image) if image else None,
+        )
+
+
+def parse_head(html: str, url: str) -> ArticleMeta:
+    """Metadata from the <head> of `html`; nothing after it is parsed."""
+    parser = _HeadParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except _HeadDone:
+        pass
+    return parser.result(url)
+
+
+class ArticleMetaCache:
+    """Per-URL metadata with a TTL (LRU-bounded), so a retried send reuses the fetch."""
+
+    def __init__(self, ttl_s: float = 6 * 3600, maxsize: int = 512, clock=time.monotonic):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data: "OrderedDict[str, tuple[float, ArticleMeta]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> ArticleMeta | None:
+        item = self._data.get(url)
+        if item is None or self.clock() - item[0] > self.ttl_s:
+            if item is not None:
+                del self._data[url]
+            self.misses += 1
+            return None
+        self._data.move_to_end(url)
+        self.hits += 1
+        return item[1]
+
+    def put(self, meta: ArticleMeta) -> None:
+        self._data[meta.url] = (self.clock(), meta)
+        self._data.move_to_end(meta.url)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+async def fetch_article_meta(
+    session: aiohttp.ClientSession, url: str, cache: ArticleMetaCache | None = None,
+    user_agent: str | None = None, timeout: aiohttp.ClientTimeout | None = None,
+) -> ArticleMeta | None:
+    """
+    Title/author/summary/og:image for one article, reading the page only until
+    its <head> is complete. Returns None when the page can't be fetched.
+    """
+    if cache is not None:
+        meta = cache.get(url)
+        if meta is not None:
+            METRICS.inc("article_meta", result="cached")
+            return meta
+    headers = {"User-Agent": user_agent} if user_agent else {}
+    parser = _HeadParser()
+    read = 0
+    try:
+        async with session.get(url, headers=headers, timeout=timeout or aiohttp.ClientTimeout(total=15)) as resp:
+            resp.raise_for_status()
+            decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+            try:
+                async for chunk in resp.content.iter_chunked(1 << 14):
+                    read += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    if read >= HEAD_MAX_BYTES:
+                        break
+                parser.close()
+            except _HeadDone:
+                pass  # the rest of the page is never downloaded
+    except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+        print(f"[hourly_news] article fetch error for {url}: {e}")
+        METRICS.inc("article_meta", result="error")
+        return None
+    METRICS.inc("article_meta", result="fetched")
+    METRICS.inc("news_bytes", read)
+    meta = parser.result(url)
+    if cache is not None:
+        cache.put(meta)
+    return meta
@@ -0,0 +1,172 @@
+import os, json, mmap, struct, uuid
+from datetime import date
+from typing import Iterable
+
+from .fileio import atomic_write
+
+# Optional NumPy for vectorized column operations over the index records; imported
+# on the first query rather than at startup (False once found to be missing)
+np = None
+
+# Sidecar index stored next to the bulk file. One fixed-width record per card:
+#   card id (16 raw uuid bytes), released_at ordinal, previewed_at ordinal,
+#   byte offset of the card object in the bulk file, byte length of that object.
+# Records are sorted by max(released, previewed) so a recent-window query is a
+# binary search for the first record inside the window plus targeted reads.
+INDEX_MAGIC = b"MTGIDX01"
+_HEADER = struct.Struct("<8sIqqI")  # magic, record count, bulk size, bulk mtime_ns, updated_at length
+_RECORD = struct.Struct("<16siiqI")
+_KEY = struct.Struct("<ii")  # the two date ordinals at the start of a record's tail
+# The same record layout as NumPy columns (packed, read in place from the mmap)
+_NP_FIELDS = [("id", "V16"), ("released", "<i4"), ("previewed", "<i4"), ("offset", "<i8"), ("length", "<u4")]
+
+
+def _numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = False
+    return np or None
+
+
+def date_ordinal(raw: str | None) -> int:
+    """Ordinal of an ISO date string; 0 when missing or unparsable (never recent)."""
+    if not raw:
+        return 0
+    try:
+        return date.fromisoformat(raw).toordinal()
+    except Exception:
+        return 0
+
+
+def card_id_bytes(card: dict) -> bytes:
+    try:
+        return uuid.UUID(card.get("id") or "").bytes
+    except ValueError:
+        return bytes(16)
+
+
+def _bulk_stat(bulk_path: str) -> tuple[int, int]:
+    st = os.stat(bulk_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def build_index(records: Iterable[tuple[int, int, dict]], index_path: str, bulk_path: str, updated_at: str) -> int:
+    """
+    Build the sidecar index from (offset, length, card) records and write it atomically.
+    Returns the number of indexed cards.
+    """
+    rows = []
+    for offset, length, card in records:
+        ra = date_ordinal(card.get("released_at"))
+        pv = date_ordinal((card.get("preview") or {}).get("previewed_at"))
+        rows.append((max(ra, pv), offset, card_id_bytes(card), ra, pv, length))
+    rows.sort()
+
+    size, mtime_ns = _bulk_stat(bulk_path)
+    stamp = updated_at.encode("utf-8")
+    with atomic_write(index_path, "wb", prefix=".tmp_index_") as wf:
+        wf.write(_HEADER.pack(INDEX_MAGIC, len(rows), size, mtime_ns, len(stamp)))
+        wf.write(stamp)
+        for _, offset, cid, ra, pv, length in rows:
+            wf.write(_RECORD.pack(cid, ra, pv, offset, length))
+    return len(rows)
+
+
+def read_index_header(index_path: str) -> dict | None:
+    """Return the index header fields, or None if the file is missing or not an index."""
+    try:
+        with open(index_path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                return None
+            magic, count, size, mtime_ns, stamp_len = _HEADER.unpack(head)
+            if magic != INDEX_MAGIC:
+                return None
+            updated_at = f.read(stamp_len).decode("utf-8")
+    except OSError:
+        return None
+    return {
+        "count": count,
+        "bulk_size": size,
+        "bulk_mtime_ns": mtime_ns,
+        "updated_at": updated_at,
+        "data_start": _HEADER.size + stamp_len,
+    }
+
+
+def index_is_fresh(index_path: str, bulk_path: str, updated_at: str | None = None) -> bool:
+    """True when the index was built from the bulk file currently on disk."""
+    header = read_index_header(index_path)
+    if header is None or not os.path.exists(bulk_path):
+        return False
+    if (header["bulk_size"], header["bulk_mtime_ns"]) != _bulk_stat(bulk_path):
+        return False
+    return updated_at is None or header["updated_at"] == updated_at
+
+
+def _recent_spans_numpy(mm, start: int, count: int, since: int) -> list[tuple[int, int]]:
+    cols = np.frombuffer(mm, dtype=np.dtype(_NP_FIELDS), count=count, offset=start)
+    ra, pv = cols["released"], cols["previewed"]
+    tail = cols[int(np.searchsorted(np.maximum(ra, pv), since)):]
+    # Newest first by preview date (else release date), ties in bulk-file order
+    key = np.where(tail["previewed"] > 0, tail["previewed"], tail["released"])
+    order = np.lexsort((tail["offset"], -key))
+    return list(zip(tail["offset"][order].tolist(), tail["length"][order].tolist()))
+
+
+def _recent_spans_python(mm, start: int, count: int, since: int) -> list[tuple[int, int]]:
+    def key(i: int) -> int:
+        ra, pv = _KEY.unpack_from(mm, start + i * _RECORD.size + 16)
+        return max(ra, pv)
+
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(mid) < since:
+            lo = mid + 1
+        else:
+            hi = mid
+    tail = _RECORD.iter_unpack(mm[start + lo * _RECORD.size:start + count * _RECORD.size])
+    rows = [(-(pv or ra), offset, length) for _, ra, pv, offset, length in tail]
+    rows.sort()
+    return [(offset, length) for _, offset, length in rows]
+
+
+def recent_spans(index_path: str, since_date: date) -> list[tuple[int, int]]:
+    """
+    (offset, length) of every card released or previewed on/after `since_date`,
+    newest first (preview date, else release date; ties in bulk-file order).
+    Works on the date columns alone: NumPy when installed, else a binary search
+    plus a sort over the matching records only.
+    """
+    header = read_index_header(index_path)
+    if header is None:
+        raise FileNotFoundError(index_path)
+    count, start = header["count"], header["data_start"]
+    if count == 0:
+        return []
+    since = since_date.toordinal()
+    with open(index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # The helpers return plain lists, so no array view outlives the mmap
+        if _numpy() is not None:
+            return _recent_spans_numpy(mm, start, count, since)
+        return _recent_spans_python(mm, start, count, since)
+
+
+def query_recent(index_path: str, bulk_path: str, since_date: date) -> list[dict]:
+    """
+    Load every card released or previewed on/after `since_date`, newest first.
+    Only the matching cards are decoded; they are read in file order for locality.
+    """
+    spans = recent_spans(index_path, since_date)
+    cards: list[dict | None] = [None] * len(spans)
+    with open(bulk_path, "rb") as bf:
+        for pos in sorted(range(len(spans)), key=lambda i: spans[i][0]):
+            offset, length = spans[pos]
+            bf.seek(offset)
+            cards[pos] = json.loads(bf.read(length))
+    return cards
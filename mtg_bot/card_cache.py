@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable
+
+from .bulk_index import date_ordinal
+
+
+class _Entry:
+    __slots__ = ("since_ordinal", "cards", "window_ordinals")
+
+    def __init__(self, since_ordinal: int, cards: list[dict]):
+        self.since_ordinal = since_ordinal
+        self.cards = cards  # newest first, as filter_recent_cards returns them
+        # max(released, previewed) per card, so narrower windows filter without re-parsing dates
+        self.window_ordinals = [
+            max(date_ordinal(c.get("released_at")),
+                date_ordinal((c.get("preview") or {}).get("previewed_at")))
+            for c in cards
+        ]
+
+
+class RecentCardCache:
+    """
+    Resident cache of recent-window results for the current bulk snapshot.
+    Entries are keyed by the window start; a cached wider window also answers any
+    narrower one. Everything is dropped when `updated_at` changes. Bounded by entry
+    count and total cards, least recently used first.
+    """
+
+    def __init__(self, max_entries: int = 8, max_cards: int = 50000):
+        self.max_entries = max(1, max_entries)
+        self.max_cards = max(1, max_cards)
+        self.updated_at: str | None = None
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._cards = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _invalidate(self, updated_at: str) -> None:
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._cards = 0
+        self.updated_at = updated_at
+
+    def _lookup(self, since_ordinal: int) -> list[dict] | None:
+        entry = self._entries.get(since_ordinal)
+        if entry is not None:
+            self._entries.move_to_end(since_ordinal)
+            return list(entry.cards)
+        # Any wider cached window contains this one; use the narrowest such, cards stay newest first
+        wider_keys = [key for key in self._entries if key <= since_ordinal]
+        if not wider_keys:
+            return None
+        key = max(wider_keys)
+        self._entries.move_to_end(key)
+        wider = self._entries[key]
+        return [c for c, o in zip(wider.cards, wider.window_ordinals) if o >= since_ordinal]
+
+    def _store(self, since_ordinal: int, cards: list[dict]) -> None:
+        if len(cards) > self.max_cards:
+            return  # would evict everything else and still not fit
+        self._entries[since_ordinal] = _Entry(since_ordinal, cards)
+        self._cards += len(cards)
+        while len(self._entries) > self.max_entries or self._cards > self.max_cards:
+            _, old = self._entries.popitem(last=False)
+            self._cards -= len(old.cards)
+            self.evictions += 1
+
+    async def get(
+        self,
+        updated_at: str,
+        since_date: date,
+        load: Callable[[], Awaitable[list[dict]]],
+    ) -> list[dict]:
+        """Return the cached window for `since_date`, calling `load()` on a miss."""
+        if updated_at != self.updated_at:
+            self._invalidate(updated_at)
+        since_ordinal = since_date.toordinal()
+        cards = self._lookup(since_ordinal)
+        if cards is not None:
+            self.hits += 1
+            return cards
+        self.misses += 1
+        cards = await load()
+        if self.updated_at == updated_at:  # not invalidated while loading
+            self._store(since_ordinal, cards)
+        return list(cards)
+
+    def export(self) -> list[tuple[int, list[dict]]]:
+        """
+        (window start ordinal, cards) for every resident entry, least recently used first.
+        Iterates the live entries: call it on the event loop that uses the cache.
+        """
+        return [(key, entry.cards) for key, entry in self._entries.items()]
+
+    def restore(self, updated_at: str, windows: list[tuple[int, list[dict]]]) -> None:
+        """Refill the cache from exported windows (warm start); replaces what is resident."""
+        self._entries.clear()
+        self._cards = 0
+        self.updated_at = updated_at
+        for since_ordinal, cards in windows:
+            self._store(int(since_ordinal), cards)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "cards": self._cards,
+        }
+
+    def stats_line(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.stats().items())
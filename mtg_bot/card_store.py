@@ -0,0 +1,255 @@
+import os, sys, json, mmap, shutil, struct, tempfile
+from array import array
+from typing import Iterable, Iterator
+
+# Compact binary card store written next to the bulk file in the index pass.
+#   header | updated_at | string pool | row table
+# The row table has one (pool offset, byte length) pair of little-endian uint32s per
+# field per card, rows in bulk-file order. Only the fields the embeds and filters
+# read are kept; double-faced cards keep a small JSON list of their faces.
+STORE_MAGIC = b"MTGCST01"
+FIELDS = (
+    "id", "oracle_id", "name", "type_line", "oracle_text", "scryfall_uri", "image",
+    "released_at", "previewed_at", "set", "set_name", "collector_number", "rarity", "layout", "faces",
+)
+_FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+_HEADER = struct.Struct("<8sIIqqqI")  # magic, count, field count, table offset, bulk size, bulk mtime_ns, stamp length
+_ROW = struct.Struct(f"<{2 * len(FIELDS)}I")
+# Values shared by many cards are stored once; ids, names and texts are unique enough
+# that remembering them would only grow the builder's memory with the catalog
+_INTERNED = frozenset(_FIELD_INDEX[k] for k in ("released_at", "previewed_at", "set", "set_name", "rarity", "layout"))
+
+
+def _image_of(uris: dict | None) -> str | None:
+    if not uris:
+        return None
+    return uris.get("normal") or uris.get("large") or uris.get("png")
+
+
+def _compact_faces(card: dict) -> str | None:
+    faces = card.get("card_faces")
+    if not faces:
+        return None
+    slim = []
+    for face in faces:
+        entry = {k: face[k] for k in ("name", "type_line", "oracle_text", "oracle_id") if face.get(k)}
+        image = _image_of(face.get("image_uris"))
+        if image:
+            entry["image_uris"] = {"normal": image}
+        slim.append(entry)
+    return json.dumps(slim, ensure_ascii=False, separators=(",", ":"))
+
+
+def store_values(card: dict) -> tuple:
+    """The stored field values of a card, in FIELDS order."""
+    return (
+        card.get("id"), card.get("oracle_id"), card.get("name"), card.get("type_line"),
+        card.get("oracle_text"), card.get("scryfall_uri"), _image_of(card.get("image_uris")),
+        card.get("released_at"), (card.get("preview") or {}).get("previewed_at"), card.get("set"),
+        card.get("set_name"), card.get("collector_number"), card.get("rarity"), card.get("layout"),
+        _compact_faces(card),
+    )
+
+
+class CardStoreBuilder:
+    """
+    Streams the string pool to disk while a bulk pass goes by. Row table entries go
+    to a scratch file and are appended after the pool, so memory stays flat.
+    """
+
+    def __init__(self, store_path: str, updated_at: str):
+        self.store_path = store_path
+        self.stamp = updated_at.encode("utf-8")
+        dirpath = os.path.dirname(os.path.abspath(store_path)) or "."
+        fd, self.tmpname = tempfile.mkstemp(dir=dirpath, prefix=".tmp_store_")
+        self.f = os.fdopen(fd, "wb")
+        self.f.write(bytes(_HEADER.size))  # patched in finish()
+        self.f.write(self.stamp)
+        self.pos = _HEADER.size + len(self.stamp)
+        self.table = tempfile.TemporaryFile(dir=dirpath, prefix=".tmp_store_rows_")
+        self.count = 0
+        self._interned: dict[bytes, int] = {}
+
+    def _put(self, field: int, value, span: list) -> None:
+        if value is None or value == "":
+            span += (0, 0)
+            return
+        raw = str(value).encode("utf-8")
+        offset = self._interned.get(raw) if field in _INTERNED else None
+        if offset is None:
+            offset = self.pos
+            if offset + len(raw) > 0xFFFFFFFF:
+                raise ValueError("card store string pool exceeds 4 GiB")
+            self.f.write(raw)
+            self.pos += len(raw)
+            if field in _INTERNED:
+                self._interned[raw] = offset
+        span += (offset, len(raw))
+
+    def observe(self, records: Iterable[tuple[int, int, dict]]) -> Iterator[tuple[int, int, dict]]:
+        for record in records:
+            span: list[int] = []
+            for field, value in enumerate(store_values(record[2])):
+                self._put(field, value, span)
+            self.table.write(_ROW.pack(*span))
+            self.count += 1
+            yield record
+
+    def finish(self, bulk_path: str) -> None:
+        try:
+            pad = -self.pos % 8
+            self.f.write(bytes(pad))
+            table_offset = self.pos + pad
+            self.table.seek(0)
+            shutil.copyfileobj(self.table, self.f)
+            st = os.stat(bulk_path)
+            self.f.seek(0)
+            self.f.write(_HEADER.pack(STORE_MAGIC, self.count, len(FIELDS), table_offset,
+                                      st.st_size, st.st_mtime_ns, len(self.stamp)))
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.f.close()
+            os.replace(self.tmpname, self.store_path)
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        self.table.close()
+        if not self.f.closed:
+            self.f.close()
+        try:
+            if os.path.exists(self.tmpname):
+                os.remove(self.tmpname)
+        except Exception:
+            pass
+
+
+def _read_header(store_path: str) -> tuple | None:
+    try:
+        with open(store_path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                return None
+            fields = _HEADER.unpack(head)
+            if fields[0] != STORE_MAGIC or fields[2] != len(FIELDS):
+                return None
+            return fields + (f.read(fields[6]).decode("utf-8"),)
+    except OSError:
+        return None
+
+
+def card_store_is_fresh(store_path: str, bulk_path: str, updated_at: str | None = None) -> bool:
+    """True when the store was built from the bulk file currently on disk."""
+    header = _read_header(store_path)
+    if header is None or not os.path.exists(bulk_path):
+        return False
+    st = os.stat(bulk_path)
+    if (header[4], header[5]) != (st.st_size, st.st_mtime_ns):
+        return False
+    return updated_at is None or header[7] == updated_at
+
+
+class CardView:
+    """
+    Read-only card backed by the store's mmap; fields are decoded on access.
+    Supports the dict reads the embeds and filters use (`get`, `[]`, `in`), with
+    `preview`, `image_uris` and `card_faces` rebuilt in their Scryfall shapes.
+    """
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "CardStore", row: int):
+        self._store = store
+        self._row = row
+
+    def get(self, key: str, default=None):
+        i = _FIELD_INDEX.get(key)
+        if i is not None and key not in ("image", "previewed_at", "faces"):
+            value = self._store._field(self._row, i)
+        elif key == "preview":
+            pv = self._store._field(self._row, _FIELD_INDEX["previewed_at"])
+            value = {"previewed_at": pv} if pv else None
+        elif key == "image_uris":
+            image = self._store._field(self._row, _FIELD_INDEX["image"])
+            value = {"normal": image} if image else None
+        elif key == "card_faces":
+            faces = self._store._field(self._row, _FIELD_INDEX["faces"])
+            value = json.loads(faces) if faces else None
+        else:
+            value = None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> dict:
+        keys = [k for k in FIELDS if k not in ("image", "previewed_at", "faces")]
+        keys += ["preview", "image_uris", "card_faces"]
+        return {k: v for k in keys if (v := self.get(k)) is not None}
+
+    def __repr__(self) -> str:
+        return f"<CardView row={self._row} name={self.get('name')!r}>"
+
+
+class CardStore:
+    """mmap reader for a card store; opening it costs one header read."""
+
+    def __init__(self, store_path: str):
+        header = _read_header(store_path)
+        if header is None:
+            raise ValueError(f"{store_path}: not a card store")
+        _, self.count, nfields, table_offset, _, _, _, self.updated_at = header
+        self._file = open(store_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        raw = memoryview(self._mm)[table_offset:table_offset + self.count * nfields * 8]
+        if sys.byteorder == "little":
+            self._raw = raw
+            self._table = raw.cast("I")  # zero-copy view of the row table
+        else:  # pragma: no cover - big-endian hosts
+            self._raw = None
+            self._table = array("I", raw.tobytes())
+            self._table.byteswap()
+            raw.release()
+
+    def __enter__(self) -> "CardStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        if isinstance(self._table, memoryview):
+            self._table.release()
+        if self._raw is not None:
+            self._raw.release()
+        self._mm.close()
+        self._file.close()
+        self._mm = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, row: int) -> CardView:
+        if not 0 <= row < self.count:
+            raise IndexError(row)
+        return CardView(self, row)
+
+    def __iter__(self) -> Iterator[CardView]:
+        return (CardView(self, row) for row in range(self.count))
+
+    def _span(self, row: int, field: int) -> tuple[int, int]:
+        base = (row * len(FIELDS) + field) * 2
+        return self._table[base], self._table[base + 1]
+
+    def _field(self, row: int, field: int) -> str | None:
+        offset, length = self._span(row, field)
+        if not length:
+            return None
+        return str(self._mm[offset:offset + length], "utf-8")
@@ -1,102 +1,203 @@
-import asyncio, aiohttp
+import asyncio
 from datetime import datetime, timedelta
 
+import discord
+from discord import app_commands
+
 from .config import Config, safe_tz
-from .scryfall import BulkScryfall, filter_recent_cards
-from .embeds import card_embed
-from .state import load_state, save_state_atomic, has_been_posted, persist_posted
+from .fileio import read_json
+from .scryfall import BulkScryfall, unique_by_oracle
+from .embeds import PAYLOAD_CACHE, card_embed
+from .fanout import fan_out_cards
+from .outbox import Outbox
+from .subscriptions import Subscription, SubscriptionRegistry
+from .workers import BulkWorkers, LoopLagMonitor
+from .httpclient import HttpClient
+from .state import PostedStore
 
-def register_handlers(bot, cfg: Config):
-    @bot.event
-    async def on_ready():
-        print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+MAX_COMMAND_WINDOW_DAYS = 60
 
-    @bot.event
-    async def on_message(message):
-        if message.author.bot:
-            return
-        content = message.content.strip().lower()
-        if content not in ("!check-now", "!post-all"):
+async def run_spoiler_command(
+    bot, cfg: Config, workers: BulkWorkers, web: HttpClient, name: str, reply,
+    window_days: int | None = None, set_code: str | None = None,
+) -> None:
+    """
+    The bulk work behind /check-now and /post-all. `reply` is an async callable
+    for the one message that answers the command (the interaction follow-up).
+    """
+    testing_channel = bot.get_channel(cfg.bot_testing_channel_id)
+
+    tz = safe_tz(cfg.tz_key)
+    now_local = datetime.now(tz)
+    days = cfg.window_days if window_days is None else window_days
+    since_date = (now_local.date() - timedelta(days=days))
+    set_code = set_code.strip().lower() if set_code else None
+
+    bulk = BulkScryfall.from_config(web.session, cfg, workers)
+    async with LoopLagMonitor() as lag:
+        _, bulk_updated_at = await bulk.ensure_bulk_file()
+        previews = await workers.recent_cards(
+            bulk_updated_at, cfg.bulk_file_path, since_date, cfg.bulk_index_path
+        )
+    if cfg.scryfall_unique == "cards":
+        previews = unique_by_oracle(previews)
+    if set_code:
+        previews = [c for c in previews if (c.get("set") or "").lower() == set_code]
+    scope = f"since_date={since_date}" + (f", set={set_code}" if set_code else "")
+
+    if testing_channel:
+        await testing_channel.send(
+            f"Debug (/{name}): {scope}, bulk_updated_at={bulk_updated_at}, "
+            f"previews_total={len(previews)}, max_loop_lag_ms={lag.max_lag_ms:.0f}; "
+            f"cache: {workers.cache.stats_line()}; embeds: {PAYLOAD_CACHE.stats_line()}; "
+            f"http: {web.stats_line()}"
+        )
+
+    if not previews:
+        if name == "post-all" and window_days is None and not set_code:
+            with PostedStore.from_config(cfg) as store:
+                store.last_run_date = now_local.date().isoformat()
+        await reply(f"No new spoilers/releases ({scope}, Bulk updated: {bulk_updated_at}).")
+        return
+
+    if name == "check-now":
+        await reply(
+            f"✅ Newest of {len(previews)} item(s). {scope} (Bulk updated: {bulk_updated_at}).",
+            embed=card_embed(previews[0], bulk_updated_at),
+        )
+        return
+
+    # post-all -> post every new preview to the spoilers channel
+    post_channel = bot.get_channel(cfg.mtg_spoilers_channel_id)
+    if not post_channel:
+        await reply("⚠️ Spoilers channel not found; cannot post embeds.")
+        return
+
+    delay_s = max(0.0, cfg.post_delay_ms / 1000.0)
+    # The previews are already narrowed to this command's window and set
+    target = SubscriptionRegistry([Subscription(0, cfg.mtg_spoilers_channel_id, window_days=days)])
+
+    with PostedStore.from_config(cfg) as store:
+        result = await fan_out_cards(
+            bot, target, previews, store, now_local.date(), days, bulk_updated_at,
+            delay_s, cfg.post_batch_size, cfg.fanout_max_concurrency, Outbox.from_config(store, cfg),
+        )
+        posted_total = result.total
+        if result.errors:
+            await reply(f"⚠️ Posted {posted_total} item(s); the rest stay queued for retry: {result.summary()}")
             return
 
-        testing_channel = bot.get_channel(cfg.bot_testing_channel_id)
+        # A narrowed run doesn't cover the whole default window
+        if window_days is None and not set_code:
+            store.last_run_date = now_local.date().isoformat()
+        store.prune()
+
+    await reply(f"✅ Posted {posted_total} item(s). {scope} (Bulk updated: {bulk_updated_at}).")
+
+def register_handlers(bot, cfg: Config, workers: BulkWorkers, web: HttpClient):
+    """
+    Register the owner-only slash commands (and the public /card lookup) on `bot.tree`.
+    Each command is acknowledged with a deferred response straight away; the bulk
+    work then runs as a background task and answers through the follow-up webhook
+    (valid for 15 minutes), so no message content needs to be read.
+    """
+    background: set[asyncio.Task] = set()
+
+    def _disk_updated_at() -> str | None:
+        # The snapshot on disk; lookups never trigger a bulk check or download
+        return read_json(cfg.bulk_meta_path).get("updated_at")
 
+    @bot.event
+    async def on_ready():
+        print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+
+    async def dispatch(interaction: discord.Interaction, name: str,
+                       window_days: int | None, set_code: str | None):
         # Owner-only gate
-        is_owner = (message.guild is not None and message.guild.owner_id == message.author.id)
+        is_owner = (interaction.guild is not None and interaction.guild.owner_id == interaction.user.id)
         if not is_owner:
+            await interaction.response.send_message(
+                f"⛔ /{name} is limited to the server owner.", ephemeral=True
+            )
+            testing_channel = bot.get_channel(cfg.bot_testing_channel_id)
             if testing_channel:
                 await testing_channel.send(
-                    f"⛔ Command '{content}' blocked. Only the server owner can run this command. "
-                    f"(User: {message.author}, Guild: {message.guild and message.guild.name})"
+                    f"⛔ Command '/{name}' blocked. Only the server owner can run this command. "
+                    f"(User: {interaction.user}, Guild: {interaction.guild and interaction.guild.name})"
                 )
             return
 
-        tz = safe_tz(cfg.tz_key)
-        now_local = datetime.now(tz)
-        since_date = (now_local.date() - timedelta(days=cfg.window_days))
-
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
-            bulk = BulkScryfall(session, cfg.bulk_meta_path, cfg.bulk_file_path)
-            _, bulk_updated_at = await bulk.ensure_bulk_file()
-            previews = filter_recent_cards(cfg.bulk_file_path, since_date)
+        await interaction.response.defer(thinking=True)
 
-            if testing_channel:
-                tag = "!check-now" if content == "!check-now" else "!post-all"
-                await testing_channel.send(
-                    f"Debug ({tag}): since_date={since_date}, bulk_updated_at={bulk_updated_at}, "
-                    f"previews_total={len(previews)}"
+        async def work():
+            try:
+                await run_spoiler_command(
+                    bot, cfg, workers, web, name, interaction.followup.send, window_days, set_code
                 )
+            except Exception as e:
+                print(f"[/{name}] failed: {e}")
+                await interaction.followup.send(f"⚠️ /{name} failed: {e}")
 
-            if content == "!check-now":
-                if not previews:
-                    if testing_channel:
-                        await testing_channel.send(
-                            f"No new spoilers/releases on/after {since_date} (Bulk updated: {bulk_updated_at})."
-                        )
-                    return
-                card = previews[0]
-                embed = card_embed(card)
-                if testing_channel:
-                    await testing_channel.send(embed=embed)
-                    await testing_channel.send(
-                        f"✅ Posted 1 item (newest). since_date={since_date} (Bulk updated: {bulk_updated_at})."
-                    )
-                return
-
-            # !post-all -> post every new preview to ONE channel
-            post_channel = bot.get_channel(cfg.mtg_spoilers_channel_id)
-            if not post_channel:
-                if testing_channel:
-                    await testing_channel.send("⚠️ Spoilers channel not found; cannot post embeds.")
-                return
-
-            if not previews:
-                st = load_state(cfg.state_path)
-                st["last_run_date"] = now_local.date().isoformat()
-                save_state_atomic(cfg.state_path, st)
-                if testing_channel:
-                    await testing_channel.send(
-                        f"No new spoilers/releases on/after {since_date} (Bulk updated: {bulk_updated_at})."
-                    )
-                return
-
-            delay_s = max(0.0, cfg.post_delay_ms / 1000.0)
-            posted_total = 0
-
-            st = load_state(cfg.state_path)
-            for card in previews:
-                if has_been_posted(st, card):
-                    continue
-                await post_channel.send(embed=card_embed(card))
-                posted_total += 1
-                st = persist_posted(cfg.state_path, st, card)
-                if delay_s > 0:
-                    await asyncio.sleep(delay_s)
-
-            st["last_run_date"] = now_local.date().isoformat()
-            save_state_atomic(cfg.state_path, st)
+        task = asyncio.create_task(work())
+        background.add(task)
+        task.add_done_callback(background.discard)
 
-            if testing_channel:
-                await testing_channel.send(
-                    f"✅ Posted {posted_total} item(s). since_date={since_date} (Bulk updated: {bulk_updated_at})."
-                )
+    window_param = app_commands.Range[int, 0, MAX_COMMAND_WINDOW_DAYS]
+
+    @bot.tree.command(name="check-now", description="Show the newest spoiler in the window")
+    @app_commands.describe(window_days="Days to look back (default WINDOW_DAYS)",
+                           set_code="Only cards from this set code, e.g. dsk")
+    async def check_now(interaction: discord.Interaction,
+                        window_days: window_param | None = None, set_code: str | None = None):
+        await dispatch(interaction, "check-now", window_days, set_code)
+
+    @bot.tree.command(name="post-all", description="Post every new spoiler in the window")
+    @app_commands.describe(window_days="Days to look back (default WINDOW_DAYS)",
+                           set_code="Only cards from this set code, e.g. dsk")
+    async def post_all(interaction: discord.Interaction,
+                       window_days: window_param | None = None, set_code: str | None = None):
+        await dispatch(interaction, "post-all", window_days, set_code)
+
+    @bot.tree.command(name="card", description="Look up a card by name, or by set code and collector number")
+    @app_commands.describe(name="Card name (exact, prefix or approximate)", set_code="Set code, e.g. dsk",
+                           collector_number="Collector number within the set")
+    async def card(interaction: discord.Interaction, name: str | None = None,
+                   set_code: str | None = None, collector_number: str | None = None):
+        # Acknowledge first: loading the index after a rebuild can take seconds
+        await interaction.response.defer(thinking=True)
+        updated_at = _disk_updated_at()
+        index = None
+        if updated_at:
+            index = await workers.name_index(updated_at, cfg.bulk_names_path, cfg.bulk_file_path, cfg.bulk_store_path)
+        if index is None:
+            await interaction.followup.send("Card index not built yet; it is created with the next bulk download.")
+            return
+        row, also = None, []
+        if set_code and collector_number:
+            row = index.by_set_number(set_code.strip(), collector_number.strip())
+        elif name:
+            hits = index.search(name, limit=5)
+            if hits:
+                row = index.newest_row(hits[0], set_code.strip() if set_code else None)
+                also = [index.display_name(k) for k in hits[1:]]
+        if row is None:
+            await interaction.followup.send("No matching card found.")
+            return
+        content = f"Also matching: {', '.join(also)}" if also else None
+        await interaction.followup.send(content, embed=card_embed(index.card(row), index.updated_at))
+
+    @card.autocomplete("name")
+    async def card_name_autocomplete(interaction: discord.Interaction, current: str):
+        # Never block the 3 s autocomplete deadline on a load; offer nothing until it is resident
+        updated_at = _disk_updated_at()
+        index = workers.loaded_name_index(updated_at) if updated_at else None
+        if index is None:
+            if updated_at:
+                workers.preload_names(updated_at, cfg.bulk_names_path, cfg.bulk_file_path, cfg.bulk_store_path)
+            return []
+        if not current.strip():
+            return []
+        names = [index.display_name(k)[:100] for k in index.prefix(current, limit=25)]
+        return [app_commands.Choice(name=n, value=n) for n in names]
+
+    return background
@@ -2,9 +2,9 @@ import os, sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-from dotenv import load_dotenv
 
-load_dotenv()
+# SCRYFALL_UNIQUE -> Scryfall bulk data type: every printing, or one card per oracle id
+BULK_TYPES = {"prints": "default_cards", "cards": "oracle_cards"}
 
 @dataclass(frozen=True)
 class Config:
@@ -17,9 +17,43 @@ class Config:
     bulk_dir: str
     bulk_meta_path: str
     bulk_file_path: str
+    bulk_index_path: str
+    bulk_fingerprints_path: str
+    bulk_delta_path: str
+    bulk_names_path: str
+    bulk_store_path: str
+    warm_start_path: str
+    use_bulk_delta: bool
+    scryfall_unique: str
+    bulk_type: str
+    bulk_meta_ttl_s: int
+    bulk_index_url: str
+    keep_previous_bulk: bool
+    bulk_executor: str
+    bulk_workers: int
+    card_cache_max_entries: int
+    card_cache_max_cards: int
     window_days: int
     state_path: str
+    state_db_path: str
+    posted_retention_days: int
+    posted_retention_max: int
     post_delay_ms: int
+    post_batch_size: int
+    subscriptions_path: str
+    fanout_max_concurrency: int
+    outbox_drain_seconds: int
+    outbox_max_attempts: int
+    leader_lock_path: str
+    spoiler_poll_minutes: int
+    spoiler_poll_max_pages: int
+    http_pool_limit: int
+    http_pool_per_host: int
+    http_dns_ttl_s: int
+    metrics_host: str
+    metrics_port: int
+    metrics_tracemalloc: bool
+    metrics_log: bool
 
 def _require_int(name: str, default: str | None = None) -> int:
     raw = os.getenv(name, default)
@@ -31,7 +65,19 @@ def _require_int(name: str, default: str | None = None) -> int:
         sys.exit(f"Invalid integer for {name}: {raw!r}")
     return val
 
+def _env_flag(name: str, default: str) -> bool:
+    raw = os.getenv(name, default).strip().lower()
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    sys.exit(f"Invalid boolean for {name}: {raw!r}")
+
 def load_config() -> Config:
+    # Read .env here rather than at import time, so importing the package has no side effects
+    from dotenv import load_dotenv
+    load_dotenv()
+
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         sys.exit("Missing required env var: DISCORD_TOKEN")
@@ -47,10 +93,60 @@ def load_config() -> Config:
     os.makedirs(bulk_dir, exist_ok=True)
     bulk_meta = os.path.join(bulk_dir, "bulk_default_meta.json")
     bulk_file = os.path.join(bulk_dir, "bulk_default_cards.json")
+    bulk_index = os.path.join(bulk_dir, "bulk_default_index.bin")
+    bulk_fingerprints = os.path.join(bulk_dir, "bulk_default_fingerprints.bin")
+    bulk_delta = os.path.join(bulk_dir, "bulk_default_delta.json")
+    bulk_names = os.path.join(bulk_dir, "bulk_default_names.json")
+    bulk_store = os.path.join(bulk_dir, "bulk_default_store.bin")
+    # Snapshot of the parsed recent window and dedupe set for fast restarts ("" = off)
+    warm_start = os.getenv("WARM_START_PATH", os.path.join(bulk_dir, "warm_start.json"))
+    use_delta = _env_flag("BULK_DELTA", "1")
+    scryfall_unique = os.getenv("SCRYFALL_UNIQUE", "prints").strip().lower()
+    if scryfall_unique not in BULK_TYPES:
+        sys.exit(f"Invalid SCRYFALL_UNIQUE: {scryfall_unique!r} (expected prints or cards)")
+    bulk_meta_ttl = _require_int("BULK_META_TTL_S", "3600")
+    # Scryfall's /bulk-data listing unless overridden (a mirror, or a local fake server)
+    bulk_index_url = os.getenv("BULK_INDEX_URL", "").strip()
+    keep_previous = _env_flag("KEEP_PREVIOUS_BULK", "1")
+    bulk_executor = os.getenv("BULK_EXECUTOR", "thread").strip().lower()
+    if bulk_executor not in ("thread", "process"):
+        sys.exit(f"Invalid BULK_EXECUTOR: {bulk_executor!r} (expected thread or process)")
+    bulk_workers = _require_int("BULK_WORKERS", "1")
+    card_cache_entries = _require_int("CARD_CACHE_MAX_ENTRIES", "8")
+    card_cache_cards = _require_int("CARD_CACHE_MAX_CARDS", "50000")
 
     window_days = _require_int("WINDOW_DAYS", "1")
     state_path = os.getenv("STATE_PATH", "state.json")
+    # Posted-card store; an existing STATE_PATH json is migrated into it on first open
+    state_db_path = os.getenv("STATE_DB_PATH") or os.path.splitext(state_path)[0] + ".sqlite3"
+    # Off by default; when on, keep it wider than any window a run looks back over
+    retention_days = _require_int("POSTED_RETENTION_DAYS", "0")
+    retention_max = _require_int("POSTED_RETENTION_MAX", "0")
     post_delay = _require_int("POST_DELAY_MS", "700")
+    # Card embeds per Discord message (Discord allows up to 10)
+    post_batch_size = min(10, max(1, _require_int("POST_BATCH_SIZE", "10")))
+    # Guild -> channel subscriptions; without the file only MTG_SPOILERS_CHANNEL_ID is posted to
+    subscriptions_path = os.getenv("SUBSCRIPTIONS_PATH", "subscriptions.json")
+    fanout_max_concurrency = max(1, _require_int("FANOUT_MAX_CONCURRENCY", "8"))
+    # Durable delivery queue (in the state database): retry pass interval and attempts per item
+    outbox_drain_seconds = max(5, _require_int("OUTBOX_DRAIN_SECONDS", "60"))
+    outbox_max_attempts = max(1, _require_int("OUTBOX_MAX_ATTEMPTS", "8"))
+    # Worker processes sharing the state database elect one to run the scheduled jobs
+    leader_lock_path = os.getenv("LEADER_LOCK_PATH") or os.path.splitext(state_db_path)[0] + ".leader.lock"
+    # Incremental spoilers from Scryfall's card search between bulk refreshes (0 = off)
+    spoiler_poll_minutes = _require_int("SPOILER_POLL_MINUTES", "15")
+    spoiler_poll_max_pages = max(1, _require_int("SPOILER_POLL_MAX_PAGES", "5"))
+
+    http_pool_limit = _require_int("HTTP_POOL_LIMIT", "20")
+    http_pool_per_host = _require_int("HTTP_POOL_PER_HOST", "4")
+    http_dns_ttl = _require_int("HTTP_DNS_TTL_S", "300")
+
+    # Local Prometheus endpoint (0 = disabled), optional Python heap tracing per stage,
+    # and the per-stage JSON log lines on stderr
+    metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port = _require_int("METRICS_PORT", "0")
+    metrics_tracemalloc = _env_flag("METRICS_TRACEMALLOC", "0")
+    metrics_log = _env_flag("METRICS_LOG", "1")
 
     return Config(
         discord_token=token,
@@ -62,9 +158,43 @@ def load_config() -> Config:
         bulk_dir=bulk_dir,
         bulk_meta_path=bulk_meta,
         bulk_file_path=bulk_file,
+        bulk_index_path=bulk_index,
+        bulk_fingerprints_path=bulk_fingerprints,
+        bulk_delta_path=bulk_delta,
+        bulk_names_path=bulk_names,
+        bulk_store_path=bulk_store,
+        warm_start_path=warm_start,
+        use_bulk_delta=use_delta,
+        scryfall_unique=scryfall_unique,
+        bulk_type=BULK_TYPES[scryfall_unique],
+        bulk_meta_ttl_s=bulk_meta_ttl,
+        bulk_index_url=bulk_index_url,
+        keep_previous_bulk=keep_previous,
+        bulk_executor=bulk_executor,
+        bulk_workers=bulk_workers,
+        card_cache_max_entries=card_cache_entries,
+        card_cache_max_cards=card_cache_cards,
         window_days=window_days,
         state_path=state_path,
+        state_db_path=state_db_path,
+        posted_retention_days=retention_days,
+        posted_retention_max=retention_max,
         post_delay_ms=post_delay,
+        post_batch_size=post_batch_size,
+        subscriptions_path=subscriptions_path,
+        fanout_max_concurrency=fanout_max_concurrency,
+        outbox_drain_seconds=outbox_drain_seconds,
+        outbox_max_attempts=outbox_max_attempts,
+        leader_lock_path=leader_lock_path,
+        spoiler_poll_minutes=spoiler_poll_minutes,
+        spoiler_poll_max_pages=spoiler_poll_max_pages,
+        http_pool_limit=http_pool_limit,
+        http_pool_per_host=http_pool_per_host,
+        http_dns_ttl_s=http_dns_ttl,
+        metrics_host=metrics_host,
+        metrics_port=metrics_port,
+        metrics_tracemalloc=metrics_tracemalloc,
+        metrics_log=metrics_log,
     )
 
 def safe_tz(tz_key: str) -> timezone:
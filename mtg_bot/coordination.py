@@ -0,0 +1,95 @@
+import asyncio, os, socket, time
+
+try:  # Unix only; elsewhere a single process is assumed and locks always succeed
+    import fcntl
+except ImportError:  # pragma: no cover - platform dependent
+    fcntl = None
+
+from .metrics import METRICS
+
+# Identifies this process in lock files and outbox claims
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FileLock:
+    """
+    Exclusive advisory lock (flock) on `path`, shared by every process on the host
+    that uses the same file. The kernel drops it when the holder exits or crashes,
+    so there is no stale lock to clean up. Each instance has its own file handle:
+    two instances conflict even within one process.
+    """
+
+    def __init__(self, path: str, poll_s: float = 0.2):
+        self.path = path
+        self.poll_s = poll_s
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free; never blocks."""
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+        # Who holds it, for whoever is looking at the file
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{WORKER_ID} {time.time():.0f}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    async def acquire(self, timeout_s: float | None = None) -> bool:
+        """Wait (without blocking the event loop) until the lock is ours or `timeout_s` passes."""
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_s)
+        return True
+
+    async def __aenter__(self) -> "FileLock":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
+
+
+class LeaderLock(FileLock):
+    """
+    Leader election for scheduled jobs across worker processes on one host. The
+    first process to take the lock runs the daily post, spoiler feed and news
+    scrape; the others stay on hot standby and try again on every tick, taking
+    over as soon as the leader exits. Leadership, once won, is kept for the life
+    of the process.
+    """
+
+    @classmethod
+    def from_config(cls, cfg) -> "LeaderLock":
+        return cls(cfg.leader_lock_path)
+
+    def is_leader(self, job: str = "") -> bool:
+        was_leader = self.held
+        leader = self.try_acquire()
+        METRICS.set("leader", 1 if leader else 0)
+        if leader and not was_leader:
+            print(f"[leader] {WORKER_ID} now runs scheduled jobs ({self.path})")
+        elif not leader and job:
+            METRICS.inc("leader_skipped", job=job)
+        return leader
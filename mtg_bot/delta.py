@@ -0,0 +1,128 @@
+import os, json, struct, hashlib
+from typing import Iterable, Iterator
+
+from .bulk_index import card_id_bytes
+from .fileio import atomic_write, write_json_atomic
+
+# Fields that churn on every bulk update without the card itself changing.
+VOLATILE_FIELDS = frozenset({"prices", "edhrec_rank", "penny_rank", "purchase_uris"})
+
+# Fingerprint file: header + records sorted by card id (16 raw uuid bytes, 8-byte digest).
+FINGERPRINT_MAGIC = b"MTGFPR01"
+_HEADER = struct.Struct("<8sII")  # magic, record count, updated_at length
+_RECORD = struct.Struct("<16s8s")
+
+
+def card_fingerprint(card: dict) -> bytes:
+    stable = {k: v for k, v in card.items() if k not in VOLATILE_FIELDS}
+    blob = json.dumps(stable, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=8).digest()
+
+
+def load_fingerprints(path: str) -> tuple[str | None, dict[bytes, bytes]]:
+    """Return (updated_at, {card id bytes: digest}); (None, {}) if missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            magic, count, stamp_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != FINGERPRINT_MAGIC:
+                return None, {}
+            updated_at = f.read(stamp_len).decode("utf-8")
+            data = f.read(count * _RECORD.size)
+    except (OSError, struct.error):
+        return None, {}
+    return updated_at, dict(_RECORD.iter_unpack(data))
+
+
+def save_fingerprints(path: str, updated_at: str, prints: dict[bytes, bytes]) -> None:
+    stamp = updated_at.encode("utf-8")
+    with atomic_write(path, "wb", prefix=".tmp_fpr_") as wf:
+        wf.write(_HEADER.pack(FINGERPRINT_MAGIC, len(prints), len(stamp)))
+        wf.write(stamp)
+        wf.write(b"".join(_RECORD.pack(cid, digest) for cid, digest in sorted(prints.items())))
+
+
+class DeltaTracker:
+    """
+    Fingerprints every card while a bulk pass streams by and collects the cards
+    that were added or changed since the previously fingerprinted snapshot.
+    """
+
+    def __init__(self, fingerprints_path: str, delta_path: str, updated_at: str):
+        self.fingerprints_path = fingerprints_path
+        self.delta_path = delta_path
+        self.updated_at = updated_at
+        self.prev_updated_at, self.prev = load_fingerprints(fingerprints_path)
+        self.prints: dict[bytes, bytes] = {}
+        # Without an older snapshot everything is "new"; don't hold the whole catalog
+        self.collect = bool(self.prev) and self.prev_updated_at != updated_at
+        self.added: list[dict] = []
+        self.changed: list[dict] = []
+
+    def observe(self, records: Iterable[tuple[int, int, dict]]) -> Iterator[tuple[int, int, dict]]:
+        for record in records:
+            card = record[2]
+            cid = card_id_bytes(card)
+            digest = card_fingerprint(card)
+            self.prints[cid] = digest
+            if self.collect:
+                old = self.prev.get(cid)
+                if old is None:
+                    self.added.append(card)
+                elif old != digest:
+                    self.changed.append(card)
+            yield record
+
+    def finish(self) -> None:
+        # Only a real snapshot change produces a delta; re-fingerprinting the same
+        # snapshot (e.g. after an index rebuild) must not clobber the stored one.
+        if self.collect:
+            start, added, changed = self.prev_updated_at, self.added, self.changed
+            # Snapshots pulled between daily runs (e.g. by /check-now) pile up into one
+            # delta until a daily run consumes it, so none of their cards are skipped
+            pending = load_delta(self.delta_path, self.prev_updated_at)
+            if pending is not None and not pending.get("consumed"):
+                start = pending.get("from")
+                added, changed = _accumulate(pending, added, changed)
+            write_json_atomic(self.delta_path, {
+                "from": start,
+                "to": self.updated_at,
+                "added": added,
+                "changed": changed,
+            }, ensure_ascii=False)
+        if self.prev_updated_at != self.updated_at or not self.prev:
+            save_fingerprints(self.fingerprints_path, self.updated_at, self.prints)
+
+
+def _accumulate(pending: dict, added: list[dict], changed: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Fold a newer delta into an unconsumed one: latest version of each card wins, added stays added."""
+    added_ids = {c.get("id") for c in pending.get("added", []) + added}
+    merged = {c.get("id"): c for c in pending.get("added", []) + pending.get("changed", []) + added + changed}
+    return (
+        [c for cid, c in merged.items() if cid in added_ids],
+        [c for cid, c in merged.items() if cid not in added_ids],
+    )
+
+
+def load_delta(delta_path: str, updated_at: str) -> dict | None:
+    """Return the stored delta if it leads to `updated_at`, else None."""
+    if not os.path.exists(delta_path):
+        return None
+    try:
+        with open(delta_path, "r", encoding="utf-8") as f:
+            delta = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(delta, dict) or delta.get("to") != updated_at:
+        return None
+    return delta
+
+
+def mark_delta_consumed(delta_path: str, updated_at: str) -> None:
+    """
+    Record that a daily run has posted from the delta leading to `updated_at`; the
+    next snapshot then starts a fresh delta instead of adding to this one.
+    """
+    delta = load_delta(delta_path, updated_at)
+    if delta is not None and not delta.get("consumed"):
+        delta["consumed"] = True
+        write_json_atomic(delta_path, delta, ensure_ascii=False)
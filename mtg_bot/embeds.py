@@ -1,25 +1,41 @@
+from collections import OrderedDict
+
 import discord
+from .article_meta import ArticleMeta
+from .metrics import METRICS
 from .scryfall import card_image
 
 DEFAULT_COLOR = 0x2B6CB0
+FIELD_LIMIT = 1024
 
-def card_embed(card: dict) -> discord.Embed:
-    """Build a Discord embed for a card. No UB-specific styling."""
-    color = DEFAULT_COLOR
-    embed = discord.Embed(
-        title=card.get("name", "Unknown"),
-        url=card.get("scryfall_uri"),
-        description=card.get("type_line", ""),
-        color=color
-    )
+def _clip(text: str) -> str:
+    return text if len(text) < FIELD_LIMIT else text[:1000] + "…"
+
+def render_card_payload(card: dict) -> dict:
+    """
+    Build the serialized embed payload (discord.Embed.to_dict() shape) for a card.
+    Double-faced cards without top-level rules text get one field per face.
+    """
+    payload = {
+        "type": "rich",
+        "title": card.get("name", "Unknown"),
+        "description": card.get("type_line", ""),
+        "color": DEFAULT_COLOR,
+    }
+    if card.get("scryfall_uri"):
+        payload["url"] = card["scryfall_uri"]
+    fields = []
 
     rules = card.get("oracle_text")
+    faces = card.get("card_faces") or []
     if rules:
-        embed.add_field(
-            name="Text",
-            value=(rules if len(rules) < 1024 else rules[:1000] + "…"),
-            inline=False
-        )
+        fields.append({"name": "Text", "value": _clip(rules), "inline": False})
+    elif faces:
+        for face in faces:
+            lines = [face.get("type_line"), face.get("oracle_text")]
+            value = "\n".join(line for line in lines if line)
+            if value:
+                fields.append({"name": face.get("name") or "Face", "value": _clip(value), "inline": False})
 
     ra = card.get("released_at")
     pv = (card.get("preview") or {}).get("previewed_at")
@@ -29,16 +45,91 @@ def card_embed(card: dict) -> discord.Embed:
     if pv:
         dates.append(f"Preview: {pv}")
     if dates:
-        embed.add_field(name="Dates", value="\n".join(dates), inline=True)
+        fields.append({"name": "Dates", "value": "\n".join(dates), "inline": True})
+    if fields:
+        payload["fields"] = fields
 
     img = card_image(card)
     if img:
-        embed.set_image(url=img)
+        payload["image"] = {"url": img}
+    # Back face art as the thumbnail when each face has its own image
+    if len(faces) > 1 and "image_uris" in faces[1] and not card.get("image_uris"):
+        back = faces[1]["image_uris"]
+        back_img = back.get("normal") or back.get("large") or back.get("png")
+        if back_img:
+            payload["thumbnail"] = {"url": back_img}
 
     set_name = card.get("set_name")
     collector = card.get("collector_number")
     if set_name or collector:
         footer_text = f"{set_name or ''} #{collector or ''}".strip()
-        embed.set_footer(text=footer_text)
+        payload["footer"] = {"text": footer_text}
 
+    return payload
+
+def article_embed(meta: ArticleMeta) -> discord.Embed:
+    """Compact news embed: linked title, author, a short summary and the og:image as thumbnail."""
+    summary = meta.summary or ""
+    embed = discord.Embed(
+        title=(meta.title or meta.url)[:256],
+        url=meta.url,
+        description=(summary if len(summary) <= 300 else summary[:297] + "…") or None,
+        color=DEFAULT_COLOR,
+    )
+    if meta.author:
+        embed.set_author(name=meta.author[:256])
+    if meta.image:
+        embed.set_thumbnail(url=meta.image)
     return embed
+
+class EmbedPayloadCache:
+    """LRU of rendered payloads keyed by (card id, bulk version)."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = max(1, maxsize)
+        self._data: "OrderedDict[tuple[str, str], dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def payload(self, card: dict, version: str | None = None) -> dict:
+        cid = card.get("id")
+        if cid is None or version is None:
+            # No stable identity to key on: render without caching
+            return render_card_payload(card)
+        key = (cid, version)
+        cached = self._data.get(key)
+        if cached is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            METRICS.inc("embed_payloads", result="hit")
+            return cached
+        self.misses += 1
+        METRICS.inc("embed_payloads", result="rendered")
+        cached = render_card_payload(card)
+        self._data[key] = cached
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        return cached
+
+    def prerender(self, cards: list[dict], version: str | None = None) -> list[dict]:
+        """Render a whole batch ahead of the posting loop."""
+        return [self.payload(card, version) for card in cards]
+
+    def stats_line(self) -> str:
+        return (f"hits={self.hits} misses={self.misses} evictions={self.evictions} "
+                f"entries={len(self._data)}")
+
+PAYLOAD_CACHE = EmbedPayloadCache()
+
+def card_embed(card: dict, version: str | None = None) -> discord.Embed:
+    """Build a Discord embed for a card. No UB-specific styling."""
+    return embed_from_payload(PAYLOAD_CACHE.payload(card, version))
+
+def embed_from_payload(payload: dict) -> discord.Embed:
+    # Embed.from_dict keeps references to nested dicts; copy them so edits never reach the cache
+    data = {k: (dict(v) if isinstance(v, dict) else v) for k, v in payload.items()}
+    if "fields" in payload:
+        data["fields"] = [dict(f) for f in payload["fields"]]
+    return discord.Embed.from_dict(data)
@@ -0,0 +1,151 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date
+
+from .metrics import METRICS
+from .embeds import embed_from_payload
+from .outbox import Outbox, OutboxItem
+from .posting import MAX_EMBEDS_PER_MESSAGE, post_pending_batched, render_payloads
+from .state import PostedStore, card_date
+from .subscriptions import SubscriptionRegistry
+
+@dataclass
+class FanoutResult:
+    posted: dict[int, int] = field(default_factory=dict)  # channel id -> cards posted
+    errors: dict[int, str] = field(default_factory=dict)  # channel id -> reason
+
+    @property
+    def total(self) -> int:
+        return sum(self.posted.values())
+
+    def summary(self) -> str:
+        parts = [f"{len(self.posted)} channel(s), {self.total} card(s)"]
+        if self.errors:
+            parts.append("failed: " + ", ".join(f"{cid} ({why})" for cid, why in self.errors.items()))
+        return "; ".join(parts)
+
+async def drain_outbox(
+    bot,
+    outbox: Outbox,
+    delay_s: float = 0.0,
+    batch_size: int = MAX_EMBEDS_PER_MESSAGE,
+    max_concurrency: int = 8,
+    channel_ids=None,
+    due_only: bool = True,
+) -> FanoutResult:
+    """
+    Deliver what is queued in `outbox` (optionally only for `channel_ids`).
+    Up to `max_concurrency` channels run at once, each sending its own batches in
+    order (one send in flight per channel, which is also how Discord rate-limits).
+    Channels are claimed one at a time as a delivery slot frees up, so worker
+    processes sharing the queue split the channels between them instead of the
+    first one leasing everything. Each delivered batch is recorded as posted for
+    its destination and then acked; a failing or missing channel keeps its items
+    queued for a later retry and only affects itself.
+    """
+    result = FanoutResult()
+    store = outbox.store
+    handled: set[int] = set()
+    send_limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def deliver(channel_id: int, items: list[OutboxItem]):
+        dest = store.for_destination(channel_id)
+        # Recorded as posted but not acked (a crash in between): ack without resending
+        done = {i.id for i in items if dest.has_been_posted({"id": i.card_id})}
+        if done:
+            outbox.ack(list(done))
+            items = [i for i in items if i.id not in done]
+        channel = bot.get_channel(channel_id)
+        if channel is None:
+            result.errors[channel_id] = "channel not found"
+            outbox.release(items, "channel not found")
+            return
+        by_card = {i.card_id: i for i in items}
+        # Stub cards: the queued key (card or oracle id, see PostedStore.key) as the id,
+        # plus the date retention keys on
+        pending = [({"id": i.card_id, "released_at": i.card_date}, embed_from_payload(i.payload)) for i in items]
+        acker = _AckingStore(dest, outbox, by_card)
+        try:
+            result.posted[channel_id] = await post_pending_batched(
+                channel, pending, acker, delay_s, batch_size, send_limit
+            )
+        except Exception as e:
+            result.errors[channel_id] = str(e) or type(e).__name__
+            outbox.release([i for i in items if i.card_id not in acker.acked], result.errors[channel_id])
+            print(f"[fanout] channel {channel_id} failed: {e}")
+
+    async def slot():
+        while True:
+            claimed = outbox.claim(channel_ids, due_only=due_only, max_channels=1, exclude=handled)
+            if not claimed:
+                return
+            for cid, items in claimed.items():
+                handled.add(cid)
+                await deliver(cid, items)
+
+    async with METRICS.stage("fanout") as st:
+        await asyncio.gather(*(slot() for _ in range(max(1, max_concurrency))))
+        st.note(channels=len(handled), cards=result.total, errors=len(result.errors))
+    METRICS.inc("fanout_errors", len(result.errors))
+    outbox.publish_metrics()
+    return result
+
+class _AckingStore:
+    """
+    persist_many for post_pending_batched: record the batch as posted, ack its rows
+    and renew the lease on the rest of the channel's claim.
+    """
+
+    def __init__(self, dest, outbox: Outbox, by_card: dict[str, OutboxItem]):
+        self.dest = dest
+        self.outbox = outbox
+        self.by_card = by_card
+        self.acked: set[str] = set()
+
+    def persist_many(self, cards: list[dict]) -> None:
+        self.dest.persist_many(cards)
+        self.outbox.ack([self.by_card[c["id"]].id for c in cards])
+        self.acked.update(c["id"] for c in cards)
+        self.outbox.renew([i for cid, i in self.by_card.items() if cid not in self.acked])
+
+async def fan_out_cards(
+    bot,
+    registry: SubscriptionRegistry,
+    cards: list[dict],
+    store: PostedStore,
+    today: date,
+    default_window_days: int,
+    version: str | None = None,
+    delay_s: float = 0.0,
+    batch_size: int = MAX_EMBEDS_PER_MESSAGE,
+    max_concurrency: int = 8,
+    outbox: Outbox | None = None,
+) -> FanoutResult:
+    """
+    Queue `cards` for every subscribed channel, then deliver them.
+    Each card is rendered once and the payload shared by all destinations; the
+    queue is durable, so whatever this run does not deliver is picked up by the
+    next drain (see drain_outbox) without rescanning. Dedupe is per destination,
+    on the store's key (the oracle id in cards mode).
+    """
+    outbox = outbox or Outbox(store)
+    key = store.key
+    plans = []
+    for sub in registry:
+        since = sub.since_date(today, default_window_days)
+        dest = store.for_destination(sub.channel_id)
+        wanted = [c for c in cards if sub.matches(c, since) and not dest.has_been_posted(c) and key(c)]
+        plans.append((sub, wanted))
+
+    needed = {key(c): c for _, wanted in plans for c in wanted}
+    payloads = dict(zip(needed, render_payloads(list(needed.values()), version)))
+    for sub, wanted in plans:
+        outbox.enqueue(sub.channel_id, [(key(c), payloads[key(c)], card_date(c)) for c in wanted])
+
+    # A run retries its own destinations right away, regardless of backoff
+    channel_ids = {sub.channel_id for sub, _ in plans}
+    result = await drain_outbox(bot, outbox, delay_s, batch_size, max_concurrency, channel_ids, due_only=False)
+    for cid in channel_ids:
+        if cid not in result.errors:
+            result.posted.setdefault(cid, 0)
+    return result
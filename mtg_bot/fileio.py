@@ -0,0 +1,45 @@
+import os, json, tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", prefix: str = ".tmp_"):
+    """
+    Open a temp file next to `path` for writing; on a clean exit it is flushed,
+    fsynced and renamed over `path`, so readers see the old or the new file and
+    never a partial one. On error the temp file is removed and `path` is untouched.
+    """
+    dirpath = os.path.dirname(os.path.abspath(path)) or "."
+    binary = "b" in mode
+    fd, tmpname = tempfile.mkstemp(dir=dirpath, prefix=prefix, text=not binary)
+    try:
+        with os.fdopen(fd, mode, encoding=None if binary else "utf-8") as wf:
+            yield wf
+            wf.flush()
+            os.fsync(wf.fileno())
+        os.replace(tmpname, path)
+    finally:
+        try:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+        except Exception:
+            pass
+
+
+def write_json_atomic(path: str, payload, prefix: str = ".tmp_json_", **dump_kwargs) -> None:
+    """json.dump `payload` to `path` through atomic_write; `dump_kwargs` go to json.dump."""
+    with atomic_write(path, prefix=prefix) as wf:
+        json.dump(payload, wf, **dump_kwargs)
+
+
+def read_json(path: str) -> dict:
+    """The JSON object stored at `path`; {} when it is missing, unreadable or not an object."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
@@ -0,0 +1,84 @@
+import aiohttp
+
+class HttpClient:
+    """
+    One long-lived aiohttp session for the whole bot: pooled keep-alive connections
+    (bounded overall and per host) and a DNS cache. Callers pass their own timeouts
+    and User-Agent per request. The session is created lazily on first use so it
+    binds to the bot's running event loop.
+    """
+
+    def __init__(
+        self,
+        limit: int = 20,
+        limit_per_host: int = 4,
+        dns_ttl_s: int = 300,
+        keepalive_s: float = 60.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl_s = dns_ttl_s
+        self.keepalive_s = keepalive_s
+        self._session: aiohttp.ClientSession | None = None
+        self._connector: aiohttp.TCPConnector | None = None
+        self.requests = 0
+        self.sessions_created = 0
+        # Counted through aiohttp's public tracing hooks, like `requests`
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    @classmethod
+    def from_config(cls, cfg) -> "HttpClient":
+        return cls(cfg.http_pool_limit, cfg.http_pool_per_host, cfg.http_dns_ttl_s)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl_s,
+                keepalive_timeout=self.keepalive_s,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                trace_configs=[self._trace_config()],
+            )
+            self.sessions_created += 1
+        return self._session
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.connections_reused += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "sessions_created": self.sessions_created,
+            "pool_limit": self._connector.limit if self._connector else self.limit,
+            "pool_limit_per_host": self._connector.limit_per_host if self._connector else self.limit_per_host,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+        }
+
+    def stats_line(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.stats().items())
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
@@ -0,0 +1,159 @@
+import re
+from html.parser import HTMLParser
+from typing import Container
+from urllib.parse import urlparse, parse_qs
+
+# Optional, faster C parser; imported on the first parse (False once found to be missing)
+_lxml_etree = None
+
+def _lxml():
+    global _lxml_etree
+    if _lxml_etree is None:
+        try:
+            from lxml import etree
+            _lxml_etree = etree
+        except ImportError:  # pragma: no cover - depends on the environment
+            _lxml_etree = False
+    return _lxml_etree or None
+
+NEWS_PREFIX = "/en/news/"
+ENGINES = ("auto", "stream", "strainer", "lxml", "soup")
+
+def _is_author_archive_link(link: str) -> bool:
+    """
+    Return True for links that point to the archive page filtered by author,
+    e.g., /en/news/archive?author=Mark+Rosewater
+    """
+    try:
+        parsed = urlparse(link)
+        path = (parsed.path or "").rstrip("/")
+        if path == "/en/news/archive":
+            qs = parse_qs(parsed.query or "")
+            return "author" in qs
+        return False
+    except Exception:
+        # If parsing fails, err on the side of posting (do not block).
+        return False
+
+def _is_article_link(link: str) -> bool:
+    """
+    Return True for article-shaped links, /en/news/<category>/<slug>. Nav and
+    category links (/en/news/archive, /en/news/magic-story) are interleaved with
+    the articles, so only articles tell us where the already-seen part begins.
+    """
+    parts = urlparse(link).path.strip("/").split("/")
+    return len(parts) == 4 and parts[:2] == ["en", "news"] and all(parts[2:])
+
+class _Collector:
+    """
+    Shared accept/stop logic: keep news links, drop author archives, skip seen
+    links and stop at the first seen article.
+    """
+
+    def __init__(self, seen: Container[str] | None):
+        self.seen = seen
+        self.links: list[str] = []
+        self.stopped = False
+
+    def offer(self, href: str | None) -> bool:
+        """Record `href` if it qualifies; returns False once parsing should stop."""
+        if not href or not href.startswith(NEWS_PREFIX) or _is_author_archive_link(href):
+            return True
+        if self.seen is not None and href in self.seen:
+            if not _is_article_link(href):
+                return True
+            # Articles are listed newest first: everything from here on is older
+            self.stopped = True
+            return False
+        self.links.append(href)
+        return True
+
+class _StopParsing(Exception):
+    pass
+
+class _AnchorParser(HTMLParser):
+    def __init__(self, collector: _Collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and not self.collector.offer(dict(attrs).get("href")):
+            raise _StopParsing
+
+    handle_startendtag = handle_starttag
+
+def _extract_stream(html: str, collector: _Collector, chunk_size: int = 1 << 15) -> None:
+    parser = _AnchorParser(collector)
+    try:
+        for i in range(0, len(html), chunk_size):
+            parser.feed(html[i:i + chunk_size])
+        parser.close()
+    except _StopParsing:
+        pass
+
+def _extract_strainer(html: str, collector: _Collector) -> None:
+    from bs4 import BeautifulSoup, SoupStrainer  # only the soup engines need bs4
+    only_news = SoupStrainer("a", href=re.compile("^" + re.escape(NEWS_PREFIX)))
+    for a in BeautifulSoup(html, "html.parser", parse_only=only_news).find_all("a"):
+        if not collector.offer(a.get("href")):
+            break
+
+def _extract_soup(html: str, collector: _Collector) -> None:
+    from bs4 import BeautifulSoup
+    # Reference engine: the original full-tree parse
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.select(f'a[href^="{NEWS_PREFIX}"]'):
+        if not collector.offer(a.get("href")):
+            break
+
+class _LxmlTarget:
+    def __init__(self, collector: _Collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        if tag == "a" and not self.collector.offer(attrib.get("href")):
+            raise _StopParsing
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return None
+
+def _extract_lxml(html: str, collector: _Collector, chunk_size: int = 1 << 15) -> None:
+    parser = _lxml().HTMLParser(target=_LxmlTarget(collector))
+    try:
+        for i in range(0, len(html), chunk_size):
+            parser.feed(html[i:i + chunk_size])
+        parser.close()
+    except _StopParsing:
+        pass
+
+def resolve_engine(engine: str) -> str:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown link engine {engine!r}; expected one of {ENGINES}")
+    if engine == "auto":
+        return "lxml" if _lxml() is not None else "stream"
+    if engine == "lxml" and _lxml() is None:
+        return "stream"
+    return engine
+
+_ENGINE_FUNCS = {
+    "stream": _extract_stream,
+    "strainer": _extract_strainer,
+    "soup": _extract_soup,
+    "lxml": _extract_lxml,
+}
+
+def extract_archive_links(html: str, engine: str = "auto", seen: Container[str] | None = None) -> list[str]:
+    """
+    Return /en/news/... hrefs from the archive page in document order, without
+    author-filtered archive links. With `seen`, skip already-seen links and stop at
+    the first already-seen article.
+    """
+    collector = _Collector(seen)
+    _ENGINE_FUNCS[resolve_engine(engine)](html, collector)
+    return collector.links
@@ -0,0 +1,199 @@
+import json, logging, time, tracemalloc
+
+try:  # Unix only; RSS is simply not reported elsewhere
+    import resource
+except ImportError:  # pragma: no cover - platform dependent
+    resource = None
+
+log = logging.getLogger("mtg_bot.metrics")
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+def _fmt_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in items)
+    return "{" + inner + "}"
+
+def max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+class _Stage:
+    """Times one pipeline stage; usable with `with` and `async with`."""
+
+    def __init__(self, registry: "Metrics", name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.fields: dict = {}
+
+    def note(self, **fields) -> None:
+        """Attach extra numbers (bytes, cards, ...) to this stage's log line."""
+        self.fields.update(fields)
+
+    def __enter__(self) -> "_Stage":
+        self.start = time.perf_counter()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()  # approximate when stages overlap
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        self.registry._finish_stage(self, seconds, peak, exc_type is None)
+
+    async def __aenter__(self) -> "_Stage":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+
+class Metrics:
+    """
+    Process-wide counters and stage timings.
+    Rendered as Prometheus text for the local /metrics endpoint; every finished
+    stage is also logged as one JSON line on the `mtg_bot.metrics` logger.
+    """
+
+    def __init__(self, prefix: str = "mtgbot"):
+        self.prefix = prefix
+        self.counters: dict[tuple, float] = {}
+        self.gauges: dict[tuple, float] = {}
+        self.stages: dict[tuple, dict] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges[_key(name, labels)] = value
+
+    def stage(self, name: str, **labels) -> _Stage:
+        return _Stage(self, name, labels)
+
+    def _finish_stage(self, stage: _Stage, seconds: float, peak: int | None, ok: bool) -> None:
+        key = _key(stage.name, stage.labels)
+        agg = self.stages.setdefault(key, {"count": 0, "errors": 0, "seconds_sum": 0.0, "seconds_max": 0.0,
+                                           "last_seconds": 0.0, "last_peak_bytes": None})
+        agg["count"] += 1
+        agg["errors"] += 0 if ok else 1
+        agg["seconds_sum"] += seconds
+        agg["seconds_max"] = max(agg["seconds_max"], seconds)
+        agg["last_seconds"] = seconds
+        if peak is not None:
+            agg["last_peak_bytes"] = peak
+        rss = max_rss_bytes()
+        if rss is not None:
+            self.set("process_max_rss_bytes", rss)
+        if not log.isEnabledFor(logging.INFO):
+            return
+        record = {"event": "stage", "stage": stage.name, **stage.labels, "seconds": round(seconds, 6), "ok": ok}
+        record.update(stage.fields)
+        if peak is not None:
+            record["peak_bytes"] = peak
+        if rss is not None:
+            record["max_rss_bytes"] = rss
+        log.info(json.dumps(record, default=str))
+
+    def snapshot(self) -> dict:
+        def flat(d):
+            return [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(d.items())]
+        return {
+            "counters": flat(self.counters),
+            "gauges": flat(self.gauges),
+            "stages": [{"name": n, "labels": dict(l), **agg} for (n, l), agg in sorted(self.stages.items())],
+        }
+
+    def render_prometheus(self) -> str:
+        p = self.prefix
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{p}_{name}_total{_fmt_labels(labels)} {value}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            lines.append(f"{p}_{name}{_fmt_labels(labels)} {value}")
+        for (name, labels), agg in sorted(self.stages.items()):
+            stage = (("stage", name),)
+            lines.append(f"{p}_stage_seconds_count{_fmt_labels(stage, labels)} {agg['count']}")
+            lines.append(f"{p}_stage_seconds_sum{_fmt_labels(stage, labels)} {agg['seconds_sum']:.6f}")
+            lines.append(f"{p}_stage_seconds_max{_fmt_labels(stage, labels)} {agg['seconds_max']:.6f}")
+            lines.append(f"{p}_stage_errors_total{_fmt_labels(stage, labels)} {agg['errors']}")
+            if agg["last_peak_bytes"] is not None:
+                lines.append(f"{p}_stage_peak_bytes{_fmt_labels(stage, labels)} {agg['last_peak_bytes']}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
+
+class RateLimitLogCounter(logging.Handler):
+    """
+    Counts discord.py's own 429 back-offs, which it only reports through the
+    `discord.http` logger ("We are being rate limited ... Retrying in N seconds").
+    """
+
+    def __init__(self, metrics: Metrics = METRICS):
+        super().__init__(level=logging.WARNING)
+        self.metrics = metrics
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if "rate limited" not in str(record.msg):
+            return
+        retry = record.args[-1] if isinstance(record.args, tuple) and record.args else None
+        self.metrics.inc("discord_rate_limited")
+        if isinstance(retry, (int, float)):
+            self.metrics.inc("rate_limit_wait_seconds", retry, kind="discord_429")
+
+def install_rate_limit_counter(metrics: Metrics = METRICS) -> None:
+    logging.getLogger("discord.http").addHandler(RateLimitLogCounter(metrics))
+
+def install_stage_log(level: int = logging.INFO) -> None:
+    """
+    Write the per-stage JSON lines to stderr. discord.py only configures its own
+    logger, so without this `mtg_bot.metrics` has no handler and stays silent.
+    """
+    if not any(getattr(h, "_mtg_stage_log", False) for h in log.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler._mtg_stage_log = True
+        log.addHandler(handler)
+    log.setLevel(level)
+    log.propagate = False  # one line per stage even if the root logger gets a handler too
+
+class MetricsServer:
+    """
+    Local HTTP endpoint: /metrics (Prometheus text) and /metrics.json.
+    aiohttp's server side is only imported once the endpoint is started.
+    """
+
+    def __init__(self, metrics: Metrics = METRICS, host: str = "127.0.0.1", port: int = 9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _text(self, request):
+        from aiohttp import web
+        return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain")
+
+    async def _json(self, request):
+        from aiohttp import web
+        return web.json_response(self.metrics.snapshot())
+
+    async def start(self) -> None:
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get("/metrics", self._text)
+        app.router.add_get("/metrics.json", self._json)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,228 @@
+import os, json, re, shutil, tempfile, unicodedata
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Iterable, Iterator
+
+from .bulk_index import date_ordinal
+from .card_store import CardStore, CardView, card_store_is_fresh
+from .fileio import atomic_write
+
+# Name index sidecar (JSON, one column per field, rows in bulk-file order):
+#   names, sets, numbers, released (date ordinals), spans ([offset, length] into the bulk file)
+# plus the bulk size/mtime it was built from. It is streamed out during the index pass
+# and loaded into memory once per bulk version; lookups never touch the network
+# and only read the matched card's bytes from the bulk file.
+NAME_INDEX_VERSION = 1
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+# Ligatures NFKD leaves alone ("Æther Vial" is searched as "aether vial")
+_LIGATURES = str.maketrans({"æ": "ae", "Æ": "ae", "œ": "oe", "Œ": "oe", "ß": "ss"})
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    folded = unicodedata.normalize("NFKD", name.translate(_LIGATURES)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(_NON_WORD.sub(" ", folded).split())
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndexBuilder:
+    """
+    Streams the name/set/number/released/span columns to scratch files while a bulk
+    pass goes by; finish() writes the header and splices the columns in after it.
+    """
+
+    COLUMNS = ("names", "sets", "numbers", "released", "spans")
+
+    def __init__(self, names_path: str, updated_at: str):
+        self.names_path = names_path
+        self.updated_at = updated_at
+        dirpath = os.path.dirname(os.path.abspath(names_path)) or "."
+        self.columns = {
+            col: tempfile.TemporaryFile("w+", encoding="utf-8", dir=dirpath, prefix=".tmp_names_col_")
+            for col in self.COLUMNS
+        }
+        self.count = 0
+
+    def observe(self, records: Iterable[tuple[int, int, dict]]) -> Iterator[tuple[int, int, dict]]:
+        cols = self.columns
+        for record in records:
+            offset, length, card = record
+            sep = "," if self.count else ""
+            cols["names"].write(sep + json.dumps(card.get("name") or "", ensure_ascii=False))
+            cols["sets"].write(sep + json.dumps((card.get("set") or "").lower(), ensure_ascii=False))
+            cols["numbers"].write(sep + json.dumps((card.get("collector_number") or "").lower(), ensure_ascii=False))
+            cols["released"].write(f"{sep}{date_ordinal(card.get('released_at'))}")
+            cols["spans"].write(f"{sep}[{offset},{length}]")
+            self.count += 1
+            yield record
+
+    def finish(self, bulk_path: str) -> None:
+        st = os.stat(bulk_path)
+        header = {"version": NAME_INDEX_VERSION, "updated_at": self.updated_at,
+                  "bulk_size": st.st_size, "bulk_mtime_ns": st.st_mtime_ns}
+        try:
+            with atomic_write(self.names_path, prefix=".tmp_names_") as wf:
+                # Header fields first: names_are_fresh only reads the head of the file
+                wf.write(json.dumps(header, ensure_ascii=False, separators=(",", ":"))[:-1])
+                for col, scratch in self.columns.items():
+                    wf.write(f',"{col}":[')
+                    scratch.seek(0)
+                    shutil.copyfileobj(scratch, wf)
+                    wf.write("]")
+                wf.write("}")
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        for scratch in self.columns.values():
+            scratch.close()
+
+
+def _read_names(names_path: str) -> dict | None:
+    try:
+        with open(names_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get("version") == NAME_INDEX_VERSION else None
+
+
+def names_are_fresh(names_path: str, bulk_path: str, updated_at: str | None = None) -> bool:
+    """True when the name sidecar was built from the bulk file currently on disk."""
+    try:
+        with open(names_path, "r", encoding="utf-8") as f:
+            head = f.read(512)  # header fields are written first
+        st = os.stat(bulk_path)
+    except OSError:
+        return False
+    stamp = re.search(r'"updated_at":("(?:[^"\\]|\\.)*"),"bulk_size":(\d+),"bulk_mtime_ns":(\d+)', head)
+    if not stamp or (int(stamp.group(2)), int(stamp.group(3))) != (st.st_size, st.st_mtime_ns):
+        return False
+    return updated_at is None or json.loads(stamp.group(1)) == updated_at
+
+
+class CardNameIndex:
+    """
+    Exact / prefix / fuzzy (trigram) name search and set + collector number lookup
+    over one bulk snapshot. Double-faced cards are also found by each face name.
+    """
+
+    def __init__(self, data: dict, bulk_path: str, store: CardStore | None = None):
+        self.bulk_path = bulk_path
+        # Same rows as the bulk file; when present, matches come back as lazy views
+        self.store = store
+        self.updated_at = data.get("updated_at")
+        self.names: list[str] = data["names"]
+        self.sets: list[str] = data["sets"]
+        self.released: list[int] = data["released"]
+        self.spans: list[list[int]] = data["spans"]
+        by_key: dict[str, list[int]] = {}
+        self.by_number: dict[tuple[str, str], int] = {}
+        for row, (name, set_code, number) in enumerate(zip(self.names, data["sets"], data["numbers"])):
+            keys = {normalize_name(name)}
+            if " // " in name:
+                keys.update(normalize_name(face) for face in name.split(" // "))
+            for key in keys:
+                if key:
+                    by_key.setdefault(key, []).append(row)
+            if set_code and number:
+                self.by_number.setdefault((set_code, number), row)
+        self.keys = sorted(by_key)  # key id -> key, sorted for prefix search
+        # Newest printing first for each name
+        self.rows = [sorted(by_key[k], key=lambda r: self.released[r], reverse=True) for k in self.keys]
+        self._key_id = {k: i for i, k in enumerate(self.keys)}
+        self.trigrams: dict[str, list[int]] = {}
+        self._tri_count: list[int] = []
+        for kid, key in enumerate(self.keys):
+            tris = _trigrams(key)
+            self._tri_count.append(len(tris))
+            for tri in tris:
+                self.trigrams.setdefault(tri, []).append(kid)
+
+    @classmethod
+    def load(cls, names_path: str, bulk_path: str, store_path: str | None = None) -> "CardNameIndex | None":
+        data = _read_names(names_path)
+        if data is None:
+            return None
+        store = None
+        if store_path and card_store_is_fresh(store_path, bulk_path, data.get("updated_at")):
+            store = CardStore(store_path)
+        return cls(data, bulk_path, store)
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # ----- name search -----
+    def exact(self, query: str) -> list[int]:
+        kid = self._key_id.get(normalize_name(query))
+        return [kid] if kid is not None else []
+
+    def prefix(self, query: str, limit: int = 25) -> list[int]:
+        key = normalize_name(query)
+        out = []
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and len(out) < limit and self.keys[i].startswith(key):
+            out.append(i)
+            i += 1
+        return out
+
+    def fuzzy(self, query: str, limit: int = 10, min_score: float = 0.3) -> list[int]:
+        q = _trigrams(normalize_name(query))
+        shared = Counter(chain.from_iterable(self.trigrams.get(tri, ()) for tri in q))
+        scored = []
+        for kid, hits in shared.items():
+            score = hits / (len(q) + self._tri_count[kid] - hits)
+            if score >= min_score:
+                scored.append((-score, self.keys[kid], kid))
+        scored.sort()
+        return [kid for _, _, kid in scored[:limit]]
+
+    def search(self, query: str, limit: int = 10) -> list[int]:
+        """
+        Name key ids, best first: exact match, then prefix matches, then fuzzy ones.
+        The trigram scan only runs when the cheap lookups come up short.
+        """
+        found = self.exact(query)
+        for kid in self.prefix(query, limit):
+            if kid not in found:
+                found.append(kid)
+        if len(found) < limit:
+            for kid in self.fuzzy(query, limit):
+                if kid not in found:
+                    found.append(kid)
+        return found[:limit]
+
+    def display_name(self, kid: int) -> str:
+        return self.names[self.rows[kid][0]]
+
+    def newest_row(self, kid: int, set_code: str | None = None) -> int | None:
+        """Newest printing of a name, optionally restricted to one set."""
+        if set_code is None:
+            return self.rows[kid][0]
+        for row in self.rows[kid]:
+            if self.sets[row] == set_code.lower():
+                return row
+        return None
+
+    # ----- set / collector number -----
+    def by_set_number(self, set_code: str, collector_number: str) -> int | None:
+        return self.by_number.get((set_code.lower(), collector_number.lower()))
+
+    def card(self, row: int) -> "dict | CardView":
+        """One card: a view into the card store when there is one, else read from the bulk file."""
+        if self.store is not None:
+            return self.store[row]
+        offset, length = self.spans[row]
+        with open(self.bulk_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
@@ -0,0 +1,184 @@
+import json, time
+from dataclasses import dataclass
+
+from .coordination import WORKER_ID
+from .metrics import METRICS
+from .state import PostedStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel_id      INTEGER NOT NULL,
+    card_id         TEXT NOT NULL,
+    payload         TEXT NOT NULL,
+    card_date       TEXT,
+    enqueued_at     REAL NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_until   REAL NOT NULL DEFAULT 0,
+    claimed_by      TEXT,
+    last_error      TEXT,
+    UNIQUE (channel_id, card_id)
+);
+CREATE INDEX IF NOT EXISTS outbox_by_channel ON outbox (channel_id, id);
+"""
+
+@dataclass(frozen=True)
+class OutboxItem:
+    id: int
+    channel_id: int
+    card_id: str
+    payload: dict  # rendered embed, discord.Embed.to_dict() shape
+    attempts: int
+    card_date: str | None = None  # recorded with the delivery, for retention
+
+class Outbox:
+    """
+    Durable queue of rendered card embeds waiting for delivery, kept in the
+    posted-card SQLite database. Producers enqueue (channel, card, payload) rows;
+    a delivery pass claims a channel's due rows under a lease, sends them in
+    order and acks each delivered batch, or releases the rest with a backoff.
+    A claim left behind by a crashed process simply expires, so delivery resumes
+    from the queue after a restart without rescanning any card data.
+
+    Channels are the unit of work: several worker processes sharing the database
+    each claim different channels (`owner` tells their leases apart), and a
+    channel's lease is renewed with every delivered batch.
+    """
+
+    def __init__(self, store: PostedStore, lease_s: float = 600.0, max_attempts: int = 8,
+                 backoff_s: float = 60.0, max_backoff_s: float = 3600.0, owner: str = WORKER_ID):
+        self.store = store
+        self.conn = store.conn
+        self.lease_s = lease_s
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.owner = owner
+        self.conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "claimed_by" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN claimed_by TEXT")  # queues from before multi-worker
+        if "card_date" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN card_date TEXT")  # queues from before retention dates
+
+    @classmethod
+    def from_config(cls, store: PostedStore, cfg) -> "Outbox":
+        return cls(store, max_attempts=cfg.outbox_max_attempts)
+
+    def _write(self, sql: str, rows) -> int:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = self.conn.executemany(sql, rows).rowcount
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    # ----- producers -----
+    def enqueue(self, channel_id: int, items: list[tuple]) -> int:
+        """
+        Queue (card id, payload[, card date]) tuples for one channel; already queued
+        cards are skipped.
+        """
+        now = time.time()
+        added = self._write(
+            "INSERT OR IGNORE INTO outbox (channel_id, card_id, payload, card_date, enqueued_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(channel_id, cid, json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+              day[0] if day else None, now)
+             for cid, payload, *day in items],
+        )
+        METRICS.inc("outbox_enqueued", added)
+        self.publish_metrics()
+        return added
+
+    # ----- delivery -----
+    def claim(self, channel_ids=None, due_only: bool = True, limit: int = 500,
+              max_channels: int | None = None, exclude=()) -> dict[int, list[OutboxItem]]:
+        """
+        Lease the queued rows of channels nobody else is delivering to, oldest work
+        first: all of them, or at most `max_channels` (a worker's next partition),
+        skipping `exclude`. `due_only=False` ignores retry backoff (an explicit run
+        retries now).
+        """
+        now = time.time()
+        claimed: dict[int, list[OutboxItem]] = {}
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            busy = {row[0] for row in self.conn.execute(
+                "SELECT DISTINCT channel_id FROM outbox WHERE claimed_until > ?", (now,))}
+            sql = "SELECT channel_id FROM outbox"
+            params: tuple = ()
+            if due_only:
+                sql += " WHERE next_attempt_at <= ?"
+                params = (now,)
+            sql += " GROUP BY channel_id ORDER BY MIN(id)"
+            channels = [row[0] for row in self.conn.execute(sql, params)]
+            for cid in channels:
+                if max_channels is not None and len(claimed) >= max_channels:
+                    break
+                if cid in busy or cid in exclude or (channel_ids is not None and cid not in channel_ids):
+                    continue
+                rows = self.conn.execute(
+                    "SELECT id, card_id, payload, attempts, card_date FROM outbox "
+                    "WHERE channel_id = ? ORDER BY id LIMIT ?",
+                    (cid, limit),
+                ).fetchall()
+                self.conn.executemany("UPDATE outbox SET claimed_until = ?, claimed_by = ? WHERE id = ?",
+                                      [(now + self.lease_s, self.owner, r[0]) for r in rows])
+                claimed[cid] = [OutboxItem(r[0], cid, r[1], json.loads(r[2]), r[3], r[4]) for r in rows]
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def renew(self, items: list[OutboxItem]) -> None:
+        """Extend the lease on rows this worker still holds (delivery is making progress)."""
+        until = time.time() + self.lease_s
+        self._write("UPDATE outbox SET claimed_until = ? WHERE id = ? AND claimed_by = ?",
+                    [(until, i.id, self.owner) for i in items])
+
+    def ack(self, item_ids: list[int]) -> None:
+        """Delivered: drop the rows (the caller has already recorded the cards as posted)."""
+        self._write("DELETE FROM outbox WHERE id = ?", [(i,) for i in item_ids])
+        METRICS.inc("outbox_acked", len(item_ids))
+
+    def release(self, items: list[OutboxItem], error: str) -> None:
+        """
+        Not delivered: back off exponentially per row and retry later; rows that
+        have used up `max_attempts` are dropped (and still counted).
+        """
+        now = time.time()
+        retry, dropped = [], []
+        for item in items:
+            attempts = item.attempts + 1
+            if attempts >= self.max_attempts:
+                dropped.append((item.id,))
+            else:
+                delay = min(self.max_backoff_s, self.backoff_s * 2 ** (attempts - 1))
+                retry.append((attempts, now + delay, error[:500], item.id))
+        self._write("UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0, claimed_by = NULL, "
+                    "last_error = ? WHERE id = ?", retry)
+        if dropped:
+            self._write("DELETE FROM outbox WHERE id = ?", dropped)
+            print(f"[outbox] dropped {len(dropped)} item(s) for channel {items[0].channel_id} "
+                  f"after {self.max_attempts} attempts: {error}")
+        METRICS.inc("outbox_retries", len(retry))
+        METRICS.inc("outbox_dropped", len(dropped))
+
+    # ----- observability -----
+    def stats(self) -> dict:
+        depth, oldest = self.conn.execute("SELECT COUNT(*), MIN(enqueued_at) FROM outbox").fetchone()
+        return {"depth": depth, "oldest_age_s": round(time.time() - oldest, 1) if oldest else 0.0}
+
+    def publish_metrics(self) -> dict:
+        stats = self.stats()
+        METRICS.set("outbox_depth", stats["depth"])
+        METRICS.set("outbox_oldest_age_seconds", stats["oldest_age_s"])
+        return stats
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
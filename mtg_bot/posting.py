@@ -0,0 +1,79 @@
+import asyncio
+import discord
+
+from .embeds import PAYLOAD_CACHE, embed_from_payload
+from .metrics import METRICS
+
+# Discord limits for a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def pack_embed_batches(
+    items: list[tuple[dict, discord.Embed]], batch_size: int = MAX_EMBEDS_PER_MESSAGE
+) -> list[list[tuple[dict, discord.Embed]]]:
+    """
+    Split (card, embed) pairs into consecutive message-sized batches, keeping order.
+    A batch holds at most `batch_size` embeds and at most 6000 embed characters.
+    """
+    batch_size = max(1, min(batch_size, MAX_EMBEDS_PER_MESSAGE))
+    batches: list[list[tuple[dict, discord.Embed]]] = []
+    current: list[tuple[dict, discord.Embed]] = []
+    chars = 0
+    for card, embed in items:
+        size = len(embed)
+        if current and (len(current) >= batch_size or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(current)
+            current, chars = [], 0
+        current.append((card, embed))
+        chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def render_payloads(cards: list[dict], version: str | None = None) -> list[dict]:
+    """Render (or take from the cache for this bulk `version`) an embed payload per card."""
+    with METRICS.stage("embed_render") as st:
+        payloads = PAYLOAD_CACHE.prerender(cards, version)
+        st.note(cards=len(payloads))
+    return payloads
+
+
+def render_pending(cards: list[dict], version: str | None = None) -> list[tuple[dict, discord.Embed]]:
+    """Render (or take from the cache for this bulk `version`) an embed per card."""
+    return [(card, embed_from_payload(p)) for card, p in zip(cards, render_payloads(cards, version))]
+
+
+async def post_pending_batched(
+    channel,
+    pending: list[tuple[dict, discord.Embed]],
+    store,
+    delay_s: float = 0.0,
+    batch_size: int = MAX_EMBEDS_PER_MESSAGE,
+    send_limit: asyncio.Semaphore | None = None,
+) -> int:
+    """
+    Send already-rendered (card, embed) pairs in message batches, persisting each
+    delivered batch to `store` (a PostedStore or one of its destination views).
+    `send_limit` caps how many sends run at once across every caller sharing it.
+    """
+    posted = 0
+    async with METRICS.stage("post_loop") as st:
+        for i, batch in enumerate(pack_embed_batches(pending, batch_size)):
+            if i and delay_s > 0:
+                METRICS.inc("rate_limit_wait_seconds", delay_s, kind="post_delay")
+                await asyncio.sleep(delay_s)
+            async with METRICS.stage("discord_send"):
+                if send_limit is None:
+                    await channel.send(embeds=[embed for _, embed in batch])
+                else:
+                    async with send_limit:
+                        await channel.send(embeds=[embed for _, embed in batch])
+            METRICS.inc("discord_sends", kind="card_batch")
+            METRICS.inc("cards_posted", len(batch))
+            store.persist_many([card for card, _ in batch])
+            posted += len(batch)
+        st.note(cards=posted)
+    return posted
+
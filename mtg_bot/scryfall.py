@@ -1,5 +1,15 @@
-import os, json, aiohttp
+import os, json, time, codecs, aiohttp
 from datetime import date
+from typing import Iterator
+
+from .bulk_index import build_index, index_is_fresh, query_recent
+from .coordination import FileLock
+from .delta import DeltaTracker, load_delta
+from .fileio import read_json, write_json_atomic
+from .metrics import METRICS
+from .name_index import NameIndexBuilder, names_are_fresh
+from .state import oracle_id
+from .card_store import CardStoreBuilder, card_store_is_fresh
 
 USER_AGENT = "RileysScryfallDiscordBot/1.0 (bulk default cards)"
 
@@ -7,48 +17,209 @@ USER_AGENT = "RileysScryfallDiscordBot/1.0 (bulk default cards)"
 class BulkScryfall:
     BULK_INDEX = "https://api.scryfall.com/bulk-data"
 
-    def __init__(self, session: aiohttp.ClientSession, bulk_meta_path: str, bulk_file_path: str):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        bulk_meta_path: str,
+        bulk_file_path: str,
+        bulk_index_path: str | None = None,
+        fingerprints_path: str | None = None,
+        delta_path: str | None = None,
+        names_path: str | None = None,
+        store_path: str | None = None,
+        bulk_type: str = "default_cards",
+        meta_ttl_s: float = 0.0,
+        keep_previous: bool = True,
+        index_url: str | None = None,
+        workers=None,
+        timeout: aiohttp.ClientTimeout | None = None,
+        lock_path: str | None = None,
+    ):
         self.session = session
         self.bulk_meta_path = bulk_meta_path
         self.bulk_file_path = bulk_file_path
+        self.bulk_index_path = bulk_index_path
+        # Per-card fingerprints of the last snapshot and the added/changed cards since the one before
+        self.fingerprints_path = fingerprints_path
+        self.delta_path = delta_path
+        # Card name / set+number lookup sidecar, built in the same pass as the date index
+        self.names_path = names_path
+        # Compact mmap-able card store (see card_store.py), also built in that pass
+        self.store_path = store_path
+        # Which /bulk-data entry to mirror; recorded in the meta so a switch re-downloads
+        self.bulk_type = bulk_type
+        # How long a fetched /bulk-data entry is trusted before asking again (conditionally)
+        self.meta_ttl_s = meta_ttl_s
+        # Keep the current snapshot in place until the new download is complete;
+        # when False it is removed up front to save disk space on small hosts.
+        self.keep_previous = keep_previous
+        self.index_url = index_url or self.BULK_INDEX
+        # Optional BulkWorkers; when set, index builds run off the event loop
+        self.workers = workers
+        # Per-request timeout, since the session is shared with other clients
+        self.timeout = timeout or aiohttp.ClientTimeout(total=120)
+        # File lock serialising refreshes across worker processes sharing the bulk files
+        self.lock_path = lock_path
+
+    @classmethod
+    def from_config(cls, session: aiohttp.ClientSession, cfg, workers=None) -> "BulkScryfall":
+        return cls(
+            session,
+            cfg.bulk_meta_path,
+            cfg.bulk_file_path,
+            cfg.bulk_index_path,
+            fingerprints_path=cfg.bulk_fingerprints_path,
+            delta_path=cfg.bulk_delta_path,
+            names_path=cfg.bulk_names_path,
+            store_path=cfg.bulk_store_path,
+            bulk_type=cfg.bulk_type,
+            meta_ttl_s=cfg.bulk_meta_ttl_s,
+            index_url=cfg.bulk_index_url or None,
+            keep_previous=cfg.keep_previous_bulk,
+            workers=workers,
+            lock_path=os.path.join(cfg.bulk_dir, ".bulk.lock"),
+        )
 
     async def _get_bulk_default_meta(self) -> dict:
+        stored = read_json(self.bulk_meta_path)
+        cache = stored.get("index_cache") or {}
+        entry = cache.get("entry")
+        if entry and entry.get("type") != self.bulk_type:
+            cache, entry = {}, None  # cached for the other SCRYFALL_UNIQUE mode
+        if entry and time.time() - cache.get("fetched_at", 0) < self.meta_ttl_s:
+            METRICS.inc("bulk_meta_requests", result="cached")
+            return entry
+
         headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-        async with self.session.get(self.BULK_INDEX, headers=headers) as resp:
+        if entry:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+        async with self.session.get(self.index_url, headers=headers, timeout=self.timeout) as resp:
+            if resp.status == 304 and entry:
+                METRICS.inc("bulk_meta_requests", result="not_modified")
+                cache["fetched_at"] = time.time()
+                stored["index_cache"] = cache
+                write_json_atomic(self.bulk_meta_path, stored, indent=2)
+                return entry
             resp.raise_for_status()
             data = await resp.json()
-        for entry in data.get("data", []):
-            if entry.get("type") == "default_cards":
-                return entry
-        raise RuntimeError("Default Cards bulk entry not found")
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+        METRICS.inc("bulk_meta_requests", result="fetched")
+        for candidate in data.get("data", []):
+            if candidate.get("type") == self.bulk_type:
+                stored["index_cache"] = {
+                    "entry": candidate,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fetched_at": time.time(),
+                }
+                write_json_atomic(self.bulk_meta_path, stored, indent=2)
+                return candidate
+        raise RuntimeError(f"Bulk entry {self.bulk_type!r} not found")
 
     async def ensure_bulk_file(self) -> tuple[str, str]:
+        if self.lock_path is None:
+            return await self._ensure_bulk_file()
+        # Whoever waited finds the snapshot and index already current and skips the work
+        async with FileLock(self.lock_path):
+            return await self._ensure_bulk_file()
+
+    async def _ensure_bulk_file(self) -> tuple[str, str]:
         meta = await self._get_bulk_default_meta()
         download_uri = meta["download_uri"]
         updated_at = meta["updated_at"]
 
-        prior_meta = {}
-        if os.path.exists(self.bulk_meta_path):
-            with open(self.bulk_meta_path, "r", encoding="utf-8") as f:
-                prior_meta = json.load(f)
+        prior_meta = read_json(self.bulk_meta_path)
 
+        type_changed = prior_meta.get("bulk_type", "default_cards") != self.bulk_type
         need_download = (
             not os.path.exists(self.bulk_file_path)
             or prior_meta.get("updated_at") != updated_at
+            or type_changed
         )
+        if type_changed:
+            # Fingerprints/delta of the other dataset would make every card look added/changed
+            for stale in (self.fingerprints_path, self.delta_path):
+                if stale and os.path.exists(stale):
+                    os.remove(stale)
         if need_download:
-            await self._download_bulk(download_uri, self.bulk_file_path)
-            with open(self.bulk_meta_path, "w", encoding="utf-8") as f:
-                json.dump({"download_uri": download_uri, "updated_at": updated_at}, f, indent=2)
+            async with METRICS.stage("bulk_download") as st:
+                await self._download_bulk(download_uri, self.bulk_file_path, meta.get("size"))
+                st.note(bytes=os.path.getsize(self.bulk_file_path))
+            prior_meta.update({"download_uri": download_uri, "updated_at": updated_at, "bulk_type": self.bulk_type})
+            write_json_atomic(self.bulk_meta_path, prior_meta, indent=2)
+        if self.bulk_index_path and (
+            need_download
+            or not index_is_fresh(self.bulk_index_path, self.bulk_file_path, updated_at)
+            or (self.names_path and not names_are_fresh(self.names_path, self.bulk_file_path, updated_at))
+            or (self.store_path and not card_store_is_fresh(self.store_path, self.bulk_file_path, updated_at))
+        ):
+            # One full pass per bulk update; later queries only touch matching cards
+            args = (self.bulk_file_path, self.bulk_index_path, updated_at,
+                    self.fingerprints_path, self.delta_path, self.names_path, self.store_path)
+            async with METRICS.stage("bulk_index_build") as st:
+                if self.workers is not None:
+                    count = await self.workers.rebuild_index(*args)
+                else:
+                    count = rebuild_index(*args)
+                st.note(cards=count)
+        if self.workers is not None and self.names_path:
+            # Load the lookup index now, off the loop, so /card never waits on it
+            self.workers.preload_names(updated_at, self.names_path, self.bulk_file_path, self.store_path)
         return download_uri, updated_at
 
-    async def _download_bulk(self, url: str, dest: str):
+    async def _download_bulk(self, url: str, dest: str, expected_size: int | None = None):
+        """
+        Download into `dest`.part and swap it in atomically once verified.
+        An interrupted transfer of the same URL is resumed with a Range request.
+        """
+        part = dest + ".part"
+        part_info_path = part + ".json"
+        part_info = read_json(part_info_path)
+        if part_info.get("url") != url and os.path.exists(part):
+            os.remove(part)  # leftover from an older snapshot
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+
+        if not self.keep_previous and os.path.exists(dest):
+            os.remove(dest)
+
         headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-        async with self.session.get(url, headers=headers) as resp:
-            resp.raise_for_status()
-            with open(dest, "wb") as f:
-                async for chunk in resp.content.iter_chunked(1 << 16):
-                    f.write(chunk)
+        if have:
+            # Byte ranges refer to the identity encoding, which is what .part holds
+            headers["Accept-Encoding"] = "identity"
+            headers["Range"] = f"bytes={have}-"
+            if part_info.get("etag"):
+                headers["If-Range"] = part_info["etag"]
+        else:
+            headers["Accept-Encoding"] = "gzip"
+
+        async with self.session.get(url, headers=headers, timeout=self.timeout) as resp:
+            if resp.status == 416 and have:
+                pass  # nothing left to fetch; size check below decides
+            else:
+                resp.raise_for_status()
+                if resp.status != 206 or not resp.headers.get("Content-Range", "").startswith(f"bytes {have}-"):
+                    have = 0  # server sent the full body
+                write_json_atomic(part_info_path, {"url": url, "etag": resp.headers.get("ETag")}, indent=2)
+                with open(part, "ab" if have else "wb") as f:
+                    async for chunk in resp.content.iter_chunked(1 << 16):
+                        f.write(chunk)
+                        METRICS.inc("bulk_download_bytes", len(chunk))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        size = os.path.getsize(part)
+        if expected_size is not None and size != expected_size:
+            os.remove(part)
+            raise RuntimeError(f"Bulk download size mismatch: got {size} bytes, expected {expected_size}")
+        os.replace(part, dest)
+        try:
+            os.remove(part_info_path)
+        except FileNotFoundError:
+            pass
 
 
 def card_image(card: dict) -> str | None:
@@ -68,33 +239,214 @@ def card_image(card: dict) -> str | None:
     return None
 
 
+def _on_or_after(raw: str | None, since_iso: str) -> bool:
+    if not raw:
+        return False
+    if len(raw) == 10 and raw[4] == "-" and raw[7] == "-":
+        return raw >= since_iso  # ISO dates order like strings; no parse needed
+    try:
+        return date.fromisoformat(raw).isoformat() >= since_iso
+    except Exception:
+        return False
+
+
 def is_recent(card: dict, since_date: date) -> bool:
-    ra_str = card.get("released_at")
-    pv_str = (card.get("preview") or {}).get("previewed_at")
-    recent_release = False
-    recent_preview = False
-    if ra_str:
-        try:
-            recent_release = date.fromisoformat(ra_str) >= since_date
-        except Exception:
-            pass
-    if pv_str:
-        try:
-            recent_preview = date.fromisoformat(pv_str) >= since_date
-        except Exception:
-            pass
-    return recent_release or recent_preview
+    since_iso = since_date.isoformat()
+    return (_on_or_after(card.get("released_at"), since_iso)
+            or _on_or_after((card.get("preview") or {}).get("previewed_at"), since_iso))
+
+
+_JSON_WS = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+def iter_bulk_records(
+    bulk_json_path: str, chunk_size: int = 1 << 20, offsets: bool = True
+) -> Iterator[tuple[int, int, dict]]:
+    """
+    Stream the top-level array of a bulk file one card at a time.
+    Yields (byte_offset, byte_length, card); offsets are -1 when `offsets` is False.
+    Only the current read chunk and the card being decoded are held in memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(bulk_json_path, "rb") as f:
+        buf, pos, eof = "", 0, False
+        byte_pos = 0  # byte offset in the file matching `pos`; JSON whitespace is ASCII
+
+        def more() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            raw = f.read(chunk_size)
+            eof = not raw
+            buf = buf[pos:] + decoder.decode(raw, final=eof)
+            pos = 0
+            return True
+
+        def next_token() -> str:
+            nonlocal pos, byte_pos
+            while True:
+                start = pos
+                while pos < len(buf) and buf[pos] in _JSON_WS:
+                    pos += 1
+                byte_pos += pos - start
+                if pos < len(buf):
+                    return buf[pos]
+                if not more():
+                    return ""
+
+        if next_token() != "[":
+            raise ValueError(f"{bulk_json_path}: expected a top-level JSON array")
+        pos += 1
+        byte_pos += 1
+        if next_token() == "]":
+            return
+        while True:
+            try:
+                card, end = _DECODER.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Card spans the chunk boundary: read more and retry
+                if not more():
+                    raise
+                continue
+            if offsets:
+                length = len(buf[pos:end].encode("utf-8"))
+                yield byte_pos, length, card
+                byte_pos += length
+            else:
+                yield -1, -1, card
+            pos = end
+            tok = next_token()
+            if tok == ",":
+                pos += 1
+                byte_pos += 1
+                next_token()
+            elif tok == "]":
+                return
+            else:
+                raise ValueError(f"{bulk_json_path}: malformed bulk array near char {pos}")
+
+
+def iter_bulk_cards(bulk_json_path: str, chunk_size: int = 1 << 20) -> Iterator[dict]:
+    """Stream the cards of a bulk file without tracking byte offsets."""
+    for _, _, card in iter_bulk_records(bulk_json_path, chunk_size, offsets=False):
+        yield card
+
+
+def rebuild_index(
+    bulk_path: str,
+    index_path: str,
+    updated_at: str,
+    fingerprints_path: str | None = None,
+    delta_path: str | None = None,
+    names_path: str | None = None,
+    store_path: str | None = None,
+) -> int:
+    """
+    Build the sidecar date index for `bulk_path` in a single streaming pass.
+    With fingerprint/delta paths the same pass also records which cards were
+    added or changed since the previous snapshot; with `names_path` it also
+    writes the card name lookup index, and with `store_path` the binary card store.
+    """
+    records = iter_bulk_records(bulk_path)
+    tracker = names = store = None
+    if fingerprints_path and delta_path:
+        tracker = DeltaTracker(fingerprints_path, delta_path, updated_at)
+        records = tracker.observe(records)
+    if names_path:
+        names = NameIndexBuilder(names_path, updated_at)
+        records = names.observe(records)
+    if store_path:
+        store = CardStoreBuilder(store_path, updated_at)
+        records = store.observe(records)
+    try:
+        count = build_index(records, index_path, bulk_path, updated_at)
+    except BaseException:
+        if names is not None:
+            names.abort()
+        if store is not None:
+            store.abort()
+        raise
+    if tracker is not None:
+        tracker.finish()
+    if names is not None:
+        names.finish(bulk_path)
+    if store is not None:
+        store.finish(bulk_path)
+    return count
+
+
+def card_sort_key(card: dict) -> str:
+    pv = (card.get("preview") or {}).get("previewed_at")
+    ra = card.get("released_at")
+    return (pv or ra or "0000-01-01")
+
+
+def scan_recent_cards(
+    bulk_json_path: str, since_date: date, streaming: bool = True, index_path: str | None = None
+) -> tuple[list[dict], int]:
+    """
+    filter_recent_cards plus the number of cards decoded to get there
+    (the catalog size for a scan, only the matches for an indexed read).
+    """
+    if index_path and index_is_fresh(index_path, bulk_json_path):
+        # Filtered and ordered on the index's date columns; only matches are decoded
+        recent = query_recent(index_path, bulk_json_path, since_date)
+        return recent, len(recent)
+    if streaming:
+        recent, scanned = [], 0
+        for card in iter_bulk_cards(bulk_json_path):
+            scanned += 1
+            if is_recent(card, since_date):
+                recent.append(card)
+    else:
+        with open(bulk_json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)  # array of cards
+        recent = [c for c in data if is_recent(c, since_date)]
+        scanned = len(data)
+
+    recent.sort(key=card_sort_key, reverse=True)
+    return recent, scanned
+
+
+def filter_recent_cards(
+    bulk_json_path: str, since_date: date, streaming: bool = True, index_path: str | None = None
+) -> list[dict]:
+    """
+    Return the cards released or previewed on/after `since_date`, newest first.
+    With a fresh sidecar index only the matching cards are read. Otherwise, with
+    `streaming` the bulk file is scanned card by card, so peak memory tracks the
+    number of recent cards rather than the size of the catalog.
+    """
+    return scan_recent_cards(bulk_json_path, since_date, streaming, index_path)[0]
 
 
-def filter_recent_cards(bulk_json_path: str, since_date: date) -> list[dict]:
-    with open(bulk_json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)  # array of cards
-    recent = [c for c in data if is_recent(c, since_date)]
+def unique_by_oracle(cards: list[dict]) -> list[dict]:
+    """
+    Keep the first printing of each oracle id (cards are newest first), so a card
+    reprinted across several sets is posted once. Reversible cards carry the
+    oracle id on their faces; cards with none at all are kept as they are.
+    """
+    seen: set[str] = set()
+    out = []
+    for card in cards:
+        oid = oracle_id(card)
+        if oid:
+            if oid in seen:
+                continue
+            seen.add(oid)
+        out.append(card)
+    return out
 
-    def sort_key(c):
-        pv = (c.get("preview") or {}).get("previewed_at")
-        ra = c.get("released_at")
-        return (pv or ra or "0000-01-01")
 
-    recent.sort(key=sort_key, reverse=True)
-    return recent
+def recent_from_delta(delta_path: str, updated_at: str, since_date: date) -> list[dict] | None:
+    """
+    Added/changed cards since the last consumed delta that fall in the date window, newest
+    first. None when there is no delta leading to `updated_at` (first snapshot, or delta missing).
+    """
+    delta = load_delta(delta_path, updated_at)
+    if delta is None:
+        return None
+    cards = [c for c in delta.get("added", []) + delta.get("changed", []) if is_recent(c, since_date)]
+    cards.sort(key=card_sort_key, reverse=True)
+    return cards
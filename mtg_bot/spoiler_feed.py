@@ -0,0 +1,110 @@
+import asyncio, time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable
+
+import aiohttp
+
+from .metrics import METRICS
+from .scryfall import USER_AGENT
+
+
+class ScryfallSpoilerFeed:
+    """
+    Incremental spoiler feed from Scryfall's card search, for the hours between
+    bulk refreshes. Results are requested newest spoiled first; paging stops at
+    the first page that reaches a card seen on an earlier poll (or already
+    posted), so a quiet poll costs a single request. Requests are spaced by
+    `min_interval_s` and a 429 is retried after its Retry-After.
+    """
+    SEARCH_URL = "https://api.scryfall.com/cards/search"
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        unique: str = "prints",
+        max_pages: int = 5,
+        min_interval_s: float = 0.5,
+        max_retries: int = 3,
+        search_url: str | None = None,
+        max_seen: int = 5000,
+        timeout: aiohttp.ClientTimeout | None = None,
+    ):
+        self.session = session
+        self.unique = unique
+        self.max_pages = max(1, max_pages)
+        # Scryfall asks for no more than a few search requests per second
+        self.min_interval_s = min_interval_s
+        self.max_retries = max_retries
+        self.search_url = search_url or self.SEARCH_URL
+        self.timeout = timeout or aiohttp.ClientTimeout(total=30)
+        # Card ids returned by recent polls, oldest first
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.max_seen = max_seen
+        self._last_request = 0.0
+
+    @classmethod
+    def from_config(cls, session: aiohttp.ClientSession, cfg) -> "ScryfallSpoilerFeed":
+        return cls(session, unique=cfg.scryfall_unique, max_pages=cfg.spoiler_poll_max_pages)
+
+    async def _get_page(self, url: str, params: dict | None) -> dict:
+        headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+        for attempt in range(self.max_retries + 1):
+            wait = self.min_interval_s - (time.monotonic() - self._last_request)
+            if wait > 0:
+                METRICS.inc("rate_limit_wait_seconds", wait, kind="scryfall_pacing")
+                await asyncio.sleep(wait)
+            self._last_request = time.monotonic()
+            async with self.session.get(url, params=params, headers=headers, timeout=self.timeout) as resp:
+                if resp.status == 429 and attempt < self.max_retries:
+                    retry_after = float(resp.headers.get("Retry-After") or 2 ** attempt)
+                    METRICS.inc("spoiler_feed_requests", result="rate_limited")
+                    METRICS.inc("rate_limit_wait_seconds", retry_after, kind="scryfall_429")
+                    await asyncio.sleep(retry_after)
+                    continue
+                if resp.status == 404:
+                    METRICS.inc("spoiler_feed_requests", result="empty")
+                    return {"data": [], "has_more": False}  # Scryfall's answer to "no cards match"
+                resp.raise_for_status()
+                METRICS.inc("spoiler_feed_requests", result="ok")
+                return await resp.json()
+
+    def _remember(self, ids) -> None:
+        for cid in ids:
+            self._seen[cid] = None
+            self._seen.move_to_end(cid)
+        while len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+    async def poll(self, since_date: date, known: Callable[[dict], bool] | None = None) -> list[dict]:
+        """
+        Cards spoiled or released on/after `since_date` that earlier polls have not
+        returned, newest spoiled first. `known(card)` (e.g. the posted-card store)
+        also counts as seen, which bounds the first poll after a restart.
+        """
+        params = {"q": f"date>={since_date.isoformat()}", "order": "spoiled", "dir": "desc",
+                  "unique": self.unique}
+        url, fresh, pages = self.search_url, [], 0
+        returned: dict[str, None] = {}  # ordered; a card can shift onto the next page mid-poll
+        async with METRICS.stage("spoiler_poll") as st:
+            while url and pages < self.max_pages:
+                page = await self._get_page(url, params)
+                pages += 1
+                reached_seen = False
+                for card in page.get("data", []):
+                    cid = card.get("id")
+                    if not cid or cid in returned:
+                        continue
+                    returned[cid] = None
+                    if cid in self._seen or (known is not None and known(card)):
+                        reached_seen = True
+                    else:
+                        fresh.append(card)
+                if reached_seen or not page.get("has_more"):
+                    break
+                # next_page already carries the query
+                url, params = page.get("next_page"), None
+            st.note(pages=pages, cards=len(fresh))
+        self._remember(returned)
+        METRICS.inc("spoiler_feed_cards", len(fresh))
+        return fresh
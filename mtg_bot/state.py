@@ -1,6 +1,10 @@
-import json, os, tempfile
+import json, os, sqlite3, time
+from datetime import date, timedelta
 from typing import TypedDict
 
+from .fileio import write_json_atomic
+from .metrics import METRICS
+
 class StateDict(TypedDict, total=False):
     last_run_date: str | None
     posted_ids: list[str]
@@ -25,35 +29,292 @@ def load_state(path: str) -> StateDict:
         return _default_state()
 
 def save_state_atomic(path: str, payload: StateDict) -> None:
-    dirpath = os.path.dirname(os.path.abspath(path)) or "."
-    fd, tmpname = tempfile.mkstemp(dir=dirpath, prefix=".tmp_state_", text=True)
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as wf:
-            json.dump(payload, wf, ensure_ascii=False, indent=2)
-            wf.flush()
-            os.fsync(wf.fileno())
-        os.replace(tmpname, path)
-    finally:
+    write_json_atomic(path, payload, ensure_ascii=False, indent=2)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted (
+    card_id   TEXT PRIMARY KEY,
+    posted_at REAL NOT NULL,
+    card_date TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS posted_by_time ON posted (posted_at);
+CREATE TABLE IF NOT EXISTS delivered (
+    channel_id INTEGER NOT NULL,
+    card_id    TEXT NOT NULL,
+    posted_at  REAL NOT NULL,
+    card_date  TEXT,
+    PRIMARY KEY (channel_id, card_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS delivered_by_time ON delivered (posted_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def oracle_id(card: dict) -> str | None:
+    """A card's oracle id; reversible cards carry it on their faces."""
+    return card.get("oracle_id") or (card.get("card_faces") or [{}])[0].get("oracle_id")
+
+def card_date(card: dict) -> str | None:
+    """The date retention keys on: the later of release and preview (ISO), None without either."""
+    dates = [d[:10] for d in (card.get("released_at"), (card.get("preview") or {}).get("previewed_at"))
+             if isinstance(d, str) and d]
+    return max(dates) if dates else None
+
+# db path -> (fingerprint, posted ids) handed over by a warm-start snapshot; used once
+_PRIMED_IDS: dict[str, tuple[tuple, set[str]]] = {}
+
+def prime_posted_ids(db_path: str, ids, fingerprint) -> None:
+    """
+    Seed the next PostedStore opened on `db_path` with `ids`, skipping the full
+    table read, as long as the table still has the same `fingerprint()`.
+    """
+    _PRIMED_IDS[os.path.abspath(db_path)] = (tuple(fingerprint), set(ids))
+
+class PostedStore:
+    """
+    Posted-card store backed by SQLite in WAL mode.
+    Each posted batch (the cards of one message) is one durable commit (synchronous=FULL),
+    so a crash right after a send loses at most that message's cards, without the old
+    per-card reload/rewrite of the whole state.json. Membership checks hit an
+    in-memory set first and fall back to the primary-key index.
+
+    With `by_oracle` (SCRYFALL_UNIQUE=cards) cards are keyed on their oracle id, so
+    a different printing of an already posted card counts as posted.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        legacy_json_path: str | None = None,
+        retention_days: int = 0,
+        retention_max: int = 0,
+        primary_channel_id: int | None = None,
+        by_oracle: bool = False,
+    ):
+        self.db_path = db_path
+        self.by_oracle = by_oracle
+        # The original single spoilers channel keeps using the `posted` table
+        self.primary_channel_id = primary_channel_id
+        self.retention_days = retention_days
+        self.retention_max = retention_max
+        self.conn = sqlite3.connect(db_path, isolation_level=None)  # autocommit; explicit BEGIN for batches
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(_SCHEMA)
+        for table in ("posted", "delivered"):
+            if "card_date" not in {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN card_date TEXT")  # stores from before retention dates
+        if legacy_json_path:
+            self._migrate_json(legacy_json_path)
+        self._loaded_ids: set[str] | None = None  # read on first use, see _ids
+
+    @classmethod
+    def from_config(cls, cfg) -> "PostedStore":
+        return cls(
+            cfg.state_db_path,
+            legacy_json_path=cfg.state_path,
+            retention_days=cfg.posted_retention_days,
+            retention_max=cfg.posted_retention_max,
+            primary_channel_id=cfg.mtg_spoilers_channel_id,
+            by_oracle=cfg.scryfall_unique == "cards",
+        )
+
+    def __enter__(self) -> "PostedStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ----- meta -----
+    def _get_meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str | None) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def last_run_date(self) -> str | None:
+        return self._get_meta("last_run_date")
+
+    @last_run_date.setter
+    def last_run_date(self, value: str | None) -> None:
+        self._set_meta("last_run_date", value)
+
+    def _migrate_json(self, json_path: str) -> None:
+        """One-time import of an existing state.json; the JSON file is left untouched."""
+        if self._get_meta("migrated_from_json") or not os.path.exists(json_path):
+            return
+        legacy = load_state(json_path)
+        now = time.time()
+        self.conn.execute("BEGIN")
         try:
-            if os.path.exists(tmpname):
-                os.remove(tmpname)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO posted (card_id, posted_at) VALUES (?, ?)",
+                ((cid, now) for cid in legacy["posted_ids"] if isinstance(cid, str)),
+            )
+            if legacy.get("last_run_date") and not self.last_run_date:
+                self.last_run_date = legacy["last_run_date"]
+            self._set_meta("migrated_from_json", os.path.abspath(json_path))
+            self.conn.execute("COMMIT")
         except Exception:
-            pass
-
-def has_been_posted(state: StateDict, card: dict) -> bool:
-    cid = card.get("id")
-    return cid is not None and cid in (state.get("posted_ids") or [])
-
-def persist_posted(path: str, state: StateDict, card: dict) -> StateDict:
-    cid = card.get("id")
-    if not cid:
-        return state
-    # reload to avoid losing progress if other process edited it
-    current = load_state(path)
-    if cid not in current["posted_ids"]:
-        current["posted_ids"].append(cid)
-        save_state_atomic(path, current)
-    # keep caller's in-memory state in sync
-    if cid not in state["posted_ids"]:
-        state["posted_ids"].append(cid)
-    return state
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # ----- posted ids -----
+    @property
+    def _ids(self) -> set[str]:
+        """
+        The posted ids, loaded on first use: a store opened only for the outbox or
+        the meta table never reads the table or takes the warm-start primed ids.
+        """
+        if self._loaded_ids is None:
+            primed = _PRIMED_IDS.pop(os.path.abspath(self.db_path), None)
+            if primed is not None and primed[0] == self.fingerprint():
+                self._loaded_ids = primed[1]
+            else:
+                self._loaded_ids = {row[0] for row in self.conn.execute("SELECT card_id FROM posted")}
+        return self._loaded_ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def posted_ids(self) -> list[str]:
+        return list(self._ids)
+
+    def fingerprint(self) -> tuple[int, float | None]:
+        """(row count, newest posted_at): changes with every insert or prune."""
+        count, newest = self.conn.execute("SELECT COUNT(*), MAX(posted_at) FROM posted").fetchone()
+        return count, newest
+
+    def key(self, card: dict) -> str | None:
+        """The id a card is recorded under (its own id when it has no oracle id)."""
+        return (oracle_id(card) if self.by_oracle else None) or card.get("id")
+
+    def has_been_posted(self, card: dict) -> bool:
+        cid = self.key(card)
+        if cid is None:
+            return False
+        if cid in self._ids:
+            return True
+        # Another process may have posted it since we loaded the set
+        if self.conn.execute("SELECT 1 FROM posted WHERE card_id = ?", (cid,)).fetchone():
+            self._ids.add(cid)
+            return True
+        return False
+
+    def persist_posted(self, card: dict) -> None:
+        """Durably record one posted card."""
+        self.persist_many([card])
+
+    def persist_many(self, cards: list[dict]) -> None:
+        """Durably record several posted cards in a single commit."""
+        rows = [(self.key(c), card_date(c)) for c in cards if self.key(c)]
+        if not rows:
+            return
+        ids = [cid for cid, _ in rows]
+        now = time.time()
+        with METRICS.stage("state_persist"):
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO posted (card_id, posted_at, card_date) VALUES (?, ?, ?)",
+                    ((cid, now, day) for cid, day in rows),
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        METRICS.inc("posted_ids_persisted", len(ids))
+        if self._loaded_ids is not None:
+            self._loaded_ids.update(ids)
+
+    def prune(self) -> int:
+        """
+        Apply the time/count retention policy to the posted ids and to each fan-out
+        channel's delivered ids; returns the number of ids dropped. Only ids whose
+        card date (see card_date) is itself older than the retention window can go,
+        so a card previewed long before its release is not forgotten (and reposted)
+        while it is still recent; ids recorded without a date are kept.
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        stale = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        removed = 0
+        for table in ("posted", "delivered"):
+            removed += self.conn.execute(
+                f"DELETE FROM {table} WHERE posted_at < ? AND card_date < ?", (cutoff, stale)
+            ).rowcount
+        if self.retention_max > 0:
+            removed += self.conn.execute(
+                "DELETE FROM posted WHERE card_date < ? AND card_id NOT IN "
+                "(SELECT card_id FROM posted ORDER BY posted_at DESC LIMIT ?)",
+                (stale, self.retention_max),
+            ).rowcount
+            # Same cap per fan-out channel
+            removed += self.conn.execute(
+                "DELETE FROM delivered WHERE card_date < ? AND (channel_id, card_id) IN ("
+                "SELECT channel_id, card_id FROM (SELECT channel_id, card_id, ROW_NUMBER() OVER "
+                "(PARTITION BY channel_id ORDER BY posted_at DESC) AS newest FROM delivered) WHERE newest > ?)",
+                (stale, self.retention_max),
+            ).rowcount
+        if removed:
+            self._loaded_ids = None
+        return removed
+
+    # ----- per-destination ids (fan-out) -----
+    def for_destination(self, channel_id: int) -> "PostedStore | DestinationStore":
+        """Dedupe view for one channel; the primary channel maps onto the legacy table."""
+        if channel_id == self.primary_channel_id:
+            return self
+        return DestinationStore(self, channel_id)
+
+
+class DestinationStore:
+    """has_been_posted/persist_many for one fan-out channel, sharing the parent connection."""
+
+    def __init__(self, store: PostedStore, channel_id: int):
+        self.store = store
+        self.channel_id = channel_id
+        self._ids = {
+            row[0] for row in store.conn.execute(
+                "SELECT card_id FROM delivered WHERE channel_id = ?", (channel_id,)
+            )
+        }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def has_been_posted(self, card: dict) -> bool:
+        return self.store.key(card) in self._ids
+
+    def persist_many(self, cards: list[dict]) -> None:
+        rows = [(self.store.key(c), card_date(c)) for c in cards if self.store.key(c)]
+        if not rows:
+            return
+        ids = [cid for cid, _ in rows]
+        now = time.time()
+        conn = self.store.conn
+        with METRICS.stage("state_persist"):
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO delivered (channel_id, card_id, posted_at, card_date) VALUES (?, ?, ?, ?)",
+                    ((self.channel_id, cid, now, day) for cid, day in rows),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        METRICS.inc("posted_ids_persisted", len(ids))
+        self._ids.update(ids)
@@ -0,0 +1,77 @@
+import json, os
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from .scryfall import is_recent
+
+@dataclass(frozen=True)
+class Subscription:
+    """One spoilers destination: a channel in a guild plus its own window and filters."""
+    guild_id: int
+    channel_id: int
+    window_days: int | None = None  # None: use WINDOW_DAYS
+    sets: frozenset[str] = field(default_factory=frozenset)  # set codes; empty = all sets
+    rarities: frozenset[str] = field(default_factory=frozenset)  # empty = all rarities
+
+    def since_date(self, today: date, default_window_days: int) -> date:
+        days = self.window_days if self.window_days is not None else default_window_days
+        return today - timedelta(days=days)
+
+    def matches(self, card: dict, since_date: date) -> bool:
+        if self.sets and (card.get("set") or "").lower() not in self.sets:
+            return False
+        if self.rarities and (card.get("rarity") or "").lower() not in self.rarities:
+            return False
+        return is_recent(card, since_date)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Subscription":
+        window = data.get("window_days")
+        return cls(
+            guild_id=int(data.get("guild_id", 0)),
+            channel_id=int(data["channel_id"]),
+            window_days=int(window) if window is not None else None,
+            sets=frozenset(s.lower() for s in data.get("sets") or ()),
+            rarities=frozenset(r.lower() for r in data.get("rarities") or ()),
+        )
+
+class SubscriptionRegistry:
+    """
+    guild -> spoilers channels, stored in SUBSCRIPTIONS_PATH as
+    {"subscriptions": [{"guild_id": ..., "channel_id": ..., "window_days": 2, "sets": ["dsk"]}]}.
+    Without that file the bot keeps its single MTG_SPOILERS_CHANNEL_ID destination.
+    """
+
+    def __init__(self, subscriptions: list[Subscription] | None = None):
+        self._by_channel: dict[int, Subscription] = {}
+        for sub in subscriptions or []:
+            self.add(sub)
+
+    @classmethod
+    def load(cls, path: str, default_channel_id: int | None = None) -> "SubscriptionRegistry":
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls([Subscription.from_dict(d) for d in data.get("subscriptions", [])])
+        if default_channel_id is not None:
+            return cls([Subscription(guild_id=0, channel_id=default_channel_id)])
+        return cls()
+
+    @classmethod
+    def from_config(cls, cfg) -> "SubscriptionRegistry":
+        return cls.load(cfg.subscriptions_path, cfg.mtg_spoilers_channel_id)
+
+    def add(self, sub: Subscription) -> None:
+        """Add or replace the subscription for `sub.channel_id`."""
+        self._by_channel[sub.channel_id] = sub
+
+    def widest_since(self, today: date, default_window_days: int) -> date:
+        """Earliest since_date any subscription needs, so one scan serves all of them."""
+        dates = [s.since_date(today, default_window_days) for s in self]
+        return min(dates) if dates else today - timedelta(days=default_window_days)
+
+    def __iter__(self):
+        return iter(self._by_channel.values())
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
@@ -4,21 +4,41 @@ import sys
 import json
 import asyncio
 import aiohttp
-import tempfile
+import hashlib
 from datetime import datetime
-from typing import Optional
-from urllib.parse import urlparse, parse_qs
-from bs4 import BeautifulSoup
+from typing import Container, Optional
 from discord.ext import tasks
 
+from .article_meta import ArticleMetaCache, fetch_article_meta
+from .coordination import LeaderLock
+from .embeds import article_embed
+from .fileio import write_json_atomic
+from .httpclient import HttpClient
+from .link_extract import extract_archive_links
+from .metrics import METRICS
+
 # ----- configuration -----
 NEWS_ARCHIVE_URL = "https://magic.wizards.com/en/news/archive"
 BASE_URL = "https://magic.wizards.com"
 STORE_PATH = "articles.json"  # JSON store for seen links
+NEWS_USER_AGENT = "MTGNewsBot/1.0"
 
 # Single target Discord channel for all articles
 NEWS_CHANNEL_ENV = "MTG_NEWS_CHANNEL_ID"
 
+# Poll interval bounds (minutes): back off while the archive is unchanged,
+# snap back to the minimum as soon as new links show up.
+NEWS_POLL_MIN_ENV = "NEWS_POLL_MIN_MINUTES"
+NEWS_POLL_MAX_ENV = "NEWS_POLL_MAX_MINUTES"
+
+# Link extraction engine: auto | stream | strainer | lxml | soup (see link_extract.py)
+NEWS_LINK_ENGINE_ENV = "NEWS_LINK_ENGINE"
+
+# Article enrichment: concurrent page fetches, metadata cache lifetime, pause between posts
+NEWS_FETCH_CONCURRENCY_ENV = "NEWS_FETCH_CONCURRENCY"
+NEWS_META_TTL_ENV = "NEWS_META_TTL_S"
+NEWS_POST_DELAY_ENV = "NEWS_POST_DELAY_MS"
+
 def load_news_channel_id() -> int:
     raw = os.getenv(NEWS_CHANNEL_ENV)
     if raw is None:
@@ -28,6 +48,18 @@ def load_news_channel_id() -> int:
     except ValueError:
         sys.exit(f"Invalid integer for {NEWS_CHANNEL_ENV}: {raw!r}")
 
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        sys.exit(f"Invalid integer for {name}: {raw!r}")
+
+def _env_minutes(name: str, default: int) -> int:
+    return _env_int(name, default, minimum=1)
+
 # ----- JSON store helpers (crash-safe, atomic writes) -----
 def _default_store() -> dict:
     return {"seen_links": []}
@@ -49,26 +81,8 @@ def load_store(path: str) -> dict:
         return _default_store()
 
 def save_store_atomic(path: str, payload: dict) -> None:
-    """
-    Atomically write the whole JSON store:
-    1) write to temp file in the same dir
-    2) flush + fsync
-    3) os.replace to target
-    """
-    dirpath = os.path.dirname(os.path.abspath(path)) or "."
-    fd, tmpname = tempfile.mkstemp(dir=dirpath, prefix=".tmp_articles_", text=True)
-    try:
-        with os.fdopen(fd, "w", encoding="utf-8") as wf:
-            json.dump(payload, wf, ensure_ascii=False, indent=2)
-            wf.flush()
-            os.fsync(wf.fileno())
-        os.replace(tmpname, path)
-    finally:
-        try:
-            if os.path.exists(tmpname):
-                os.remove(tmpname)
-        except Exception:
-            pass
+    """Atomically write the whole JSON store (temp file, fsync, os.replace)."""
+    write_json_atomic(path, payload, ensure_ascii=False, indent=2)
 
 def persist_seen_link_atomic(path: str, link: str) -> None:
     """
@@ -81,99 +95,200 @@ def persist_seen_link_atomic(path: str, link: str) -> None:
         save_store_atomic(path, store)
 
 # ----- scraping & routing -----
-def _is_author_archive_link(link: str) -> bool:
+def _parse_archive_links(html: str, seen: Container[str] | None = None) -> list[str]:
+    return extract_archive_links(html, os.getenv(NEWS_LINK_ENGINE_ENV, "auto"), seen)
+
+def _relevant_body_hash(html: str) -> str:
     """
-    Return True for links that point to the archive page filtered by author,
-    e.g., /en/news/archive?author=Mark+Rosewater
+    Hash the part of the page that carries the article list (<main> when present),
+    so per-request noise in headers/footers/scripts doesn't look like a change.
     """
-    try:
-        parsed = urlparse(link)
-        path = (parsed.path or "").rstrip("/")
-        if path == "/en/news/archive":
-            qs = parse_qs(parsed.query or "")
-            return "author" in qs
-        return False
-    except Exception:
-        # If parsing fails, err on the side of posting (do not block).
-        return False
+    start = html.find("<main")
+    end = html.rfind("</main>")
+    body = html[start:end] if 0 <= start < end else html
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+async def fetch_archive_links(
+    session: aiohttp.ClientSession, seen: Container[str] | None = None, url: str | None = None
+) -> list[str]:
+    """
+    Return a list of relative hrefs anchored under /en/news/... from the archive page
+    (NEWS_ARCHIVE_URL unless `url` is given).
+    With `seen`, extraction skips handled links and stops at the first handled article.
+    """
+    timeout = aiohttp.ClientTimeout(total=15)
+    async with METRICS.stage("news_fetch") as st:
+        try:
+            headers = {"User-Agent": NEWS_USER_AGENT}
+            async with session.get(url or NEWS_ARCHIVE_URL, timeout=timeout, headers=headers) as resp:
+                resp.raise_for_status()
+                html = await resp.text()
+        except Exception as e:
+            print(f"[hourly_news] fetch error: {e}")
+            METRICS.inc("news_fetches", status="error")
+            return []
+        METRICS.inc("news_fetches", status="parsed")
+        METRICS.inc("news_bytes", len(html.encode("utf-8")))
+        links = _parse_archive_links(html, seen)
+        st.note(links=len(links))
+    return links
 
-async def fetch_archive_links(session: aiohttp.ClientSession) -> list[str]:
+async def fetch_archive_links_if_changed(
+    session: aiohttp.ClientSession, cache: dict, seen: Container[str] | None = None
+) -> tuple[str, list[str], dict]:
     """
-    Return a list of relative hrefs anchored under /en/news/... from the archive page.
-    Uses CSS selectors for precision.
+    Conditional fetch of the archive page.
+    `cache` holds the validators of the last fully processed page (etag, last_modified,
+    body_hash). Returns (status, links, new_cache) where status is one of
+    "not_modified" (HTTP 304), "unchanged" (same body hash; parse skipped),
+    "parsed" or "error". Links are only returned for "parsed".
     """
+    async with METRICS.stage("news_fetch") as st:
+        status, links, new_cache = await _fetch_archive_if_changed(session, cache, seen)
+        st.note(status=status, links=len(links))
+    METRICS.inc("news_fetches", status=status)
+    return status, links, new_cache
+
+async def _fetch_archive_if_changed(
+    session: aiohttp.ClientSession, cache: dict, seen: Container[str] | None
+) -> tuple[str, list[str], dict]:
+    headers = {"User-Agent": NEWS_USER_AGENT}
+    if cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    if cache.get("last_modified"):
+        headers["If-Modified-Since"] = cache["last_modified"]
     timeout = aiohttp.ClientTimeout(total=15)
     try:
-        async with session.get(NEWS_ARCHIVE_URL, timeout=timeout) as resp:
+        async with session.get(NEWS_ARCHIVE_URL, timeout=timeout, headers=headers) as resp:
+            if resp.status == 304:
+                return "not_modified", [], cache
             resp.raise_for_status()
             html = await resp.text()
+            METRICS.inc("news_bytes", len(html.encode("utf-8")))
+            new_cache = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body_hash": _relevant_body_hash(html),
+            }
     except Exception as e:
         print(f"[hourly_news] fetch error: {e}")
-        return []
-    soup = BeautifulSoup(html, "html.parser")
-    # CSS selector: only anchors whose href starts with /en/news/
-    anchors = soup.select('a[href^="/en/news/"]')
-    links = [a.get("href") for a in anchors if a.get("href")]
-    # Filter out author-filtered archive pages
-    links = [h for h in links if not _is_author_archive_link(h)]
-    return links
+        return "error", [], cache
+    if cache.get("body_hash") and new_cache["body_hash"] == cache["body_hash"]:
+        return "unchanged", [], new_cache
+    return "parsed", _parse_archive_links(html, seen), new_cache
 
 def make_absolute(link: str) -> str:
     return (BASE_URL + link) if link.startswith("/") else link
 
 # ----- the hourly task (closure-based setup, mirrors tasks_spoilers.py) -----
-def setup_hourly_news(bot):
+def setup_hourly_news(bot, web: HttpClient, leader: LeaderLock | None = None):
     """
     Build and return the hourly news loop bound to `bot`.
     Call .start() on the returned task from app.py (e.g., in on_ready/setup_hook).
+    With a `leader` lock, only the worker process holding it scrapes and posts.
     """
-    @tasks.loop(hours=1, reconnect=True)
+    min_minutes = _env_minutes(NEWS_POLL_MIN_ENV, 60)
+    max_minutes = max(min_minutes, _env_minutes(NEWS_POLL_MAX_ENV, 240))
+    counters = {"runs": 0, "parsed": 0, "not_modified": 0, "unchanged": 0, "errors": 0}
+    poll = {"minutes": min_minutes}
+    fetch_concurrency = _env_int(NEWS_FETCH_CONCURRENCY_ENV, 4, minimum=1)
+    post_delay_s = _env_int(NEWS_POST_DELAY_ENV, 800) / 1000.0
+    # Outlives a run, so a send retried next hour doesn't fetch the article again
+    meta_cache = ArticleMetaCache(ttl_s=_env_int(NEWS_META_TTL_ENV, 6 * 3600))
+
+    @tasks.loop(minutes=min_minutes, reconnect=True)
     async def hourly_news():
         # Ensure the bot is ready
         await bot.wait_until_ready()
+        if leader is not None and not leader.is_leader("hourly_news"):
+            return
 
         # Load seen set from JSON store
         store = load_store(STORE_PATH)
         seen = set(store["seen_links"])
+        cache = store.get("archive_cache") or {}
+        counters["runs"] += 1
+        posted_count = 0
+        failed_count = 0
 
-        # Fetch archive links via a shared session
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=15),
-            headers={"User-Agent": "MTGNewsBot/1.0"},
-        ) as session:
-            links = await fetch_archive_links(session)
-            posted_count = 0
+        # Fetch archive links via the bot-wide pooled session
+        status, links, new_cache = await fetch_archive_links_if_changed(web.session, cache, seen)
+        counters[status if status != "error" else "errors"] += 1
 
+        # Links whose post failed last time; the seen-link early stop would skip them now
+        retry = [link for link in store.get("retry_links", []) if link not in seen]
+        failed_links: list[str] = []
+
+        if status == "parsed" or retry:
             news_channel_id = load_news_channel_id()
             target_channel = bot.get_channel(news_channel_id)
             if target_channel is None:
                 print(f"[hourly_news] Channel id {news_channel_id} not found")
                 return
 
-            for link in links:
-                if link in seen:
-                    continue  # already handled
-                # We now send all /en/news/... links to the single channel
-                if not link.startswith("/en/news/"):
-                    continue
-                # Defense-in-depth: also skip author-filtered archive links here
-                if _is_author_archive_link(link):
-                    continue
-
-                url = make_absolute(link)
-                try:
-                    await target_channel.send(url)
-                    posted_count += 1
-                    # Persist progress immediately (atomic, per-post)
-                    persist_seen_link_atomic(STORE_PATH, link)
-                    seen.add(link)  # keep in-memory set synced
-                    # Optional: small delay to be gentle with rate limits
-                    await asyncio.sleep(0.8)
-                except Exception as e:
-                    print(f"[hourly_news] send error for {url}: {e}")
+            # Extraction already kept only unseen /en/news/... links, minus author archives;
+            # drop duplicate anchors on the same page
+            new_links = list(dict.fromkeys(link for link in retry + links if link not in seen))
+            fetch_limit = asyncio.Semaphore(fetch_concurrency)
+
+            async def enrich(url: str):
+                async with fetch_limit:
+                    return await fetch_article_meta(web.session, url, meta_cache, NEWS_USER_AGENT)
+
+            # Every page fetch starts now (at most `fetch_concurrency` at a time); posts go out
+            # in archive order as each one's metadata arrives, while later pages keep loading
+            fetches = [asyncio.create_task(enrich(make_absolute(link))) for link in new_links]
+            try:
+                for link, fetch in zip(new_links, fetches):
+                    url = make_absolute(link)
+                    try:
+                        meta = await fetch
+                    except Exception as e:
+                        print(f"[hourly_news] enrich error for {url}: {e}")
+                        meta = None
+                    try:
+                        if meta is not None and meta.title:
+                            await target_channel.send(embed=article_embed(meta))
+                            METRICS.inc("discord_sends", kind="news_embed")
+                        else:
+                            await target_channel.send(url)  # let Discord unfurl it
+                            METRICS.inc("discord_sends", kind="news_link")
+                        posted_count += 1
+                        # Persist progress immediately (atomic, per-post)
+                        persist_seen_link_atomic(STORE_PATH, link)
+                        seen.add(link)  # keep in-memory set synced
+                        if post_delay_s:
+                            METRICS.inc("rate_limit_wait_seconds", post_delay_s, kind="news_delay")
+                            await asyncio.sleep(post_delay_s)
+                    except Exception as e:
+                        failed_count += 1
+                        failed_links.append(link)
+                        print(f"[hourly_news] send error for {url}: {e}")
+            finally:
+                for fetch in fetches:
+                    fetch.cancel()
+
+        # Remember the page only once every link on it was handled, so a failed
+        # send is retried on the next run instead of being hidden by the hash.
+        remember_page = status in ("parsed", "unchanged") and not failed_count and new_cache != cache
+        if remember_page or failed_links != store.get("retry_links", []):
+            store = load_store(STORE_PATH)
+            if remember_page:
+                store["archive_cache"] = new_cache
+            store["retry_links"] = failed_links
+            save_store_atomic(STORE_PATH, store)
+
+        if posted_count:
+            poll["minutes"] = min_minutes
+        elif status in ("not_modified", "unchanged"):
+            poll["minutes"] = min(max_minutes, poll["minutes"] * 2)
+        if hourly_news.minutes != poll["minutes"]:
+            hourly_news.change_interval(minutes=poll["minutes"])
 
         print(
-            f"[hourly_news] posted={posted_count} at "
+            f"[hourly_news] status={status} posted={posted_count} next_in={poll['minutes']}m "
+            f"skipped={counters['not_modified'] + counters['unchanged']} parsed={counters['parsed']} "
+            f"errors={counters['errors']} runs={counters['runs']} at "
             f"{datetime.now().isoformat(timespec='seconds')}"
         )
 
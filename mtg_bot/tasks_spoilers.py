@@ -1,71 +1,90 @@
-import asyncio, aiohttp
-from datetime import datetime, timedelta, time as timeobj
+from datetime import datetime, time as timeobj
 from discord.ext import tasks
 
 from .config import Config, safe_tz
-from .state import load_state, save_state_atomic, has_been_posted, persist_posted
-from .scryfall import BulkScryfall, filter_recent_cards
-from .embeds import card_embed
+from .coordination import LeaderLock
+from .state import PostedStore
+from .scryfall import BulkScryfall, unique_by_oracle
+from .spoiler_feed import ScryfallSpoilerFeed
+from .fanout import drain_outbox, fan_out_cards
+from .outbox import Outbox
+from .subscriptions import SubscriptionRegistry
+from .workers import BulkWorkers, LoopLagMonitor
+from .httpclient import HttpClient
 
 
-def setup_daily_post(bot, cfg: Config):
+def setup_daily_post(bot, cfg: Config, workers: BulkWorkers, web: HttpClient, leader: LeaderLock | None = None):
     @tasks.loop(time=timeobj(hour=cfg.post_hour, minute=cfg.post_minute))
     async def daily_post():
         await bot.wait_until_ready()
+        # Several worker processes: only the leader runs the scheduled scan
+        if leader is not None and not leader.is_leader("daily_post"):
+            return
 
         testing_channel = bot.get_channel(cfg.bot_testing_channel_id)
-        post_channel = bot.get_channel(cfg.mtg_spoilers_channel_id)
+        registry = SubscriptionRegistry.from_config(cfg)
 
-        if testing_channel is None and post_channel is None:
-            print("[daily_post] No channels available; aborting run.")
+        if not len(registry):
+            print("[daily_post] No subscribed channels; aborting run.")
             return
 
         tz = safe_tz(cfg.tz_key)
         now_local = datetime.now(tz)
-        since_date = (now_local.date() - timedelta(days=cfg.window_days))
+        # One scan covers the widest per-guild window; each subscription narrows it
+        since_date = registry.widest_since(now_local.date(), cfg.window_days)
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
-            bulk = BulkScryfall(session, cfg.bulk_meta_path, cfg.bulk_file_path)
+        bulk = BulkScryfall.from_config(web.session, cfg, workers)
+        async with LoopLagMonitor() as lag:
             _, bulk_updated_at = await bulk.ensure_bulk_file()
-            recent_cards = filter_recent_cards(cfg.bulk_file_path, since_date)
-
-            if not recent_cards:
-                if testing_channel:
-                    await testing_channel.send(
-                        f"🔔 No new Scryfall cards or spoilers since {since_date} (Bulk updated: {bulk_updated_at})."
-                    )
-                st = load_state(cfg.state_path)
-                st["last_run_date"] = now_local.date().isoformat()
-                save_state_atomic(cfg.state_path, st)
-                return
+            recent_cards = None
+            if cfg.use_bulk_delta:
+                # Only what changed since the last daily run's snapshot; None on the first one
+                recent_cards = await workers.recent_from_delta(
+                    cfg.bulk_delta_path, bulk_updated_at, since_date
+                )
+            source = "delta" if recent_cards is not None else "window"
+            if recent_cards is None:
+                recent_cards = await workers.recent_cards(
+                    bulk_updated_at, cfg.bulk_file_path, since_date, cfg.bulk_index_path
+                )
+        if cfg.scryfall_unique == "cards":
+            recent_cards = unique_by_oracle(recent_cards)
+        print(
+            f"[daily_post] {source} scan done; max loop lag {lag.max_lag_ms:.0f} ms; "
+            f"cache: {workers.cache.stats_line()}"
+        )
 
-            if not post_channel:
-                if testing_channel:
-                    await testing_channel.send("⚠️ Spoilers channel not found; cannot post embeds.")
-                return
+        if not recent_cards:
+            if testing_channel:
+                await testing_channel.send(
+                    f"🔔 No new Scryfall cards or spoilers since {since_date} (Bulk updated: {bulk_updated_at})."
+                )
+            with PostedStore.from_config(cfg) as store:
+                store.last_run_date = now_local.date().isoformat()
+            await workers.consume_delta(cfg.bulk_delta_path, bulk_updated_at)
+            return
 
-            st = load_state(cfg.state_path)
-            posted_total = 0
-            delay_s = max(0.0, cfg.post_delay_ms / 1000.0)
+        delay_s = max(0.0, cfg.post_delay_ms / 1000.0)
 
-            for card in recent_cards:
-                if has_been_posted(st, card):
-                    continue
-                embed = card_embed(card)
-                await post_channel.send(embed=embed)
-                posted_total += 1
-                st = persist_posted(cfg.state_path, st, card)
-                if delay_s > 0:
-                    await asyncio.sleep(delay_s)
+        with PostedStore.from_config(cfg) as store:
+            result = await fan_out_cards(
+                bot, registry, recent_cards, store, now_local.date(), cfg.window_days,
+                bulk_updated_at, delay_s, cfg.post_batch_size, cfg.fanout_max_concurrency,
+                Outbox.from_config(store, cfg),
+            )
 
             # Update last run date
-            st["last_run_date"] = now_local.date().isoformat()
-            save_state_atomic(cfg.state_path, st)
+            store.last_run_date = now_local.date().isoformat()
+            store.prune()
 
-            if testing_channel:
-                await testing_channel.send(
-                    f"✅ Posted {posted_total} item(s). since_date={since_date} (Bulk updated: {bulk_updated_at})."
-                )
+        # Everything up to this snapshot is queued now; the next snapshot starts a new delta
+        await workers.consume_delta(cfg.bulk_delta_path, bulk_updated_at)
+
+        if testing_channel:
+            await testing_channel.send(
+                f"✅ Posted {result.total} item(s): {result.summary()}. since_date={since_date} "
+                f"(Bulk updated: {bulk_updated_at})."
+            )
 
     @daily_post.before_loop
     async def _before():
@@ -73,3 +92,82 @@ def setup_daily_post(bot, cfg: Config):
 
     # Expose so the caller can start it after bot login
     return daily_post
+
+
+def setup_spoiler_feed(bot, cfg: Config, web: HttpClient, leader: LeaderLock | None = None):
+    """
+    Poll Scryfall's card search every SPOILER_POLL_MINUTES for cards spoiled since
+    the last poll and fan them out like the daily run, against the same posted-card
+    state. Returns None when the feed is disabled. A card whose send fails is not
+    retried by the feed; the next daily bulk run still picks it up. Like the daily
+    run, it only polls in the process holding `leader`.
+    """
+    if cfg.spoiler_poll_minutes <= 0:
+        return None
+    # Built on the first poll (the shared session binds to the running loop) and kept
+    # afterwards: it remembers what earlier polls returned
+    holder: dict[str, ScryfallSpoilerFeed] = {}
+
+    @tasks.loop(minutes=cfg.spoiler_poll_minutes, reconnect=True)
+    async def spoiler_feed():
+        await bot.wait_until_ready()
+        if leader is not None and not leader.is_leader("spoiler_feed"):
+            return
+
+        registry = SubscriptionRegistry.from_config(cfg)
+        if not len(registry):
+            return
+        feed = holder.get("feed") or holder.setdefault("feed", ScryfallSpoilerFeed.from_config(web.session, cfg))
+        feed.session = web.session  # the shared session is recreated if it was ever closed
+        now_local = datetime.now(safe_tz(cfg.tz_key))
+        since_date = registry.widest_since(now_local.date(), cfg.window_days)
+
+        with PostedStore.from_config(cfg) as store:
+            try:
+                cards = await feed.poll(since_date, known=store.has_been_posted)
+            except Exception as e:
+                print(f"[spoiler_feed] poll failed: {e}")
+                return
+            if not cards:
+                return
+            result = await fan_out_cards(
+                bot, registry, cards, store, now_local.date(), cfg.window_days,
+                None, max(0.0, cfg.post_delay_ms / 1000.0), cfg.post_batch_size, cfg.fanout_max_concurrency,
+                Outbox.from_config(store, cfg),
+            )
+        print(f"[spoiler_feed] {len(cards)} new card(s) since {since_date}: {result.summary()}")
+
+    @spoiler_feed.before_loop
+    async def _before_feed():
+        await bot.wait_until_ready()
+
+    return spoiler_feed
+
+
+def setup_outbox_worker(bot, cfg: Config):
+    """
+    Drain the durable outbox every OUTBOX_DRAIN_SECONDS: deliveries a run could not
+    finish (Discord errors, a restart mid-run) resume from the queue, honouring each
+    item's retry backoff. The first pass runs as soon as the bot is ready. Every
+    worker process runs this pass; channel leases keep them from posting twice.
+    """
+    @tasks.loop(seconds=cfg.outbox_drain_seconds, reconnect=True)
+    async def outbox_worker():
+        await bot.wait_until_ready()
+        with PostedStore.from_config(cfg) as store:
+            outbox = Outbox.from_config(store, cfg)
+            if not len(outbox):
+                outbox.publish_metrics()
+                return
+            result = await drain_outbox(
+                bot, outbox, max(0.0, cfg.post_delay_ms / 1000.0), cfg.post_batch_size, cfg.fanout_max_concurrency,
+            )
+            stats = outbox.publish_metrics()
+        if result.posted or result.errors:
+            print(f"[outbox] {result.summary()}; depth={stats['depth']} oldest_age_s={stats['oldest_age_s']}")
+
+    @outbox_worker.before_loop
+    async def _before_outbox():
+        await bot.wait_until_ready()
+
+    return outbox_worker
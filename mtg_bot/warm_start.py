@@ -0,0 +1,93 @@
+import os, time
+
+from .card_cache import RecentCardCache
+from .fileio import read_json, write_json_atomic
+from .metrics import METRICS
+from .state import PostedStore, prime_posted_ids
+
+# Warm-start snapshot (compact JSON), written at clean shutdown and after each bulk refresh:
+#   bulk    updated_at and bulk_type of the snapshot, plus the bulk file size/mtime
+#   recent  the resident recent-window results as [window start ordinal, cards] pairs
+#   posted  the posted-id dedupe set and the table fingerprint it was read at
+# The next boot restores the windows only while the bulk meta and file on disk still
+# match, and the ids only while the table fingerprint does; anything stale is ignored.
+WARM_START_VERSION = 1
+
+
+def _bulk_stamp(bulk_meta_path: str, bulk_file_path: str) -> dict | None:
+    meta = read_json(bulk_meta_path)
+    if not meta.get("updated_at"):
+        return None
+    try:
+        st = os.stat(bulk_file_path)
+    except OSError:
+        return None
+    return {"updated_at": meta["updated_at"], "bulk_type": meta.get("bulk_type", "default_cards"),
+            "bulk_size": st.st_size, "bulk_mtime_ns": st.st_mtime_ns}
+
+
+class WarmStart:
+    """Saves and restores the parsed state a restart would otherwise rebuild from disk."""
+
+    def __init__(self, path: str, bulk_meta_path: str, bulk_file_path: str, state_db_path: str | None = None):
+        self.path = path
+        self.bulk_meta_path = bulk_meta_path
+        self.bulk_file_path = bulk_file_path
+        self.state_db_path = state_db_path
+
+    @classmethod
+    def from_config(cls, cfg) -> "WarmStart | None":
+        if not cfg.warm_start_path:
+            return None
+        return cls(cfg.warm_start_path, cfg.bulk_meta_path, cfg.bulk_file_path, cfg.state_db_path)
+
+    def snapshot(self, cache: RecentCardCache) -> dict | None:
+        """
+        The payload to save, taken from `cache`; call it where the cache is mutated
+        (the event loop). None when there is no bulk snapshot to tie it to yet.
+        """
+        bulk = _bulk_stamp(self.bulk_meta_path, self.bulk_file_path)
+        if bulk is None:
+            return None
+        windows = cache.export() if cache.updated_at == bulk["updated_at"] else []
+        return {"version": WARM_START_VERSION, "saved_at": time.time(), "bulk": bulk, "recent": windows}
+
+    def write(self, payload: dict) -> None:
+        """Add the posted ids to a snapshot() payload and write it; safe to run in a worker thread."""
+        with METRICS.stage("warm_start_save") as st:
+            if self.state_db_path and os.path.exists(self.state_db_path):
+                with PostedStore(self.state_db_path) as store:
+                    payload["posted"] = {"fingerprint": store.fingerprint(), "ids": store.posted_ids()}
+            write_json_atomic(self.path, payload, ensure_ascii=False, separators=(",", ":"))
+            st.note(windows=len(payload["recent"]), posted_ids=len(payload.get("posted", {}).get("ids", ())))
+
+    def save(self, cache: RecentCardCache) -> bool:
+        """Write the snapshot; False when there is no bulk snapshot to tie it to yet."""
+        payload = self.snapshot(cache)
+        if payload is None:
+            return False
+        self.write(payload)
+        return True
+
+    def load(self, cache: RecentCardCache) -> dict:
+        """
+        Restore what still matches the files on disk into `cache` (and prime the
+        posted-id set for the next PostedStore). Returns what was restored.
+        """
+        restored = {"windows": 0, "cards": 0, "posted_ids": 0}
+        with METRICS.stage("warm_start_load") as st:
+            data = read_json(self.path)
+            if data.get("version") != WARM_START_VERSION:
+                return restored
+            bulk = data.get("bulk")
+            if bulk and bulk == _bulk_stamp(self.bulk_meta_path, self.bulk_file_path):
+                windows = [(since, cards) for since, cards in data.get("recent") or []]
+                cache.restore(bulk["updated_at"], windows)
+                restored["windows"] = len(windows)
+                restored["cards"] = sum(len(cards) for _, cards in windows)
+            posted = data.get("posted")
+            if posted and self.state_db_path:
+                prime_posted_ids(self.state_db_path, posted["ids"], posted["fingerprint"])
+                restored["posted_ids"] = len(posted["ids"])
+            st.note(**restored)
+        return restored
@@ -0,0 +1,207 @@
+import asyncio, time, multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+from typing import Callable
+
+from .card_cache import RecentCardCache
+from .delta import mark_delta_consumed
+from .metrics import METRICS
+from .name_index import CardNameIndex
+from .scryfall import rebuild_index, recent_from_delta, scan_recent_cards
+from .warm_start import WarmStart
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class BulkWorkers:
+    """
+    Runs bulk-file CPU work (JSON parse, date filter, sort, index builds) off the event loop.
+    `kind="process"` isolates the work from the GIL entirely; only the small filtered
+    result is pickled back to the bot process.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 1, cache: RecentCardCache | None = None,
+                 warm_start: WarmStart | None = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind {kind!r}; expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor: Executor | None = None
+        # Resident recent-window results for the current bulk snapshot
+        self.cache = cache or RecentCardCache()
+        # Resident name index, keyed by the bulk updated_at it was built for
+        self._names: tuple[str, CardNameIndex] | None = None
+        # In-flight load of the name index, shared by everyone waiting on that version
+        self._names_loading: tuple[str, asyncio.Task] | None = None
+        # Rewritten once per new bulk snapshot, by whichever daily path read it
+        self.warm_start = warm_start
+        self._warm_written: str | None = None
+
+    @classmethod
+    def from_config(cls, cfg) -> "BulkWorkers":
+        return cls(
+            cfg.bulk_executor,
+            cfg.bulk_workers,
+            RecentCardCache(cfg.card_cache_max_entries, cfg.card_cache_max_cards),
+            WarmStart.from_config(cfg),
+        )
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn: never fork a process that is running an event loop and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk")
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), fn, *args)
+
+    async def filter_recent_cards(
+        self, bulk_json_path: str, since_date: date, index_path: str | None = None
+    ) -> list[dict]:
+        # Counted here rather than in the worker, whose process may not share METRICS
+        async with METRICS.stage("filter_recent", executor=self.kind) as st:
+            cards, scanned = await self.run(scan_recent_cards, bulk_json_path, since_date, True, index_path)
+            st.note(scanned=scanned, kept=len(cards))
+        METRICS.inc("cards_scanned", scanned)
+        METRICS.inc("cards_kept", len(cards))
+        return cards
+
+    async def recent_cards(
+        self, updated_at: str, bulk_json_path: str, since_date: date, index_path: str | None = None
+    ) -> list[dict]:
+        """Cached filter_recent_cards; only re-reads the bulk file when `updated_at` changes."""
+        refreshed = updated_at != self.cache.updated_at
+        cards = await self.cache.get(
+            updated_at, since_date,
+            lambda: self.filter_recent_cards(bulk_json_path, since_date, index_path),
+        )
+        if refreshed:
+            await self._refresh_warm_start(updated_at)
+        return cards
+
+    async def _refresh_warm_start(self, updated_at: str) -> None:
+        if self.warm_start is None or updated_at == self._warm_written:
+            return
+        # Export on the loop, where the cache changes; only the payload goes to the thread
+        payload = self.warm_start.snapshot(self.cache)
+        if payload is not None:
+            await asyncio.to_thread(self.warm_start.write, payload)
+            self._warm_written = updated_at
+
+    async def rebuild_index(self, bulk_path: str, index_path: str, updated_at: str,
+                            fingerprints_path: str | None = None, delta_path: str | None = None,
+                            names_path: str | None = None, store_path: str | None = None) -> int:
+        # Unmap the old card store first; its file is about to be replaced
+        self._drop_names()
+        return await self.run(
+            rebuild_index, bulk_path, index_path, updated_at, fingerprints_path, delta_path,
+            names_path, store_path,
+        )
+
+    async def name_index(self, updated_at: str, names_path: str, bulk_path: str,
+                         store_path: str | None = None) -> CardNameIndex | None:
+        """The name index for `updated_at`, loaded once per bulk version (None if not built yet)."""
+        if self._names is not None and self._names[0] == updated_at:
+            return self._names[1]
+        return await asyncio.shield(self._names_task(updated_at, names_path, bulk_path, store_path))
+
+    def loaded_name_index(self, updated_at: str) -> CardNameIndex | None:
+        """The name index if it is already resident for `updated_at`; never waits for a load."""
+        if self._names is not None and self._names[0] == updated_at:
+            return self._names[1]
+        return None
+
+    def preload_names(self, updated_at: str, names_path: str, bulk_path: str,
+                      store_path: str | None = None) -> None:
+        """Start loading the name index in the background unless it is loaded or loading already."""
+        if self.loaded_name_index(updated_at) is None:
+            self._names_task(updated_at, names_path, bulk_path, store_path)
+
+    def _names_task(self, updated_at: str, names_path: str, bulk_path: str,
+                    store_path: str | None) -> asyncio.Task:
+        if self._names_loading is None or self._names_loading[0] != updated_at:
+            task = asyncio.create_task(self._load_names(updated_at, names_path, bulk_path, store_path))
+            self._names_loading = (updated_at, task)
+        return self._names_loading[1]
+
+    async def _load_names(self, updated_at: str, names_path: str, bulk_path: str,
+                          store_path: str | None) -> CardNameIndex | None:
+        try:
+            # Built in a thread even with a process pool: the result is large to pickle back
+            index = await asyncio.to_thread(CardNameIndex.load, names_path, bulk_path, store_path)
+        except Exception as e:
+            print(f"[card] name index load failed: {e}")
+            return None
+        finally:
+            if self._names_loading is not None and self._names_loading[0] == updated_at:
+                self._names_loading = None
+        if index is None or index.updated_at != updated_at:
+            if index is not None:
+                index.close()
+            return None
+        self._drop_names()
+        self._names = (updated_at, index)
+        return index
+
+    def _drop_names(self) -> None:
+        if self._names is not None:
+            self._names[1].close()
+            self._names = None
+
+    async def recent_from_delta(self, delta_path: str, updated_at: str, since_date: date) -> list[dict] | None:
+        cards = await self.run(recent_from_delta, delta_path, updated_at, since_date)
+        if updated_at != self.cache.updated_at:
+            # The window cache was not reloaded for this snapshot; the snapshot still
+            # moves on to it (and to the current posted ids)
+            await self._refresh_warm_start(updated_at)
+        return cards
+
+    async def consume_delta(self, delta_path: str, updated_at: str) -> None:
+        await self.run(mark_delta_consumed, delta_path, updated_at)
+
+    def shutdown(self) -> None:
+        if self._names_loading is not None:
+            self._names_loading[1].cancel()
+            self._names_loading = None
+        self._drop_names()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop responsiveness while a block runs:
+    a ticker sleeps `interval_s` and records how late it wakes up.
+    """
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.max_lag_ms = 0.0
+        self.samples = 0
+        self._task: asyncio.Task | None = None
+
+    async def _tick(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval_s)
+            lag = (time.perf_counter() - start - self.interval_s) * 1000.0
+            self.samples += 1
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,61 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from mtg_bot import tasks_articles
+
+ARCHIVE_HTML = """<html><head><script>var nonce = "{nonce}";</script></head><body>
+<main>
+  <a href="/en/news/feature/new-set-preview">New set</a>
+  <a href="/en/news/archive?author=Mark+Rosewater">Mark Rosewater</a>
+  <a href="https://example.com/elsewhere">Elsewhere</a>
+  <a href="/en/news/making-magic/odds-and-ends">Odds</a>
+</main>
+</body></html>"""
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/en/news/archive", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/en/news/archive"
+
+
+def test_conditional_fetch_statuses(monkeypatch):
+    hits = {"n": 0}
+
+    async def handler(request):
+        hits["n"] += 1
+        # Fresh nonce outside <main> on every request; ETag only on the first response
+        body = ARCHIVE_HTML.format(nonce=hits["n"])
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        headers = {"ETag": '"v1"'} if hits["n"] == 1 else {}
+        return web.Response(text=body, content_type="text/html", headers=headers)
+
+    async def scenario():
+        runner, url = await _serve(handler)
+        monkeypatch.setattr(tasks_articles, "NEWS_ARCHIVE_URL", url)
+        try:
+            async with aiohttp.ClientSession() as session:
+                status, links, cache = await tasks_articles.fetch_archive_links_if_changed(session, {})
+                assert status == "parsed"
+                assert links == ["/en/news/feature/new-set-preview", "/en/news/making-magic/odds-and-ends"]
+
+                status, links, same = await tasks_articles.fetch_archive_links_if_changed(session, cache)
+                assert (status, links, same) == ("not_modified", [], cache)
+
+                # No validators this time, but the article list hashes the same
+                status, links, _ = await tasks_articles.fetch_archive_links_if_changed(
+                    session, {"body_hash": cache["body_hash"]}
+                )
+                assert (status, links) == ("unchanged", [])
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
@@ -0,0 +1,22 @@
+import os
+
+from benchmarks import run
+from mtg_bot import tasks_articles
+from mtg_bot.scryfall import BulkScryfall
+
+
+def test_benchmark_suite_runs_on_tiny_catalog(tmp_path, monkeypatch):
+    """The harness itself stays runnable and leaves the bot's module globals alone."""
+    for key in ("DISCORD_TOKEN", "MTG_SPOILERS_CHANNEL_ID", "BOT_TESTING_CHANNEL_ID", "BULK_DIR",
+                "STATE_PATH", "SUBSCRIPTIONS_PATH", "POST_DELAY_MS", "BULK_META_TTL_S"):
+        monkeypatch.setenv(key, os.environ.get(key, ""))
+    urls = (BulkScryfall.BULK_INDEX, tasks_articles.NEWS_ARCHIVE_URL)
+
+    results = run.run_size("smoke", 300, str(tmp_path))
+    assert (BulkScryfall.BULK_INDEX, tasks_articles.NEWS_ARCHIVE_URL) == urls
+    assert "daily_post_end_to_end" in results
+    assert all(r["seconds"] >= 0 and r["peak_mb"] >= 0 for r in results.values())
+
+    slower = {"smoke": {k: {"seconds": v["seconds"] * 3 + 1, "peak_mb": v["peak_mb"]} for k, v in results.items()}}
+    assert run.compare(slower, {"smoke": results}, tolerance=0.5)
+    assert not run.compare({"smoke": results}, {"smoke": results}, tolerance=0.5)
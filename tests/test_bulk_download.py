@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+
+import aiohttp
+
+from benchmarks.fakes import FakeWebServer
+from mtg_bot.scryfall import BulkScryfall
+
+BULK_BODY = (
+    "[\n"
+    + ",\n".join(json.dumps({"id": f"00000000-0000-0000-0000-{i:012d}", "name": f"Card {i}",
+                             "released_at": "2025-06-10"}) for i in range(200))
+    + "\n]\n"
+).encode("utf-8")
+
+
+def _bulk(session, server, tmp_path, **kwargs):
+    return BulkScryfall(
+        session,
+        str(tmp_path / "meta.json"),
+        str(tmp_path / "cards.json"),
+        str(tmp_path / "index.bin"),
+        index_url=f"{server.base}/bulk-data",
+        **kwargs,
+    )
+
+
+def test_gzip_download_and_cached_metadata(tmp_path):
+    async def scenario():
+        async with FakeWebServer(bulk_body=BULK_BODY) as server, aiohttp.ClientSession() as session:
+            bulk = _bulk(session, server, tmp_path, meta_ttl_s=3600)
+            _, updated_at = await bulk.ensure_bulk_file()
+            assert updated_at == server.updated_at
+            # Within the TTL no request is made at all
+            await bulk.ensure_bulk_file()
+            assert server.kinds() == ["index", "download"]
+            assert "gzip" in server.requests[1][1]["Accept-Encoding"]
+
+            # With the TTL expired the lookup is conditional and the file is not fetched again
+            bulk.meta_ttl_s = 0
+            await bulk.ensure_bulk_file()
+            assert server.kinds() == ["index", "download", "index"]
+            assert server.requests[2][1]["If-None-Match"] == f'"{server.updated_at}"'
+
+    asyncio.run(scenario())
+    assert (tmp_path / "cards.json").read_bytes() == BULK_BODY
+    assert not os.path.exists(tmp_path / "cards.json.part")
+
+
+def test_resume_partial_download(tmp_path):
+    async def scenario():
+        async with FakeWebServer(bulk_body=BULK_BODY) as server, aiohttp.ClientSession() as session:
+            bulk = _bulk(session, server, tmp_path)
+            url = f"{server.base}/file/{server.updated_at}.json"
+            (tmp_path / "cards.json.part").write_bytes(BULK_BODY[:1000])
+            (tmp_path / "cards.json.part.json").write_text(json.dumps({"url": url, "etag": '"file"'}))
+            await bulk.ensure_bulk_file()
+            _, headers = server.requests[-1]
+            assert headers["Range"] == "bytes=1000-"
+            assert headers["Accept-Encoding"] == "identity"
+
+    asyncio.run(scenario())
+    assert (tmp_path / "cards.json").read_bytes() == BULK_BODY
+
+
+def test_size_mismatch_keeps_previous_snapshot(tmp_path):
+    (tmp_path / "cards.json").write_bytes(b"[]")
+
+    async def scenario():
+        async with FakeWebServer(bulk_body=BULK_BODY, advertised_size=len(BULK_BODY)) as server, aiohttp.ClientSession() as session:
+            server.truncate_next = True
+            bulk = _bulk(session, server, tmp_path)
+            try:
+                await bulk.ensure_bulk_file()
+            except RuntimeError as e:
+                assert "size mismatch" in str(e)
+            else:
+                raise AssertionError("truncated download was accepted")
+
+    asyncio.run(scenario())
+    assert (tmp_path / "cards.json").read_bytes() == b"[]"
+    assert not os.path.exists(tmp_path / "cards.json.part")
+
+
+def test_switching_bulk_type_redownloads(tmp_path):
+    async def scenario():
+        async with FakeWebServer(bulk_body=BULK_BODY) as server, aiohttp.ClientSession() as session:
+            bulk = _bulk(session, server, tmp_path, meta_ttl_s=3600)
+            await bulk.ensure_bulk_file()
+            # SCRYFALL_UNIQUE=cards: same updated_at, but the cached entry is for the other type
+            server.bulk_type = "oracle_cards"
+            bulk.bulk_type = "oracle_cards"
+            await bulk.ensure_bulk_file()
+            assert server.kinds() == ["index", "download", "index", "download"]
+            assert "If-None-Match" not in server.requests[2][1]
+            await bulk.ensure_bulk_file()
+            assert len(server.kinds()) == 4
+
+    asyncio.run(scenario())
+    with open(tmp_path / "meta.json", encoding="utf-8") as f:
+        assert json.load(f)["bulk_type"] == "oracle_cards"
+
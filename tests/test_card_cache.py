@@ -0,0 +1,54 @@
+import asyncio
+from datetime import date
+
+from mtg_bot.card_cache import RecentCardCache
+
+CARDS = [  # newest first, as filter_recent_cards returns them
+    {"id": "c", "released_at": "2025-06-12"},
+    {"id": "b", "released_at": "2025-06-01", "preview": {"previewed_at": "2025-06-10"}},
+    {"id": "a", "released_at": "2025-06-05"},
+]
+
+
+def _loader(calls, since):
+    async def load():
+        calls.append(since)
+        return [c for c in CARDS if max(c["released_at"], (c.get("preview") or {}).get("previewed_at", "")) >= since.isoformat()]
+    return load
+
+
+def test_hits_narrower_windows_and_invalidates_on_new_snapshot():
+    cache = RecentCardCache()
+    calls = []
+
+    async def get(updated_at, since):
+        return await cache.get(updated_at, since, _loader(calls, since))
+
+    async def scenario():
+        wide = await get("v1", date(2025, 6, 1))
+        again = await get("v1", date(2025, 6, 1))
+        narrow = await get("v1", date(2025, 6, 9))
+        fresh = await get("v2", date(2025, 6, 9))
+        return wide, again, narrow, fresh
+
+    wide, again, narrow, fresh = asyncio.run(scenario())
+    assert [c["id"] for c in wide] == [c["id"] for c in again] == ["c", "b", "a"]
+    assert [c["id"] for c in narrow] == ["c", "b"]
+    assert [c["id"] for c in fresh] == ["c", "b"]
+    assert calls == [date(2025, 6, 1), date(2025, 6, 9)]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction_by_card_budget():
+    cache = RecentCardCache(max_entries=8, max_cards=4)
+    calls = []
+
+    async def scenario():
+        # Narrower window first so the wider one can't serve it
+        await cache.get("v1", date(2025, 6, 9), _loader(calls, date(2025, 6, 9)))  # 2 cards
+        await cache.get("v1", date(2025, 6, 1), _loader(calls, date(2025, 6, 1)))  # 3 cards -> evicts first
+
+    asyncio.run(scenario())
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["cards"] == 3
@@ -0,0 +1,57 @@
+import json
+
+from mtg_bot import scryfall
+from mtg_bot.card_store import CardStore, CardView, card_store_is_fresh
+from mtg_bot.embeds import render_card_payload
+from mtg_bot.name_index import CardNameIndex
+
+CARDS = [
+    {"id": "00000000-0000-0000-0000-000000000001", "oracle_id": "o1", "name": "Old Card", "set": "lea",
+     "set_name": "Limited Edition Alpha", "collector_number": "1", "rarity": "rare",
+     "released_at": "1993-08-05", "type_line": "Instant", "oracle_text": "Draw a card.",
+     "scryfall_uri": "https://scryfall.com/card/lea/1", "prices": {"usd": "9.99"},
+     "image_uris": {"small": "s.jpg", "normal": "n.jpg", "large": "l.jpg"}},
+    {"id": "00000000-0000-0000-0000-000000000002", "oracle_id": "o2", "name": "Front // Back", "set": "dsk",
+     "set_name": "Duskmourn", "collector_number": "2", "rarity": "mythic", "released_at": "2025-07-01",
+     "preview": {"previewed_at": "2025-06-09", "source": "Someone"}, "type_line": "Creature // Land",
+     "card_faces": [
+         {"name": "Front", "type_line": "Creature", "oracle_text": "Transform.", "image_uris": {"normal": "f.jpg"}},
+         {"name": "Back", "type_line": "Land", "oracle_text": "T: Add G.", "image_uris": {"normal": "b.jpg"}},
+     ]},
+    {"id": "00000000-0000-0000-0000-000000000003", "oracle_id": "o3", "name": "Fresh Print", "set": "dsk",
+     "set_name": "Duskmourn", "collector_number": "3", "rarity": "common", "released_at": "2025-06-10",
+     "type_line": "Sorcery", "oracle_text": "Ünïcode “text”."},
+]
+
+
+def _build(tmp_path):
+    bulk = tmp_path / "cards.json"
+    bulk.write_text("[\n" + ",\n".join(json.dumps(c, ensure_ascii=False) for c in CARDS) + "\n]\n",
+                    encoding="utf-8")
+    paths = {k: str(tmp_path / k) for k in ("index.bin", "names.json", "store.bin")}
+    scryfall.rebuild_index(str(bulk), paths["index.bin"], "v1",
+                           names_path=paths["names.json"], store_path=paths["store.bin"])
+    return str(bulk), paths
+
+
+def test_views_render_like_the_full_cards(tmp_path):
+    bulk, paths = _build(tmp_path)
+    assert card_store_is_fresh(paths["store.bin"], bulk, "v1")
+    assert not card_store_is_fresh(paths["store.bin"], bulk, "v2")
+    with CardStore(paths["store.bin"]) as store:
+        assert len(store) == 3 and store.updated_at == "v1"
+        for card, view in zip(CARDS, store):
+            assert render_card_payload(view) == render_card_payload(card)
+        assert store[0].get("prices") is None  # only the embed/filter fields are kept
+        assert store[2]["oracle_text"] == "Ünïcode “text”."
+
+
+def test_name_index_returns_store_views(tmp_path):
+    bulk, paths = _build(tmp_path)
+    index = CardNameIndex.load(paths["names.json"], bulk, paths["store.bin"])
+    try:
+        card = index.card(index.by_set_number("dsk", "2"))
+        assert isinstance(card, CardView) and card["card_faces"][1]["name"] == "Back"
+    finally:
+        index.close()
+    assert isinstance(CardNameIndex.load(paths["names.json"], bulk).card(0), dict)
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fakes import FakeBot, FakeChannel, FakeWebServer, dumps_cards
+from mtg_bot.app import SpoilersBot
+from mtg_bot.commands_spoilers import register_handlers
+from mtg_bot.config import load_config
+from mtg_bot.httpclient import HttpClient
+from mtg_bot import scryfall
+from mtg_bot.scryfall import BulkScryfall
+from mtg_bot.workers import BulkWorkers
+
+
+class FakeInteraction:
+    def __init__(self, owner: bool = True):
+        self.user = SimpleNamespace(id=1)
+        self.guild = SimpleNamespace(owner_id=1 if owner else 2, name="guild")
+        self.events = []
+        self.response = SimpleNamespace(defer=self._defer, send_message=self._send_message)
+        self.followup = SimpleNamespace(send=self._followup)
+
+    async def _defer(self, thinking=False):
+        self.events.append(("defer", thinking))
+
+    async def _send_message(self, content, ephemeral=False):
+        self.events.append(("message", content, ephemeral))
+
+    async def _followup(self, content=None, embed=None):
+        self.events.append(("followup", content, embed))
+
+
+def _cards():
+    today = date.today()
+    return [
+        {"id": "a", "name": "A", "set": "dsk", "released_at": today.isoformat()},
+        {"id": "b", "name": "B", "set": "fdn", "released_at": today.isoformat()},
+        {"id": "c", "name": "C", "set": "dsk", "released_at": (today - timedelta(days=5)).isoformat()},
+        {"id": "d", "name": "D", "set": "dsk", "released_at": (today - timedelta(days=400)).isoformat()},
+    ]
+
+
+def test_slash_commands_defer_then_run_in_background(tmp_path, monkeypatch):
+    for key, value in {"DISCORD_TOKEN": "t", "MTG_SPOILERS_CHANNEL_ID": "10", "BOT_TESTING_CHANNEL_ID": "20",
+                       "BULK_DIR": str(tmp_path / "bulk"), "STATE_PATH": str(tmp_path / "state.json"),
+                       "POST_DELAY_MS": "0", "WINDOW_DAYS": "1"}.items():
+        monkeypatch.setenv(key, value)
+    cfg = load_config()
+    spoilers, testing = FakeChannel(10), FakeChannel(20)
+    fake = FakeBot(spoilers, testing)
+
+    async def scenario():
+        async with FakeWebServer(bulk_body=dumps_cards(_cards())) as server:
+            monkeypatch.setattr(BulkScryfall, "BULK_INDEX", f"{server.base}/bulk-data")
+            web, workers = HttpClient(), BulkWorkers("thread")
+            bot = SpoilersBot(intents=discord.Intents.default(), web=web)
+            monkeypatch.setattr(bot, "get_channel", fake.get_channel)
+            background = register_handlers(bot, cfg, workers, web)
+            try:
+                stranger = FakeInteraction(owner=False)
+                await bot.tree.get_command("post-all").callback(stranger)
+                assert stranger.events[0][0] == "message" and stranger.events[0][2] is True
+
+                check = FakeInteraction()
+                await bot.tree.get_command("check-now").callback(check)
+                assert check.events == [("defer", True)]  # acknowledged before any bulk work
+                await asyncio.gather(*background)
+                assert check.events[1][2].title == "A"
+
+                post = FakeInteraction()
+                await bot.tree.get_command("post-all").callback(post, window_days=7, set_code="DSK")
+                await asyncio.gather(*background)
+                assert "Posted 2 item(s)" in post.events[1][1]
+            finally:
+                await web.close()
+                workers.shutdown()
+
+    asyncio.run(scenario())
+    assert [e["title"] for e in spoilers.messages[0]["embeds"]] == ["A", "C"]
+    assert not discord.Intents.default().message_content
+
+
+def test_card_defers_and_autocomplete_never_waits_for_the_index(tmp_path, monkeypatch):
+    for key, value in {"DISCORD_TOKEN": "t", "MTG_SPOILERS_CHANNEL_ID": "10", "BOT_TESTING_CHANNEL_ID": "20",
+                       "BULK_DIR": str(tmp_path / "bulk"), "STATE_PATH": str(tmp_path / "state.json")}.items():
+        monkeypatch.setenv(key, value)
+    cfg = load_config()
+    bulk = tmp_path / "bulk" / "bulk_default_cards.json"
+    bulk.write_bytes(dumps_cards(_cards()))
+    (tmp_path / "bulk" / "bulk_default_meta.json").write_text('{"updated_at": "v1"}', encoding="utf-8")
+    scryfall.rebuild_index(str(bulk), cfg.bulk_index_path, "v1", names_path=cfg.bulk_names_path)
+
+    async def scenario():
+        web, workers = HttpClient(), BulkWorkers("thread")
+        bot = SpoilersBot(intents=discord.Intents.default(), web=web)
+        register_handlers(bot, cfg, workers, web)
+        command = bot.tree.get_command("card")
+        try:
+            # Not resident yet: no choices, but the load starts in the background
+            assert await command._params["name"].autocomplete(FakeInteraction(), "A") == []
+            await workers.name_index("v1", cfg.bulk_names_path, str(bulk))
+            choices = await command._params["name"].autocomplete(FakeInteraction(), "A")
+            assert [c.name for c in choices] == ["A"]
+
+            lookup = FakeInteraction()
+            await command.callback(lookup, name="c")
+            assert lookup.events[0] == ("defer", True)  # acknowledged before the index is touched
+            assert lookup.events[1][2].title == "C"
+        finally:
+            await web.close()
+            workers.shutdown()
+
+    asyncio.run(scenario())
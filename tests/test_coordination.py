@@ -0,0 +1,81 @@
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeBot, FakeChannel
+from mtg_bot.coordination import WORKER_ID, FileLock, LeaderLock
+from mtg_bot.embeds import render_card_payload
+from mtg_bot.fanout import drain_outbox
+from mtg_bot.metrics import METRICS
+from mtg_bot.outbox import Outbox
+from mtg_bot.state import PostedStore
+from mtg_bot.tasks_spoilers import setup_daily_post
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLD_LOCK = """
+import sys
+from mtg_bot.coordination import LeaderLock
+lock = LeaderLock(sys.argv[1])
+print("leader" if lock.is_leader() else "standby", flush=True)
+sys.stdin.read()
+"""
+
+
+def test_standby_takes_over_when_the_leader_exits(tmp_path):
+    path = str(tmp_path / "state.leader.lock")
+    leader = subprocess.Popen([sys.executable, "-c", HOLD_LOCK, path], cwd=ROOT, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        assert leader.stdout.readline().startswith("[leader]")  # the takeover log line
+        assert leader.stdout.readline().strip() == "leader"
+        standby = LeaderLock(path)
+        assert not standby.is_leader("daily_post")
+        assert METRICS.gauges[("leader", ())] == 0
+        with open(path) as f:
+            assert f.read().split()[0] == f"{WORKER_ID.rsplit(':', 1)[0]}:{leader.pid}"
+    finally:
+        leader.stdin.close()  # the leader exits (or crashes): the kernel drops its lock
+        leader.wait(timeout=10)
+    assert standby.is_leader() and METRICS.gauges[("leader", ())] == 1
+    assert not FileLock(path).try_acquire()  # a second handle conflicts, even in-process
+    standby.release()
+
+
+def test_workers_split_channels_without_duplicate_posts(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    channels = [FakeChannel(100 + i, latency_s=0.01) for i in range(6)]
+    cards = [{"id": f"c{i:02d}", "name": f"Card {i}"} for i in range(25)]
+    with PostedStore(db) as store:
+        outbox = Outbox(store)
+        for ch in channels:
+            outbox.enqueue(ch.id, [(c["id"], render_card_payload(c)) for c in cards])
+
+    async def worker(name):
+        with PostedStore(db) as store:
+            return await drain_outbox(FakeBot(*channels), Outbox(store, owner=name), max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(worker("a"), worker("b"))
+
+    a, b = asyncio.run(scenario())
+    assert a.posted and b.posted and not set(a.posted) & set(b.posted)
+    assert sorted({**a.posted, **b.posted}.values()) == [25] * 6
+    for ch in channels:
+        assert [e["title"] for m in ch.messages for e in m["embeds"]] == [c["name"] for c in cards]
+    with PostedStore(db) as store:
+        assert len(Outbox(store)) == 0
+
+
+def test_scheduled_jobs_skip_on_standby(tmp_path):
+    path = str(tmp_path / "state.leader.lock")
+    held = FileLock(path)
+    assert held.try_acquire()
+    cfg = SimpleNamespace(post_hour=9, post_minute=0, bot_testing_channel_id=1, subscriptions_path=None)
+    daily_post = setup_daily_post(FakeBot(), cfg, workers=None, web=None, leader=LeaderLock(path))
+    before = METRICS.counters.get(("leader_skipped", (("job", "daily_post"),)), 0)
+    asyncio.run(daily_post.coro())  # returns before touching the config, bulk files or Discord
+    assert METRICS.counters[("leader_skipped", (("job", "daily_post"),))] == before + 1
+    held.release()
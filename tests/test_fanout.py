@@ -0,0 +1,85 @@
+import asyncio
+import json
+from datetime import date
+
+from benchmarks.fakes import FakeBot, FakeChannel
+from mtg_bot.fanout import fan_out_cards
+from mtg_bot.state import PostedStore
+from mtg_bot.subscriptions import Subscription, SubscriptionRegistry
+
+TODAY = date(2025, 6, 10)
+
+
+def _cards():
+    return [
+        {"id": "a", "name": "A", "set": "dsk", "rarity": "rare", "released_at": "2025-06-10"},
+        {"id": "b", "name": "B", "set": "dsk", "rarity": "common", "released_at": "2025-06-09"},
+        {"id": "c", "name": "C", "set": "fdn", "rarity": "mythic", "released_at": "2025-06-05"},
+    ]
+
+
+class BrokenChannel(FakeChannel):
+    async def send(self, *args, **kwargs):
+        raise RuntimeError("missing permissions")
+
+
+def test_registry_load_and_default(tmp_path):
+    path = tmp_path / "subs.json"
+    assert [s.channel_id for s in SubscriptionRegistry.load(str(path), default_channel_id=7)] == [7]
+    path.write_text(json.dumps({"subscriptions": [
+        {"guild_id": 1, "channel_id": 10, "window_days": 3, "sets": ["DSK"]},
+        {"guild_id": 2, "channel_id": 20, "rarities": ["rare", "mythic"]},
+    ]}), encoding="utf-8")
+    loaded = SubscriptionRegistry.load(str(path), default_channel_id=7)
+    assert {s.channel_id for s in loaded} == {10, 20}
+    assert [s.sets for s in loaded if s.guild_id == 1] == [frozenset({"dsk"})]
+    assert loaded.widest_since(TODAY, 1) == date(2025, 6, 7)
+
+
+def test_fan_out_filters_per_guild_and_isolates_failures(tmp_path):
+    reg = SubscriptionRegistry([
+        Subscription(1, 10, window_days=7),                                     # everything
+        Subscription(2, 20, window_days=1, sets=frozenset({"dsk"})),            # a, b
+        Subscription(3, 30, window_days=7, rarities=frozenset({"mythic"})),     # c
+        Subscription(4, 40),                                                    # broken
+        Subscription(5, 50),                                                    # not visible
+    ])
+    ok10, ok20, ok30, broken = FakeChannel(10), FakeChannel(20), FakeChannel(30), BrokenChannel(40)
+    bot = FakeBot(ok10, ok20, ok30, broken)
+
+    async def run():
+        with PostedStore(str(tmp_path / "state.sqlite3"), primary_channel_id=10) as store:
+            return await fan_out_cards(bot, reg, _cards(), store, TODAY, 1, version="v1")
+
+    result = asyncio.run(run())
+    assert result.posted == {10: 3, 20: 2, 30: 1}
+    assert set(result.errors) == {40, 50}
+    assert [e["title"] for e in ok20.messages[0]["embeds"]] == ["A", "B"]
+
+    # Delivered destinations are deduped; the failed ones are retried
+    again = asyncio.run(run())
+    assert again.posted == {10: 0, 20: 0, 30: 0}
+    assert ok10.embed_count == 3
+    with PostedStore(str(tmp_path / "state.sqlite3"), primary_channel_id=10) as store:
+        assert len(store) == 3  # primary channel kept the legacy table
+        assert len(store.for_destination(20)) == 2
+        assert len(store.for_destination(40)) == 0
+
+
+def test_cards_mode_dedupes_on_oracle_id(tmp_path):
+    reg = SubscriptionRegistry([Subscription(1, 10), Subscription(2, 20)])
+    ch10, ch20 = FakeChannel(10), FakeChannel(20)
+    bot = FakeBot(ch10, ch20)
+    first = {"id": "p1", "oracle_id": "o1", "name": "A", "released_at": "2025-06-10"}
+    # Another snapshot (or the search feed) picks a different representative printing
+    reprint = {"id": "p2", "name": "A", "released_at": "2025-06-10", "card_faces": [{"oracle_id": "o1"}]}
+
+    async def run(cards):
+        with PostedStore(str(tmp_path / "state.sqlite3"), primary_channel_id=10, by_oracle=True) as store:
+            return await fan_out_cards(bot, reg, cards, store, TODAY, 1)
+
+    assert asyncio.run(run([first])).posted == {10: 1, 20: 1}
+    assert asyncio.run(run([reprint])).posted == {10: 0, 20: 0}
+    with PostedStore(str(tmp_path / "state.sqlite3"), primary_channel_id=10, by_oracle=True) as store:
+        assert store.posted_ids() == ["o1"]
+        assert store.for_destination(20).has_been_posted(reprint)
@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+from mtg_bot.fileio import atomic_write, write_json_atomic
+
+
+def test_atomic_write_replaces_or_leaves_the_file_untouched(tmp_path):
+    path = tmp_path / "meta.json"
+    write_json_atomic(str(path), {"updated_at": "v1"}, indent=2)
+    assert json.loads(path.read_text(encoding="utf-8")) == {"updated_at": "v1"}
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as wf:
+            wf.write('{"updated_at": "v2"')
+            raise RuntimeError("interrupted")
+    assert json.loads(path.read_text(encoding="utf-8")) == {"updated_at": "v1"}
+    assert [p.name for p in tmp_path.iterdir()] == ["meta.json"]  # no temp file left behind
+
+    with atomic_write(str(tmp_path / "blob.bin"), "wb") as wf:
+        wf.write(b"\x00\x01")
+    assert (tmp_path / "blob.bin").read_bytes() == b"\x00\x01"
@@ -0,0 +1,41 @@
+import asyncio
+
+from aiohttp import web
+
+from mtg_bot.httpclient import HttpClient
+
+
+def test_shared_session_reuses_connections():
+    seen_agents = []
+
+    async def handler(request):
+        seen_agents.append(request.headers.get("User-Agent"))
+        return web.Response(text="ok")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+        client = HttpClient(limit_per_host=2)
+        try:
+            for agent in ("ScryfallClient/1", "NewsClient/1", None):
+                headers = {"User-Agent": agent} if agent else None
+                async with client.session.get(url, headers=headers) as resp:
+                    assert await resp.text() == "ok"
+            stats = client.stats()
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["requests"] == 3
+    assert stats["sessions_created"] == 1
+    # One keep-alive connection served every request
+    assert (stats["connections_created"], stats["connections_reused"]) == (1, 2)
+    assert stats["pool_limit_per_host"] == 2
+    assert seen_agents[:2] == ["ScryfallClient/1", "NewsClient/1"]
@@ -0,0 +1,41 @@
+import glob
+import os
+
+import pytest
+
+from mtg_bot.link_extract import ENGINES, extract_archive_links, resolve_engine
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "news_archive_*.html")))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+@pytest.mark.parametrize("engine", sorted({resolve_engine(e) for e in ENGINES}))
+def test_engines_match_full_soup_parse(path, engine):
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    reference = extract_archive_links(html, "soup")
+    assert reference and not any("author=" in link for link in reference)
+    assert extract_archive_links(html, engine) == reference
+
+
+@pytest.mark.parametrize("engine", sorted({resolve_engine(e) for e in ENGINES}))
+def test_stops_at_first_seen_article(engine):
+    html = (
+        '<a href="/en/news/a/new-2">n2</a><a href="/en/news/archive?author=X">x</a>'
+        '<a href="/en/news/a">a</a><a href="/en/news/a/new-1">n1</a>'
+        '<a href="/en/news/a/old">old</a><a href="/en/news/a/older">older</a>'
+    )
+    seen = {"/en/news/a", "/en/news/a/old"}
+    assert extract_archive_links(html, engine, seen=seen) == ["/en/news/a/new-2", "/en/news/a/new-1"]
+
+
+@pytest.mark.parametrize("engine", sorted({resolve_engine(e) for e in ENGINES}))
+def test_seen_nav_and_category_links_do_not_stop_extraction(engine):
+    # An existing store holds the page's nav/category links alongside the articles
+    with open(os.path.join(os.path.dirname(__file__), "fixtures", "news_archive_small.html"), encoding="utf-8") as f:
+        html = f.read()
+    reference = extract_archive_links(html, "soup")
+    newest = "/en/news/announcements/article-0024-bundle-dominaria-spoilers"
+    seen = set(reference) - {newest}
+    assert {"/en/news/archive", "/en/news/announcements", "/en/news/magic-story"} <= seen
+    assert extract_archive_links(html, engine, seen=seen) == [newest, newest]
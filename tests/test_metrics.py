@@ -0,0 +1,93 @@
+import asyncio, json, logging, tracemalloc
+
+import aiohttp
+
+from mtg_bot.metrics import Metrics, MetricsServer, RateLimitLogCounter
+
+
+def test_stage_records_timing_peak_and_json_log(caplog):
+    metrics = Metrics()
+    tracemalloc.start()
+    try:
+        with caplog.at_level(logging.INFO, logger="mtg_bot.metrics"):
+            with metrics.stage("filter_recent", executor="thread") as st:
+                blob = [bytes(1000) for _ in range(100)]
+                st.note(scanned=100, kept=len(blob))
+    finally:
+        tracemalloc.stop()
+    metrics.inc("cards_scanned", 100)
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["stage"] == "filter_recent" and record["executor"] == "thread"
+    assert record["scanned"] == 100 and record["ok"] is True
+    assert record["peak_bytes"] >= 100_000
+    text = metrics.render_prometheus()
+    assert 'mtgbot_stage_seconds_count{stage="filter_recent",executor="thread"} 1' in text
+    assert "mtgbot_cards_scanned_total 100" in text
+
+
+def test_failed_stage_counts_error_and_reraises():
+    metrics = Metrics()
+    try:
+        with metrics.stage("bulk_download"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert metrics.snapshot()["stages"][0]["errors"] == 1
+
+
+def test_rate_limit_log_counter():
+    metrics = Metrics()
+    handler = RateLimitLogCounter(metrics)
+    record = logging.LogRecord("discord.http", logging.WARNING, __file__, 1,
+                               "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                               ("POST", "/channels/1/messages", 1.5), None)
+    handler.emit(record)
+    text = metrics.render_prometheus()
+    assert "mtgbot_discord_rate_limited_total 1" in text
+    assert 'mtgbot_rate_limit_wait_seconds_total{kind="discord_429"} 1.5' in text
+
+
+def test_metrics_endpoint_serves_text_and_json():
+    metrics = Metrics()
+    metrics.inc("discord_sends", kind="card_batch")
+
+    async def scenario():
+        server = MetricsServer(metrics, port=0)
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                base = f"http://127.0.0.1:{server.port}"
+                async with session.get(base + "/metrics") as resp:
+                    text = await resp.text()
+                async with session.get(base + "/metrics.json") as resp:
+                    snap = await resp.json()
+        finally:
+            await server.stop()
+        return text, snap
+
+    text, snap = asyncio.run(scenario())
+    assert 'mtgbot_discord_sends_total{kind="card_batch"} 1' in text
+    assert snap["counters"][0]["labels"] == {"kind": "card_batch"}
+
+
+def test_startup_path_writes_stage_json_lines(tmp_path, monkeypatch, capsys):
+    from mtg_bot import app
+    from mtg_bot.metrics import METRICS, log
+
+    monkeypatch.chdir(tmp_path)
+    for name, value in {"DISCORD_TOKEN": "x", "MTG_SPOILERS_CHANNEL_ID": "1", "BOT_TESTING_CHANNEL_ID": "2",
+                        "BULK_DIR": str(tmp_path / "bulk"), "STATE_PATH": str(tmp_path / "state.json")}.items():
+        monkeypatch.setenv(name, value)
+    saved = (log.level, log.propagate, list(log.handlers))
+    try:
+        app.main(["--startup-time"])
+        with METRICS.stage("startup_probe"):
+            pass
+        err = capsys.readouterr().err
+    finally:
+        log.setLevel(saved[0])
+        log.propagate = saved[1]
+        log.handlers[:] = saved[2]
+    record = json.loads(err.strip().splitlines()[-1])
+    assert record["event"] == "stage" and record["stage"] == "startup_probe"
@@ -0,0 +1,47 @@
+import json
+import time
+
+from mtg_bot import scryfall
+from mtg_bot.name_index import CardNameIndex, names_are_fresh, normalize_name
+
+CARDS = [
+    {"id": "00000000-0000-0000-0000-000000000001", "name": "Lightning Bolt", "set": "lea",
+     "collector_number": "161", "released_at": "1993-08-05"},
+    {"id": "00000000-0000-0000-0000-000000000002", "name": "Lightning Bolt", "set": "m10",
+     "collector_number": "146", "released_at": "2009-07-17"},
+    {"id": "00000000-0000-0000-0000-000000000003", "name": "Lightning Helix", "set": "rav",
+     "collector_number": "213", "released_at": "2005-10-07"},
+    {"id": "00000000-0000-0000-0000-000000000004", "name": "Delver of Secrets // Insectile Aberration",
+     "set": "isd", "collector_number": "51", "released_at": "2011-09-30"},
+    {"id": "00000000-0000-0000-0000-000000000005", "name": "Æther Vial", "set": "dst",
+     "collector_number": "91", "released_at": "2004-02-06"},
+]
+
+
+def _build(tmp_path):
+    bulk = tmp_path / "cards.json"
+    bulk.write_text("[\n" + ",\n".join(json.dumps(c) for c in CARDS) + "\n]\n", encoding="utf-8")
+    names = str(tmp_path / "names.json")
+    scryfall.rebuild_index(str(bulk), str(tmp_path / "index.bin"), "v1", names_path=names)
+    return str(bulk), names
+
+
+def test_lookups_read_only_the_matched_card(tmp_path):
+    bulk, names = _build(tmp_path)
+    assert names_are_fresh(names, bulk, "v1") and not names_are_fresh(names, bulk, "v2")
+    index = CardNameIndex.load(names, bulk)
+
+    [kid] = index.exact("lightning BOLT!")
+    assert index.card(index.newest_row(kid))["set"] == "m10"  # newest printing first
+    assert index.card(index.newest_row(kid, "LEA"))["collector_number"] == "161"
+    assert [index.display_name(k) for k in index.prefix("light")] == ["Lightning Bolt", "Lightning Helix"]
+    assert index.display_name(index.fuzzy("lightnig bolt")[0]) == "Lightning Bolt"
+    assert index.display_name(index.search("Insectile Aberration")[0]).startswith("Delver")
+    assert index.display_name(index.search("aether vial")[0]) == "Æther Vial"
+    assert index.card(index.by_set_number("RAV", "213"))["name"] == "Lightning Helix"
+    assert normalize_name("Æther  Vial,") == "aether vial"
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search("lightnig")
+    assert (time.perf_counter() - start) / 100 < 0.005
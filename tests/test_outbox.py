@@ -0,0 +1,95 @@
+import asyncio
+import time
+from datetime import date
+
+from benchmarks.fakes import FakeBot, FakeChannel
+from mtg_bot.embeds import render_card_payload
+from mtg_bot.fanout import drain_outbox, fan_out_cards
+from mtg_bot.metrics import METRICS
+from mtg_bot.outbox import Outbox
+from mtg_bot.state import PostedStore
+from mtg_bot.subscriptions import Subscription, SubscriptionRegistry
+
+TODAY = date(2025, 6, 10)
+
+
+def _cards(n):
+    return [{"id": f"c{i:02d}", "name": f"Card {i}", "released_at": "2025-06-10"} for i in range(n)]
+
+
+class StallingChannel(FakeChannel):
+    """Delivers `ok_sends` messages, then fails every send (Discord stalls / the run dies)."""
+
+    def __init__(self, channel_id, ok_sends):
+        super().__init__(channel_id)
+        self.ok_sends = ok_sends
+
+    async def send(self, *args, **kwargs):
+        if self.ok_sends <= 0:
+            raise RuntimeError("503 Service Unavailable")
+        self.ok_sends -= 1
+        await super().send(*args, **kwargs)
+
+
+def test_undelivered_items_resume_from_the_queue(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    reg = SubscriptionRegistry([Subscription(1, 10)])
+    stalling = StallingChannel(10, ok_sends=1)
+
+    async def first_run():
+        with PostedStore(db, primary_channel_id=10) as store:
+            return await fan_out_cards(FakeBot(stalling), reg, _cards(25), store, TODAY, 1, batch_size=10)
+
+    result = asyncio.run(first_run())
+    assert result.posted == {} and 10 in result.errors
+    with PostedStore(db, primary_channel_id=10) as store:
+        outbox = Outbox(store)
+        assert len(store) == 10 and len(outbox) == 15
+        assert outbox.publish_metrics()["depth"] == 15
+        assert METRICS.gauges[("outbox_depth", ())] == 15
+
+    # "After a restart": a fresh store and a healthy channel; no card data is passed in
+    healthy = FakeChannel(10)
+
+    async def resume():
+        with PostedStore(db, primary_channel_id=10) as store:
+            outbox = Outbox(store)
+            return await drain_outbox(FakeBot(healthy), outbox, due_only=False), len(outbox)
+
+    result, depth = asyncio.run(resume())
+    assert result.posted == {10: 15} and depth == 0
+    assert [e["title"] for m in healthy.messages for e in m["embeds"]] == [f"Card {i}" for i in range(10, 25)]
+
+
+def test_backoff_lease_and_posted_but_unacked(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    with PostedStore(db, primary_channel_id=10) as store, PostedStore(db, primary_channel_id=10) as other:
+        outbox = Outbox(store, max_attempts=2)
+        cards = _cards(3)
+        outbox.enqueue(10, [(c["id"], render_card_payload(c)) for c in cards])
+        assert outbox.enqueue(10, [("c00", {})]) == 0  # already queued
+
+        # A claim is a lease: another process leaves the channel alone until it expires
+        claimed = outbox.claim()
+        assert [i.card_id for i in claimed[10]] == ["c00", "c01", "c02"]
+        assert Outbox(other).claim() == {}
+        store.conn.execute("UPDATE outbox SET claimed_until = ?", (time.time() - 1,))
+
+        # Failed delivery backs off; the background pass skips it, an explicit run does not
+        outbox.release(claimed[10], "boom")
+        assert outbox.claim(due_only=True) == {}
+        assert outbox.stats()["depth"] == 3
+
+        # Recorded as posted before a crash could ack it: acked without a resend
+        store.persist_many([cards[1]])
+        channel = FakeChannel(10)
+        result = asyncio.run(drain_outbox(FakeBot(channel), outbox, due_only=False))
+        assert result.posted == {10: 2}
+        assert [e["title"] for e in channel.messages[0]["embeds"]] == ["Card 0", "Card 2"]
+        assert len(outbox) == 0
+
+        # Items for a channel that never comes back are dropped after max_attempts
+        outbox.enqueue(99, [("c00", render_card_payload(cards[0]))])
+        for _ in range(2):
+            asyncio.run(drain_outbox(FakeBot(), outbox, due_only=False))
+        assert len(outbox) == 0
@@ -0,0 +1,80 @@
+import asyncio
+
+from mtg_bot.posting import pack_embed_batches, post_pending_batched, render_pending
+from mtg_bot.embeds import EmbedPayloadCache, card_embed
+from mtg_bot.state import PostedStore
+
+
+class RecordingChannel:
+    def __init__(self, fail_on_call: int | None = None):
+        self.sent = []
+        self.fail_on_call = fail_on_call
+
+    async def send(self, content=None, *, embed=None, embeds=None):
+        if self.fail_on_call is not None and len(self.sent) == self.fail_on_call:
+            raise RuntimeError("discord unavailable")
+        self.sent.append(embeds or [embed])
+
+
+def _cards(n, text=""):
+    return [{"id": f"card-{i}", "name": f"Card {i}", "type_line": "Creature", "oracle_text": text}
+            for i in range(n)]
+
+
+def test_batches_respect_count_and_size_limits():
+    small = [(c, card_embed(c)) for c in _cards(23)]
+    assert [len(b) for b in pack_embed_batches(small)] == [10, 10, 3]
+    assert [len(b) for b in pack_embed_batches(small, batch_size=4)] == [4, 4, 4, 4, 4, 3]
+
+    big = [(c, card_embed(c)) for c in _cards(8, text="x" * 1000)]
+    batches = pack_embed_batches(big)
+    assert all(sum(len(e) for _, e in b) <= 6000 for b in batches)
+    assert [c["id"] for b in batches for c, _ in b] == [c["id"] for c, _ in big]
+
+
+def test_post_persists_per_batch_and_resumes(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    cards = _cards(25)
+
+    async def run(channel):
+        with PostedStore(db) as store:
+            fresh = [c for c in cards if not store.has_been_posted(c)]
+            return await post_pending_batched(channel, render_pending(fresh), store)
+
+    flaky = RecordingChannel(fail_on_call=1)
+    try:
+        asyncio.run(run(flaky))
+    except RuntimeError:
+        pass
+    assert len(flaky.sent) == 1  # first batch of 10 delivered and persisted
+
+    retry = RecordingChannel()
+    assert asyncio.run(run(retry)) == 15
+    assert [e.title for msg in retry.sent for e in msg] == [f"Card {i}" for i in range(10, 25)]
+
+
+def test_double_faced_card_renders_every_face():
+    card = {
+        "id": "dfc", "name": "Front // Back", "type_line": "Creature // Land",
+        "card_faces": [
+            {"name": "Front", "type_line": "Creature", "oracle_text": "Transform.",
+             "image_uris": {"normal": "front.jpg"}},
+            {"name": "Back", "type_line": "Land", "oracle_text": "T: Add G.",
+             "image_uris": {"normal": "back.jpg"}},
+        ],
+    }
+    embed = card_embed(card, "v1").to_dict()
+    assert [f["name"] for f in embed["fields"]] == ["Front", "Back"]
+    assert embed["fields"][1]["value"] == "Land\nT: Add G."
+    assert embed["image"]["url"] == "front.jpg"
+    assert embed["thumbnail"]["url"] == "back.jpg"
+
+
+def test_payloads_cached_per_bulk_version():
+    cache = EmbedPayloadCache(maxsize=2)
+    card = _cards(1)[0]
+    first = cache.payload(card, "v1")
+    assert cache.payload(card, "v1") is first
+    assert cache.payload(card, "v2") is not first
+    cache.prerender(_cards(3), "v2")
+    assert (cache.hits, cache.evictions) == (2, 2)
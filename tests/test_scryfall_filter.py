@@ -0,0 +1,156 @@
+import json
+from datetime import date
+
+from mtg_bot import bulk_index, scryfall
+from mtg_bot.delta import load_delta, mark_delta_consumed
+
+
+def _cards():
+    return [
+        {"id": "a", "name": "Old Card", "released_at": "2020-01-01"},
+        {"id": "b", "name": "Fresh Print", "released_at": "2025-06-10"},
+        {"id": "c", "name": "Spoiled “Early”", "released_at": "2025-07-01",
+         "preview": {"previewed_at": "2025-06-09"}},
+        {"id": "d", "name": "Bad Date", "released_at": "not-a-date"},
+        {"id": "e", "name": "Brace } in [text]", "released_at": "2025-06-10",
+         "oracle_text": 'Escaped "quote" and , comma'},
+    ]
+
+
+def _write_bulk(tmp_path, cards):
+    path = tmp_path / "bulk.json"
+    # Mimic Scryfall's layout: one card per line inside a top-level array
+    path.write_text("[\n" + ",\n".join(json.dumps(c, ensure_ascii=False) for c in cards) + "\n]\n",
+                    encoding="utf-8")
+    return str(path)
+
+
+def test_iter_bulk_cards_handles_small_chunks(tmp_path):
+    """Cards split across read chunks (including multi-byte chars) decode intact."""
+    path = _write_bulk(tmp_path, _cards())
+    assert list(scryfall.iter_bulk_cards(path, chunk_size=7)) == _cards()
+
+
+def test_iter_bulk_cards_empty_array(tmp_path):
+    path = tmp_path / "bulk.json"
+    path.write_text("  [ ]  ", encoding="utf-8")
+    assert list(scryfall.iter_bulk_cards(str(path))) == []
+
+
+def test_streaming_matches_full_load(tmp_path):
+    """Streaming mode returns the same newest-first list as json.load."""
+    path = _write_bulk(tmp_path, _cards())
+    since = date(2025, 6, 1)
+    streamed = scryfall.filter_recent_cards(path, since)
+    loaded = scryfall.filter_recent_cards(path, since, streaming=False)
+    assert streamed == loaded
+    assert [c["id"] for c in streamed] == ["b", "e", "c"]
+
+
+def test_index_query_matches_streaming(tmp_path):
+    """The sidecar index returns the same cards and order with targeted reads."""
+    path = _write_bulk(tmp_path, _cards())
+    index_path = str(tmp_path / "bulk.idx")
+    count = bulk_index.build_index(scryfall.iter_bulk_records(path), index_path, path, "2025-06-11")
+    assert count == len(_cards())
+    assert bulk_index.index_is_fresh(index_path, path, "2025-06-11")
+    assert not bulk_index.index_is_fresh(index_path, path, "2025-06-12")
+
+    for since in (date(2025, 6, 1), date(2025, 6, 10), date(2030, 1, 1), date(1990, 1, 1)):
+        assert scryfall.filter_recent_cards(path, since, index_path=index_path) == \
+            scryfall.filter_recent_cards(path, since)
+
+
+def test_stale_index_falls_back_to_scan(tmp_path):
+    path = _write_bulk(tmp_path, _cards())
+    index_path = str(tmp_path / "bulk.idx")
+    bulk_index.build_index(scryfall.iter_bulk_records(path), index_path, path, "v1")
+    _write_bulk(tmp_path, _cards()[:2])
+    assert not bulk_index.index_is_fresh(index_path, path)
+    assert [c["id"] for c in scryfall.filter_recent_cards(path, date(2025, 6, 1), index_path=index_path)] == ["b"]
+
+
+def test_delta_between_snapshots(tmp_path):
+    """Only added or substantively changed cards end up in the delta; price churn is ignored."""
+    fprints, delta_path, index_path = (str(tmp_path / n) for n in ("fp.bin", "delta.json", "bulk.idx"))
+    cards = [
+        {"id": "11111111-1111-1111-1111-111111111111", "name": "Keeper", "released_at": "2025-06-10",
+         "prices": {"usd": "1.00"}},
+        {"id": "22222222-2222-2222-2222-222222222222", "name": "Errata", "released_at": "2025-06-10",
+         "oracle_text": "Old"},
+    ]
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v1", fprints, delta_path)
+    assert scryfall.recent_from_delta(delta_path, "v1", date(2025, 6, 1)) is None
+
+    cards[0]["prices"] = {"usd": "2.00"}
+    cards[1]["oracle_text"] = "New"
+    cards.append({"id": "33333333-3333-3333-3333-333333333333", "name": "Spoiler",
+                  "released_at": "2025-07-01", "preview": {"previewed_at": "2025-06-11"}})
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v2", fprints, delta_path)
+    # Rebuilding the same snapshot keeps the v1 -> v2 delta intact
+    scryfall.rebuild_index(path, index_path, "v2", fprints, delta_path)
+
+    recent = scryfall.recent_from_delta(delta_path, "v2", date(2025, 6, 1))
+    assert [c["name"] for c in recent] == ["Spoiler", "Errata"]
+    assert scryfall.recent_from_delta(delta_path, "v3", date(2025, 6, 1)) is None
+
+
+def test_delta_accumulates_until_consumed(tmp_path):
+    """Snapshots pulled between daily runs (e.g. by /check-now) fold into one pending delta."""
+    fprints, delta_path, index_path = (str(tmp_path / n) for n in ("fp.bin", "delta.json", "bulk.idx"))
+    cards = [{"id": "11111111-1111-1111-1111-111111111111", "name": "Old", "released_at": "2025-06-10",
+              "oracle_text": "v1"}]
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v1", fprints, delta_path)
+
+    # Two refreshes before the next daily run
+    cards.append({"id": "22222222-2222-2222-2222-222222222222", "name": "First", "released_at": "2025-06-11"})
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v2", fprints, delta_path)
+    cards[0]["oracle_text"] = "v3"
+    cards.append({"id": "33333333-3333-3333-3333-333333333333", "name": "Second", "released_at": "2025-06-12"})
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v3", fprints, delta_path)
+
+    recent = scryfall.recent_from_delta(delta_path, "v3", date(2025, 6, 1))
+    assert [c["name"] for c in recent] == ["Second", "First", "Old"]
+    assert load_delta(delta_path, "v3")["from"] == "v1"
+
+    # Once the daily run consumed it, the next snapshot starts a fresh delta
+    mark_delta_consumed(delta_path, "v3")
+    cards.append({"id": "44444444-4444-4444-4444-444444444444", "name": "Third", "released_at": "2025-06-13"})
+    path = _write_bulk(tmp_path, cards)
+    scryfall.rebuild_index(path, index_path, "v4", fprints, delta_path)
+    assert [c["name"] for c in scryfall.recent_from_delta(delta_path, "v4", date(2025, 6, 1))] == ["Third"]
+
+
+def test_unique_by_oracle_keeps_newest_printing():
+    cards = [
+        {"id": "new", "oracle_id": "o1"},
+        {"id": "reprint", "oracle_id": "o1"},
+        {"id": "reversible", "card_faces": [{"oracle_id": "o2"}, {"oracle_id": "o2"}]},
+        {"id": "token"},
+    ]
+    assert [c["id"] for c in scryfall.unique_by_oracle(cards)] == ["new", "reversible", "token"]
+
+
+def test_numpy_and_pure_python_columns_agree(tmp_path, monkeypatch):
+    """Both column back ends give the same spans in the same newest-first order."""
+    cards = [{"id": f"00000000-0000-0000-0000-{i:012d}", "name": f"Card {i}",
+              "released_at": f"2025-06-{1 + i % 20:02d}",
+              **({"preview": {"previewed_at": f"2025-05-{1 + i % 28:02d}"}} if i % 3 == 0 else {})}
+             for i in range(200)]
+    path = _write_bulk(tmp_path, cards)
+    index_path = str(tmp_path / "bulk.idx")
+    bulk_index.build_index(scryfall.iter_bulk_records(path), index_path, path, "v1")
+    since = date(2025, 5, 20)
+
+    results = []
+    for backend in ({bulk_index._numpy()} - {None}) | {False}:  # False: the stdlib fallback
+        monkeypatch.setattr(bulk_index, "np", backend)
+        results.append(bulk_index.recent_spans(index_path, since))
+    assert all(r == results[0] for r in results)
+    by_scan = scryfall.filter_recent_cards(path, since)
+    assert scryfall.filter_recent_cards(path, since, index_path=index_path) == by_scan
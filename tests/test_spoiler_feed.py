@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeBot, FakeChannel, FakeSearchServer
+from mtg_bot.httpclient import HttpClient
+from mtg_bot.metrics import METRICS
+from mtg_bot.spoiler_feed import ScryfallSpoilerFeed
+from mtg_bot.state import PostedStore
+from mtg_bot.tasks_spoilers import setup_spoiler_feed
+
+TODAY = date.today()
+
+
+def _card(i: int, days_ago: int) -> dict:
+    spoiled = (TODAY - timedelta(days=days_ago)).isoformat()
+    return {"id": f"c{i}", "name": f"Card {i}", "set": "dsk", "rarity": "rare",
+            "released_at": (TODAY + timedelta(days=30)).isoformat(), "preview": {"previewed_at": spoiled}}
+
+
+def _feed(server, **kwargs) -> tuple[HttpClient, ScryfallSpoilerFeed]:
+    web = HttpClient()
+    return web, ScryfallSpoilerFeed(web.session, search_url=f"{server.base}/cards/search",
+                                    min_interval_s=0, **kwargs)
+
+
+def test_pages_only_until_seen_cards():
+    async def scenario():
+        cards = [_card(i, days_ago=i // 10) for i in range(50)]
+        async with FakeSearchServer(cards=cards, page_size=10) as server:
+            web, feed = _feed(server)
+            try:
+                posted = {"c25"}  # already posted by the daily run: pages 4-5 are never fetched
+                first = await feed.poll(TODAY - timedelta(days=7), known=lambda c: c["id"] in posted)
+                first_requests = server.kinds().count("search")
+
+                quiet = await feed.poll(TODAY - timedelta(days=7))
+                server.cards.insert(0, _card(99, days_ago=0))
+                new = await feed.poll(TODAY - timedelta(days=7))
+            finally:
+                await web.close()
+        return first, first_requests, quiet, new, server.kinds().count("search")
+
+    first, first_requests, quiet, new, total_requests = asyncio.run(scenario())
+    assert [c["id"] for c in first] == [f"c{i}" for i in range(30) if i != 25]
+    assert first_requests == 3
+    assert quiet == [] and [c["id"] for c in new] == ["c99"]
+    assert total_requests == 5  # each later poll stopped on its first page
+
+
+def test_retries_after_429_and_treats_404_as_empty():
+    async def scenario():
+        async with FakeSearchServer(cards=[_card(1, days_ago=0)]) as server:
+            web, feed = _feed(server)
+            server.rate_limit_next = 2
+            try:
+                cards = await feed.poll(TODAY)
+                nothing = await feed.poll(TODAY + timedelta(days=60))
+            finally:
+                await web.close()
+        return cards, nothing, server.kinds().count("search")
+
+    before = METRICS.counters.get(("spoiler_feed_requests", (("result", "rate_limited"),)), 0)
+    cards, nothing, requests = asyncio.run(scenario())
+    assert [c["id"] for c in cards] == ["c1"] and nothing == []
+    assert requests == 4
+    assert METRICS.counters[("spoiler_feed_requests", (("result", "rate_limited"),))] == before + 2
+
+
+def test_feed_task_posts_new_spoilers_once(tmp_path, monkeypatch):
+    cfg = SimpleNamespace(
+        spoiler_poll_minutes=5, spoiler_poll_max_pages=5, scryfall_unique="prints", tz_key="UTC",
+        window_days=3, subscriptions_path=str(tmp_path / "subs.json"), mtg_spoilers_channel_id=1,
+        state_db_path=str(tmp_path / "state.sqlite3"), state_path=str(tmp_path / "state.json"),
+        posted_retention_days=0, posted_retention_max=0, post_delay_ms=0, post_batch_size=10,
+        fanout_max_concurrency=4, outbox_max_attempts=8,
+    )
+    channel = FakeChannel(1)
+
+    async def scenario():
+        async with FakeSearchServer(cards=[_card(i, days_ago=0) for i in range(3)]) as server:
+            monkeypatch.setattr(ScryfallSpoilerFeed, "SEARCH_URL", f"{server.base}/cards/search")
+            web = HttpClient()
+            try:
+                feed_task = setup_spoiler_feed(FakeBot(channel), cfg, web)
+                await feed_task.coro()
+                await feed_task.coro()  # nothing new: no second post
+            finally:
+                await web.close()
+
+    asyncio.run(scenario())
+    assert channel.embed_count == 3
+    with PostedStore(cfg.state_db_path) as store:
+        assert len(store) == 3
+    cfg.spoiler_poll_minutes = 0
+    assert setup_spoiler_feed(FakeBot(channel), cfg, HttpClient()) is None
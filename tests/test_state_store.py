@@ -0,0 +1,77 @@
+import json
+import time
+from datetime import date, timedelta
+
+from mtg_bot.scryfall import is_recent
+from mtg_bot.state import PostedStore
+
+
+def test_migrates_state_json_once(tmp_path):
+    legacy = tmp_path / "state.json"
+    legacy.write_text(json.dumps({"last_run_date": "2025-06-10", "posted_ids": ["a", "b"]}))
+    db = str(tmp_path / "state.sqlite3")
+
+    with PostedStore(db, legacy_json_path=str(legacy)) as store:
+        assert store.has_been_posted({"id": "a"})
+        assert not store.has_been_posted({"id": "c"})
+        assert store.last_run_date == "2025-06-10"
+
+    # Later edits to the legacy file are not re-imported
+    legacy.write_text(json.dumps({"posted_ids": ["z"]}))
+    with PostedStore(db, legacy_json_path=str(legacy)) as store:
+        assert len(store) == 2
+        assert not store.has_been_posted({"id": "z"})
+
+
+def test_persist_survives_reopen_and_sees_other_writers(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    with PostedStore(db) as first, PostedStore(db) as second:
+        first.persist_posted({"id": "x"})
+        first.persist_many([{"id": "y"}, {"id": "z"}, {"name": "no id"}])
+        # `second` loaded its cache before these writes but still sees them
+        assert second.has_been_posted({"id": "y"})
+    with PostedStore(db) as store:
+        assert {c for c in ("x", "y", "z") if store.has_been_posted({"id": c})} == {"x", "y", "z"}
+
+
+def test_retention_by_age_and_count(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    with PostedStore(db, retention_days=30, retention_max=2) as store:
+        store.persist_many([{"id": "old", "released_at": "2020-01-01"}])
+        store.conn.execute("UPDATE posted SET posted_at = ? WHERE card_id = 'old'", (time.time() - 40 * 86400,))
+        for cid in ("a", "b", "c"):
+            store.persist_posted({"id": cid, "released_at": "2020-01-01"})
+            time.sleep(0.01)
+        assert store.prune() == 2
+        assert not store.has_been_posted({"id": "old"})
+        assert not store.has_been_posted({"id": "a"})
+        assert store.has_been_posted({"id": "c"})
+
+
+def test_retention_applies_to_each_fan_out_channel(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    with PostedStore(db, retention_days=30, retention_max=2, primary_channel_id=1) as store:
+        dest = store.for_destination(2)
+        dest.persist_many([{"id": "old", "released_at": "2020-01-01"}])
+        store.conn.execute("UPDATE delivered SET posted_at = ? WHERE card_id = 'old'", (time.time() - 40 * 86400,))
+        for cid in ("a", "b", "c"):
+            dest.persist_many([{"id": cid, "released_at": "2020-01-01"}])
+            store.for_destination(3).persist_many([{"id": cid, "released_at": "2020-01-01"}])
+            time.sleep(0.01)
+        assert store.prune() == 3
+        assert {c for c in ("old", "a", "b", "c") if store.for_destination(2).has_been_posted({"id": c})} == {"b", "c"}
+        assert len(store.for_destination(3)) == 2
+
+
+def test_retention_keeps_cards_that_are_still_recent(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    today = date.today()
+    # Previewed long ago, released in the future: still inside any lookback window
+    future = {"id": "future", "released_at": (today + timedelta(days=30)).isoformat(),
+              "preview": {"previewed_at": (today - timedelta(days=100)).isoformat()}}
+    with PostedStore(db, retention_days=90, retention_max=1) as store:
+        store.persist_many([future, {"id": "undated"}])
+        store.conn.execute("UPDATE posted SET posted_at = ?", (time.time() - 100 * 86400,))
+        assert store.prune() == 0
+        assert is_recent(future, today) and store.has_been_posted(future)
+        assert store.has_been_posted({"id": "undated"})
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from mtg_bot.card_cache import RecentCardCache
+from mtg_bot.outbox import Outbox
+from mtg_bot.state import PostedStore, prime_posted_ids
+from mtg_bot.warm_start import WarmStart
+from mtg_bot.workers import BulkWorkers
+
+
+def _setup(tmp_path, updated_at="v1"):
+    cards = [{"id": str(i), "name": f"Card {i}", "released_at": f"2025-06-{1 + i % 20:02d}"} for i in range(100)]
+    bulk = tmp_path / "bulk.json"
+    bulk.write_text(json.dumps(cards), encoding="utf-8")
+    meta = tmp_path / "meta.json"
+    meta.write_text(json.dumps({"updated_at": updated_at, "bulk_type": "default_cards"}), encoding="utf-8")
+    db = str(tmp_path / "state.sqlite3")
+    with PostedStore(db) as store:
+        store.persist_many([{"id": "1"}, {"id": "2"}])
+    return WarmStart(str(tmp_path / "warm.json"), str(meta), str(bulk), db), str(bulk)
+
+
+def test_bulk_refresh_writes_snapshot_that_restores_without_parsing(tmp_path, monkeypatch):
+    warm, bulk = _setup(tmp_path)
+    since = date(2025, 6, 15)
+
+    async def first_boot():
+        workers = BulkWorkers("thread", warm_start=warm)
+        try:
+            return await workers.recent_cards("v1", bulk, since)
+        finally:
+            workers.shutdown()
+
+    expected = asyncio.run(first_boot())
+    assert (tmp_path / "warm.json").exists()
+
+    cache = RecentCardCache()
+    restored = warm.load(cache)
+    assert restored == {"windows": 1, "cards": len(expected), "posted_ids": 2}
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("the bulk file should not be scanned after a warm start")
+
+    monkeypatch.setattr("mtg_bot.workers.scan_recent_cards", no_scan)
+
+    async def second_boot():
+        workers = BulkWorkers("thread", cache=cache)
+        try:
+            return await workers.recent_cards("v1", bulk, date(2025, 6, 18))
+        finally:
+            workers.shutdown()
+
+    assert asyncio.run(second_boot()) == [c for c in expected if c["released_at"] >= "2025-06-18"]
+    assert cache.hits == 1 and cache.misses == 0
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    warm, bulk = _setup(tmp_path)
+    cache = RecentCardCache()
+    asyncio.run(cache.get("v1", date(2025, 6, 1), lambda: asyncio.sleep(0, [{"id": "x"}])))
+    assert warm.save(cache)
+
+    # A newer bulk snapshot on disk: the saved window no longer applies
+    (tmp_path / "meta.json").write_text(json.dumps({"updated_at": "v2"}), encoding="utf-8")
+    fresh = RecentCardCache()
+    assert warm.load(fresh)["windows"] == 0 and fresh.updated_at is None
+
+    # Posted since the snapshot: the primed ids fail the fingerprint check and the table is read
+    with sqlite3.connect(warm.state_db_path) as conn:
+        conn.execute("INSERT INTO posted (card_id, posted_at) VALUES ('3', ?)", (time.time(),))
+    with PostedStore(warm.state_db_path) as store:
+        assert store._ids == {"1", "2", "3"}
+
+
+def test_primed_ids_replace_the_table_read_while_unchanged(tmp_path):
+    warm, _ = _setup(tmp_path)
+    with PostedStore(warm.state_db_path) as store:
+        fingerprint = store.fingerprint()
+    # A marker id that is not in the table shows the primed set was taken as-is
+    prime_posted_ids(warm.state_db_path, ["1", "2", "marker"], fingerprint)
+    with PostedStore(warm.state_db_path) as store:
+        assert store.has_been_posted({"id": "marker"})
+    # Primed ids are used once
+    with PostedStore(warm.state_db_path) as store:
+        assert not store.has_been_posted({"id": "marker"})
+
+
+def test_outbox_check_leaves_primed_ids_for_the_run(tmp_path):
+    warm, _ = _setup(tmp_path)
+    with PostedStore(warm.state_db_path) as store:
+        fingerprint = store.fingerprint()
+    prime_posted_ids(warm.state_db_path, ["1", "2", "marker"], fingerprint)
+    # What the outbox worker does on an idle tick
+    with PostedStore(warm.state_db_path) as store:
+        assert len(Outbox(store)) == 0
+        assert store._loaded_ids is None
+    with PostedStore(warm.state_db_path) as store:
+        assert store.has_been_posted({"id": "marker"})
+
+
+def test_refresh_exports_the_cache_on_the_loop_thread(tmp_path, monkeypatch):
+    warm, bulk = _setup(tmp_path)
+    cache = RecentCardCache()
+    export, threads = cache.export, []
+
+    def recording_export():
+        threads.append(threading.current_thread())
+        return export()
+
+    monkeypatch.setattr(cache, "export", recording_export)
+
+    async def refresh():
+        workers = BulkWorkers("thread", cache=cache, warm_start=warm)
+        try:
+            await workers.recent_cards("v1", bulk, date(2025, 6, 15))
+        finally:
+            workers.shutdown()
+
+    asyncio.run(refresh())
+    assert threads == [threading.main_thread()]
+    assert json.loads((tmp_path / "warm.json").read_text(encoding="utf-8"))["recent"]
+
+
+def test_delta_run_moves_the_snapshot_to_the_new_bulk(tmp_path):
+    warm, bulk = _setup(tmp_path)
+    assert warm.save(RecentCardCache())
+    # A bulk refresh, then a daily run that reads only the delta
+    (tmp_path / "meta.json").write_text(json.dumps({"updated_at": "v2"}), encoding="utf-8")
+
+    async def delta_run():
+        workers = BulkWorkers("thread", warm_start=warm)
+        try:
+            return await workers.recent_from_delta(str(tmp_path / "delta.json"), "v2", date(2025, 6, 15))
+        finally:
+            workers.shutdown()
+
+    assert asyncio.run(delta_run()) is None  # no delta on disk: the caller falls back to the window
+    saved = json.loads((tmp_path / "warm.json").read_text(encoding="utf-8"))
+    assert saved["bulk"]["updated_at"] == "v2"
+    assert sorted(saved["posted"]["ids"]) == ["1", "2"]
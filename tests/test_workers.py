@@ -0,0 +1,51 @@
+import asyncio
+import json
+import time
+from datetime import date
+
+from mtg_bot import scryfall
+from mtg_bot.workers import BulkWorkers, LoopLagMonitor
+
+
+def _write_bulk(tmp_path):
+    cards = [{"id": str(i), "name": f"Card {i}", "released_at": f"2025-06-{1 + i % 20:02d}"} for i in range(300)]
+    path = tmp_path / "bulk.json"
+    path.write_text(json.dumps(cards), encoding="utf-8")
+    return str(path)
+
+
+def test_thread_and_process_pools_match_sync(tmp_path):
+    path = _write_bulk(tmp_path)
+    since = date(2025, 6, 15)
+    expected = scryfall.filter_recent_cards(path, since)
+
+    async def scenario(kind):
+        workers = BulkWorkers(kind)
+        try:
+            return await workers.filter_recent_cards(path, since)
+        finally:
+            workers.shutdown()
+
+    assert asyncio.run(scenario("thread")) == expected
+    assert asyncio.run(scenario("process")) == expected
+
+
+def test_loop_stays_responsive_while_worker_busy():
+    """Blocking work in the executor leaves the loop free; the same work inline does not."""
+    async def scenario():
+        workers = BulkWorkers("thread")
+        try:
+            async with LoopLagMonitor(interval_s=0.01) as offloaded:
+                await workers.run(time.sleep, 0.3)
+            async with LoopLagMonitor(interval_s=0.01) as inline:
+                await asyncio.sleep(0)
+                time.sleep(0.3)
+                await asyncio.sleep(0.02)
+        finally:
+            workers.shutdown()
+        return offloaded, inline
+
+    offloaded, inline = asyncio.run(scenario())
+    assert offloaded.samples > 5
+    assert offloaded.max_lag_ms < 100
+    assert inline.max_lag_ms > 200